@@ -1,18 +1,17 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QTableWidget, QTableWidgetItem,
+                             QPushButton, QTableView, QAbstractItemView,
                              QHeaderView, QWidget, QCheckBox, QMessageBox,
                              QFrame)
 from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QFont, QColor
 import datetime
 
 
 from delegates import ComboBoxDelegate, DateDelegate
-import datetime
+from delegates import CheckBoxDelegate, DeleteButtonDelegate
 from excel_filter import ExcelHeaderView
-from transactions_dialog import NumericTableWidgetItem
 from custom_widgets import NoScrollComboBox, CheckableComboBox
 from utils import format_currency
+from transaction_table_model import AccountPerspectiveModel, TransactionSortProxyModel
 
 
 class AccountPerspectiveDialog(QDialog):
@@ -23,10 +22,6 @@ class AccountPerspectiveDialog(QDialog):
         self.budget_app = budget_app
         self.parent_window = parent
         self.selected_account_id = None
-        self.all_transactions_for_account = []
-        self.filtered_transactions = []
-        self.running_balance_history = {}
-        self.transaction_history_map = {}
 
         self.setWindowTitle('Account Perspective')
         self.setMinimumSize(1200, 600)
@@ -190,18 +185,19 @@ class AccountPerspectiveDialog(QDialog):
             'color: #666; font-style: italic; padding: 5px; background-color: #f0f0f0;')
         layout.addWidget(info_label)
 
-        self.table = QTableWidget()
+        self.model = AccountPerspectiveModel(self)
+        self.model.edit_handler = self.on_cell_changed
+        self.proxy = TransactionSortProxyModel(self)
+        self.proxy.setSourceModel(self.model)
 
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            'Date', 'Type', 'Category', 'Payee',
-            'Other Account', 'Notes', 'Transaction Amount', 'Running Balance',
-            'Confirmed', 'Delete'
-        ])
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
 
         self.header_view = ExcelHeaderView(self.table)
         self.header_view.set_filters_enabled(False)
         self.table.setHorizontalHeader(self.header_view)
+        # Size columns from the rows on screen rather than sampling the whole model.
+        self.header_view.setResizeContentsPrecision(0)
 
         self.table.verticalHeader().setVisible(False)
 
@@ -231,28 +227,26 @@ class AccountPerspectiveDialog(QDialog):
             "Verify this transaction against your real bank statement.\n(Optional - for your own tracking)",
             "Delete Transaction"
         ]
-        for col, tooltip in enumerate(header_tooltips):
-            item = self.table.horizontalHeaderItem(col)
-            if item:
-                item.setToolTip(tooltip)
+        self.model.header_tooltips = dict(enumerate(header_tooltips))
+
+        self.table.setSortingEnabled(True)
 
         self.table.setEditTriggers(
-            QTableWidget.EditTrigger.DoubleClicked | QTableWidget.EditTrigger.AnyKeyPressed)
-        self.table.cellChanged.connect(self.on_cell_changed)
+            QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.AnyKeyPressed)
 
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
                 background-color: white;
                 alternate-background-color: #f9f9f9;
                 font-size: 9pt;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #f0f0f0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #b3d9ff;
             }
             QHeaderView::section {
@@ -292,6 +286,15 @@ class AccountPerspectiveDialog(QDialog):
             self.table, self.get_category_options)
         self.table.setItemDelegateForColumn(2, self.category_delegate)
 
+        self.confirm_delegate = CheckBoxDelegate(self.table)
+        self.confirm_delegate.toggled.connect(self.on_checkbox_changed)
+        self.table.setItemDelegateForColumn(8, self.confirm_delegate)
+
+        self.delete_delegate = DeleteButtonDelegate(self.table)
+        self.delete_delegate.clicked.connect(self.on_delete_clicked)
+        self.table.setItemDelegateForColumn(9, self.delete_delegate)
+        self.table.setMouseTracking(True)
+
         layout.addWidget(self.table)
 
         self.status_label = QLabel('Select an account to view transactions')
@@ -312,18 +315,7 @@ class AccountPerspectiveDialog(QDialog):
     def populate_accounts_combo(self):
         try:
             accounts = self.budget_app.get_all_accounts()
-            all_transactions = self.budget_app.get_all_transactions()
-
-            account_transaction_count = {}
-            for account in accounts:
-                if account.id == 0:
-                    continue
-                count = 0
-                for trans in all_transactions:
-                    if (trans.account_id == account.id or
-                            trans.to_account_id == account.id):
-                        count += 1
-                account_transaction_count[account.id] = count
+            account_transaction_count = self.budget_app.get_transaction_counts()['accounts']
 
             filtered_accounts = [acc for acc in accounts if acc.id !=
                                  0 and account_transaction_count.get(acc.id, 0) > 0 and getattr(acc, 'is_active', True)]
@@ -385,19 +377,17 @@ class AccountPerspectiveDialog(QDialog):
     def get_account_name_by_id(self, account_id):
         if account_id is None:
             return ""
-        accounts = self.budget_app.get_all_accounts()
-        for account in accounts:
-            if account.id == account_id:
-                return account.account
+        account = self.budget_app.get_account_by_id(account_id)
+        if account and account.is_active:
+            return account.account
         return ""
 
     def get_account_currency_by_id(self, account_id):
         if account_id is None:
             return ""
-        accounts = self.budget_app.get_all_accounts()
-        for account in accounts:
-            if account.id == account_id:
-                return account.currency or ""
+        account = self.budget_app.get_account_by_id(account_id)
+        if account and account.is_active:
+            return account.currency or ""
         return ""
 
     def get_current_account_currency(self):
@@ -416,11 +406,6 @@ class AccountPerspectiveDialog(QDialog):
             return
 
         try:
-            account_id = self.selected_account_id
-            
-            self.all_transactions_for_account, self.running_balance_history = \
-                self.budget_app.get_account_transactions_with_balance(account_id)
-
             self.apply_filters()
 
         except Exception as e:
@@ -465,14 +450,12 @@ class AccountPerspectiveDialog(QDialog):
             self.apply_filters()
 
     def apply_filters(self):
-        if not self.selected_account_id or not self.all_transactions_for_account:
+        if not self.selected_account_id:
             return
 
         show_all_dates = self.show_all_dates_checkbox.isChecked()
         selected_year = int(self.year_combo.currentText())
 
-        transactions_to_display = []
-
         checked_indices = self.month_combo.get_checked_indices() 
         
         selected_months_0based = [] 
@@ -480,28 +463,17 @@ class AccountPerspectiveDialog(QDialog):
         for idx in checked_indices:
             if idx == 0: continue
             selected_months_0based.append(idx - 1)
-        
-        transactions_to_display = []
+
+        period_start_date = None
+        period_end_date = None
+        months = None
 
         if show_all_dates:
-            for trans in self.all_transactions_for_account:
-                if hasattr(trans, 'date') and trans.date:
-                    transactions_to_display.append(trans)
             filter_info = "All Dates"
 
         elif len(selected_months_0based) == 12 or not selected_months_0based:
-            for trans in self.all_transactions_for_account:
-                try:
-                    if hasattr(trans, 'date') and trans.date:
-                        trans_date = trans.date
-                        if isinstance(trans_date, str):
-                            trans_date = datetime.datetime.strptime(
-                                trans_date, '%Y-%m-%d').date()
-
-                        if trans_date.year == selected_year:
-                            transactions_to_display.append(trans)
-                except (ValueError, AttributeError):
-                    continue
+            period_start_date = datetime.date(selected_year, 1, 1)
+            period_end_date = datetime.date(selected_year, 12, 31)
             filter_info = f"All months {selected_year}"
         else:
             selected_month_names = []
@@ -511,140 +483,42 @@ class AccountPerspectiveDialog(QDialog):
 
             filter_info = f"{', '.join(selected_month_names)} {selected_year}"
 
-            for trans in self.all_transactions_for_account:
-                try:
-                    if hasattr(trans, 'date') and trans.date:
-                        trans_date = trans.date
-                        if isinstance(trans_date, str):
-                            trans_date = datetime.datetime.strptime(
-                                trans_date, '%Y-%m-%d').date()
-
-                        if trans_date.year == selected_year:
-                             if (trans_date.month - 1) in selected_months_0based:
-                                 transactions_to_display.append(trans)
-                except (ValueError, AttributeError):
-                    continue
-
-        transactions_to_display = sorted(
-            transactions_to_display, key=lambda x: (x.date, x.id), reverse=True)
+            min_idx = min(selected_months_0based)
+            max_idx = max(selected_months_0based)
+            period_start_date = datetime.date(selected_year, min_idx + 1, 1)
+            next_month = datetime.date(selected_year + 1, 1, 1) if max_idx == 11 else datetime.date(selected_year, max_idx + 2, 1)
+            period_end_date = next_month - datetime.timedelta(days=1)
+            months = [idx + 1 for idx in selected_months_0based]
 
-        transaction_history = []
+        transactions, opening_balance = self.budget_app.get_account_period_transactions(
+            self.selected_account_id,
+            period_start_date.isoformat() if period_start_date else None,
+            period_end_date.isoformat() if period_end_date else None,
+            months)
 
         accounts = self.budget_app.get_all_accounts(show_inactive=True)
         accounts_map = {acc.id: f'{acc.account}' for acc in accounts}
 
-        for trans in transactions_to_display:
-
-            if not (trans.date and str(trans.date).strip() and
-                    trans.type and str(trans.type).strip() and
-                    trans.amount is not None):
-                continue
-
-            running_balance = self.running_balance_history.get(trans.id, 0.0)
-
-            if trans.type == 'income' and trans.account_id == self.selected_account_id:
-                transaction_amount = float(trans.amount or 0)
-                effect = "+"
-                other_account = ""
-
-            elif trans.type == 'expense' and trans.account_id == self.selected_account_id:
-                transaction_amount = float(trans.amount or 0)
-                effect = "-"
-                other_account = ""
-
-            elif trans.type == 'transfer':
-                if trans.account_id == self.selected_account_id:
-                    transaction_amount = float(trans.amount or 0)
-                    effect = "-"
-                    other_account = accounts_map.get(trans.to_account_id, "")
-                elif trans.to_account_id == self.selected_account_id:
-                    transaction_amount = float(trans.to_amount or 0)
-                    effect = "+"
-                    other_account = accounts_map.get(trans.account_id, "")
-                else:
-                    continue
-            else:
-                continue
-
-            transaction_history.append({
-                'transaction': trans,
-                'transaction_amount': transaction_amount,
-                'effect': effect,
-                'running_balance': running_balance,
-                'other_account': other_account
-            })
-
-        self.populate_table(transaction_history)
+        self.populate_table(transactions, accounts_map)
 
-        total_balance = 0.0
-        if self.running_balance_history:
-            last_transaction_id = list(self.running_balance_history.keys())[0]
-            total_balance = self.running_balance_history[last_transaction_id]
+        total_balance = self.budget_app.get_account_balance(self.selected_account_id)
 
-        period_start_date = None
-        if not show_all_dates:
-             if len(selected_months_0based) == 12 or not selected_months_0based:
-                 period_start_date = datetime.date(selected_year, 1, 1)
-             elif selected_months_0based:
-                 min_idx = min(selected_months_0based)
-                 period_start_date = datetime.date(selected_year, min_idx + 1, 1)
-        
-        period_start_balance = 0.0
-        if period_start_date:
-            candidates_start = []
-            for t in self.all_transactions_for_account:
-                 if not (t.date and t.type and t.amount is not None): continue
-                 t_date = t.date
-                 if isinstance(t_date, str):
-                     try: t_date = datetime.datetime.strptime(t_date, '%Y-%m-%d').date()
-                     except: continue
-                 
-                 if t_date < period_start_date:
-                     candidates_start.append(t)
-            
-            if candidates_start:
-                candidates_start.sort(key=lambda x: (x.date, x.id), reverse=True)
-                period_start_balance = self.running_balance_history.get(candidates_start[0].id, 0.0)
+        period_start_balance = opening_balance if period_start_date else 0.0
 
-        period_end_balance = 0.0
-        if transaction_history:
-            period_end_balance = transaction_history[0]['running_balance']
+        # The ledger also covers periods without rows and unselected months
+        # between the selected ones; the top row's running balance does not.
+        if period_end_date:
+            period_end_balance = self.budget_app.get_account_balance(
+                self.selected_account_id, period_end_date.isoformat())
+        elif self.model.rowCount():
+            period_end_balance = self.model.running_balance(0)
         else:
-            if len(selected_months_0based) == 12 or not selected_months_0based:
-                period_end_date = datetime.date(selected_year, 12, 31)
-            elif selected_months_0based:
-                max_idx = max(selected_months_0based)
-                next_month = datetime.date(selected_year + 1, 1, 1) if max_idx == 11 else datetime.date(selected_year, max_idx + 2, 1)
-                period_end_date = next_month - datetime.timedelta(days=1)
-            else:
-                 period_end_date = None
-
-            candidates = []
-            for t in self.all_transactions_for_account:
-
-                if not (t.date and t.type and t.amount is not None):
-                    continue
-
-                t_date = t.date
-                if isinstance(t_date, str):
-                    try:
-                        t_date = datetime.datetime.strptime(
-                            t_date, '%Y-%m-%d').date()
-                    except:
-                        continue
-                if t_date <= period_end_date:
-                    candidates.append(t)
-
-            if candidates:
-                candidates.sort(key=lambda x: (x.date, x.id), reverse=True)
-                period_end_balance = self.running_balance_history.get(
-                    candidates[0].id, 0.0)
+            period_end_balance = total_balance
 
         currency = self.get_current_account_currency()
 
         total_color = '#4CAF50' if total_balance >= 0 else '#f44336'
         period_color = '#2e7d32' if period_end_balance >= 0 else '#c62828'
-        start_color = '#333333'
         start_color = '#2e7d32' if period_start_balance >= 0 else '#c62828'
 
         if currency:
@@ -670,49 +544,30 @@ class AccountPerspectiveDialog(QDialog):
 
         account_name = self.account_combo.currentText().split(' (')[0]
         self.show_status(
-            f'Showing {len(transaction_history)} transactions for {account_name} ({filter_info})')
+            f'Showing {self.model.rowCount()} transactions for {account_name} ({filter_info})')
         self.update_confirm_all_button_state()
 
     def get_category_options(self):
         categories = self.budget_app.get_all_categories()
         return sorted([c.sub_category for c in categories])
 
-    def on_cell_changed(self, row, column):
+    def on_cell_changed(self, row, column, new_value):
+        """Validate and save an edit of a model row; returns True when it was saved."""
         try:
-            item = self.table.item(row, column)
-            if not item:
-                return
-
             if column == 8:
-                return
+                return False
 
-            trans_id_item = self.table.item(row, 0)
-            if not trans_id_item: return
-            
-            trans_id = trans_id_item.data(Qt.ItemDataRole.UserRole)
-            
-            if trans_id is None:
-                 if row in self.transaction_history_map:
-                    trans_id = self.transaction_history_map[row].id
-            
-            if trans_id is None: return
-            
-            trans = getattr(self, 'trans_id_map', {}).get(trans_id)
-            if not trans:
-                trans = next((t for t in self.all_transactions_for_account if t.id == trans_id), None)
-            
-            if not trans: return
+            trans = self.model.frame[row]
+            trans_id = trans.id
 
             if hasattr(trans, 'confirmed') and trans.confirmed:
                 self.show_status("Cannot edit confirmed transaction", error=True)
                 QMessageBox.warning(self, "Transaction Confirmed",
                                     "This transaction is confirmed and cannot be modified.\n"
                                     "Please uncheck the confirmation box first.")
-                self.revert_cell(row, column, item.text()) 
-                self.refresh_data()
-                return
-
-            new_value = item.text().strip()
+                self.revert_cell(row, column)
+                QTimer.singleShot(0, self.refresh_data)
+                return False
 
             field = None
 
@@ -723,20 +578,19 @@ class AccountPerspectiveDialog(QDialog):
                 except ValueError:
                     self.show_status(
                         f'Invalid date format: {new_value}. Use YYYY-MM-DD', error=True)
-                    self.revert_cell(row, column, str(trans.date))
-                    return
+                    self.revert_cell(row, column)
+                    return False
 
             elif column == 2:
-                categories = self.budget_app.get_all_categories()
-                category_match = next((c for c in categories if c.sub_category == new_value), None)
+                category_match = self.budget_app.get_category_by_sub_category(new_value)
                 
                 if category_match:
                     field = 'category_id'
                     new_value = category_match.id
                 else:
                     self.show_status(f"Category '{new_value}' not found", error=True)
-                    self.revert_cell(row, column, trans.sub_category or "")
-                    return
+                    self.revert_cell(row, column)
+                    return False
 
             elif column == 3:
                 field = 'payee'
@@ -756,124 +610,47 @@ class AccountPerspectiveDialog(QDialog):
 
                 except ValueError:
                     self.show_status('Invalid amount', error=True)
-                    self.revert_cell(row, column, "?")
-                    self.refresh_data()
-                    return
+                    self.revert_cell(row, column)
+                    QTimer.singleShot(0, self.refresh_data)
+                    return False
 
             if field:
                 success = self.budget_app.update_transaction(
                     trans_id, **{field: new_value})
+                # Reload once the view has finished committing the edit.
+                QTimer.singleShot(0, self.refresh_data)
                 if success:
                     self.show_status(f'Updated transaction #{trans_id}')
-                    self.refresh_data()
 
                     if self.parent_window and hasattr(self.parent_window, 'update_balance_display'):
                         self.parent_window.update_balance_display()
-                else:
-                    self.show_status(
-                        f'Error updating transaction #{trans_id}', error=True)
-                    self.refresh_data()
+                    return True
+
+                self.show_status(
+                    f'Error updating transaction #{trans_id}', error=True)
+            return False
 
         except Exception as e:
             print(f"Error in on_cell_changed: {e}")
             self.show_status('Error updating transaction', error=True)
+            return False
 
-    def revert_cell(self, row, column, original_value):
-        self.table.blockSignals(True)
-        self.table.item(row, column).setText(original_value)
-        self.table.blockSignals(False)
+    def revert_cell(self, row, column):
+        """Repaint a cell from the model after a rejected edit."""
+        self.model.refresh_row(row)
 
-    def populate_table(self, transaction_history):
-        self.transaction_history_map = {}
-        self.trans_id_map = {}
+    def populate_table(self, transactions, accounts_map):
         self.table.setUpdatesEnabled(False)
-        self.table.blockSignals(True)
-        self.table.setSortingEnabled(False)
         
         try:
-            self.table.setRowCount(len(transaction_history))
-            
-            for row, data in enumerate(transaction_history):
-                trans = data['transaction']
-                self.transaction_history_map[row] = trans
-                self.trans_id_map[trans.id] = trans
-                
-                transaction_amount = data['transaction_amount']
-                effect = data['effect']
-                running_balance = data['running_balance']
-                other_account = data['other_account']
-
-                date_item = QTableWidgetItem(str(trans.date))
-                date_item.setData(Qt.ItemDataRole.UserRole, trans.id)
-                date_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 0, date_item)
-
-                type_item = QTableWidgetItem(str(trans.type).capitalize())
-                type_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-                self.table.setItem(row, 1, type_item)
-
-                cat_item = QTableWidgetItem(trans.sub_category or "")
-                cat_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 2, cat_item)
-
-                payee_item = QTableWidgetItem(trans.payee or "")
-                payee_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 3, payee_item)
-
-                other_item = QTableWidgetItem(other_account)
-                other_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-                self.table.setItem(row, 4, other_item)
-
-                note_item = QTableWidgetItem(trans.notes or "")
-                note_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 5, note_item)
-
-                amount_str = f"{effect}{format_currency(abs(transaction_amount))}"
-                amt_item = NumericTableWidgetItem(amount_str)
-                amt_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                if effect == '+':
-                    amt_item.setForeground(QColor("#2e7d32"))
-                else:
-                    amt_item.setForeground(QColor("#c62828"))
-                self.table.setItem(row, 6, amt_item)
-
-                bal_item = NumericTableWidgetItem(format_currency(running_balance))
-                bal_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                bal_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-                self.table.setItem(row, 7, bal_item)
-
-                chk_widget = QWidget()
-                chk_layout = QHBoxLayout()
-                chk_layout.setContentsMargins(0, 0, 0, 0)
-                chk_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                chk = QCheckBox()
-                chk.setChecked(trans.confirmed)
-                chk.setProperty('trans_id', trans.id)
-                chk.clicked.connect(self.on_checkbox_changed) 
-                chk_layout.addWidget(chk)
-                chk_widget.setLayout(chk_layout)
-                self.table.setCellWidget(row, 8, chk_widget)
-
-                del_widget = QWidget()
-                del_layout = QHBoxLayout()
-                del_layout.setContentsMargins(0, 0, 0, 0)
-                del_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                del_btn = QPushButton("✕")
-                del_btn.setFixedSize(20, 20)
-                del_btn.setStyleSheet("""
-                    QPushButton { background-color: #ff4444; color: white; border-radius: 10px; font-weight: bold; }
-                    QPushButton:hover { background-color: #cc0000; }
-                """)
-                del_btn.setProperty('trans_id', trans.id)
-                del_btn.clicked.connect(self.on_delete_clicked)
-                del_layout.addWidget(del_btn)
-                del_widget.setLayout(del_layout)
-                self.table.setCellWidget(row, 9, del_widget)
+            self.model.set_period(transactions, self.selected_account_id, accounts_map)
+            if self.header_view.filters:
+                self.header_view.apply_filters()
 
             self.table.resizeColumnsToContents()
             
             header = self.table.horizontalHeader()
-            for i in range(self.table.columnCount()):
+            for i in range(self.model.columnCount()):
                 current_width = header.sectionSize(i)
                 header.resizeSection(i, current_width + 25)
             self.table.setColumnWidth(0, max(150, self.table.columnWidth(0)))
@@ -881,7 +658,7 @@ class AccountPerspectiveDialog(QDialog):
             self.table.setColumnWidth(8, 80)
             self.table.setColumnWidth(9, 70)
 
-            if transaction_history:
+            if self.model.rowCount():
                 self.table.scrollToTop()
 
             total_width = self.table.horizontalHeader().length() + 50
@@ -894,22 +671,13 @@ class AccountPerspectiveDialog(QDialog):
             print(f"Error populating table: {e}")
             self.show_status("Error displaying transactions", error=True)
         finally:
-            self.table.blockSignals(False)
-            self.table.setSortingEnabled(True)
             self.table.setUpdatesEnabled(True)
             self.update_confirm_all_button_state()
 
     def confirm_all_visible(self):
         try:
-            unconfirmed_transactions = []
-
-            for row in range(self.table.rowCount()):
-                checkbox_widget = self.table.cellWidget(row, 8)
-                if checkbox_widget:
-                    checkbox = checkbox_widget.findChild(QCheckBox)
-                    if checkbox and not checkbox.isChecked():
-                        trans_id = checkbox.property('trans_id')
-                        unconfirmed_transactions.append(trans_id)
+            frame = self.model.frame
+            unconfirmed_transactions = frame.columns['id'][~frame.columns['confirmed']].tolist()
 
             if not unconfirmed_transactions:
                 self.show_status(
@@ -925,13 +693,10 @@ class AccountPerspectiveDialog(QDialog):
             )
 
             if reply == QMessageBox.StandardButton.Yes:
-                confirmed_count = 0
-                for trans_id in unconfirmed_transactions:
-                    try:
-                        self.budget_app.toggle_confirmation(trans_id)
-                        confirmed_count += 1
-                    except Exception as e:
-                        print(f"Error confirming transaction {trans_id}: {e}")
+                if not self.budget_app.set_confirmed_bulk(unconfirmed_transactions, True):
+                    self.show_status('Error confirming transactions!', error=True)
+                    return
+                confirmed_count = len(unconfirmed_transactions)
 
                 self.refresh_data()
 
@@ -945,15 +710,16 @@ class AccountPerspectiveDialog(QDialog):
             print(f"Error in confirm_all_visible: {e}")
             self.show_status('Error confirming transactions!', error=True)
 
-    def on_checkbox_changed(self, state):
+    def on_checkbox_changed(self, index):
         try:
-            checkbox = self.sender()
-            trans_id = checkbox.property('trans_id')
+            row = self.proxy.mapToSource(index).row()
+            trans = self.model.frame[row]
+            trans_id = trans.id
             self.budget_app.toggle_confirmation(trans_id)
             self.show_status(f'Transaction #{trans_id} confirmation toggled!')
-            
-            if hasattr(self, 'trans_id_map') and trans_id in self.trans_id_map:
-                 self.trans_id_map[trans_id].confirmed = checkbox.isChecked()
+
+            trans.confirmed = not trans.confirmed
+            self.model.refresh_row(row)
 
             if self.parent_window and hasattr(self.parent_window, 'update_balance_display'):
                 self.parent_window.update_balance_display()
@@ -965,38 +731,25 @@ class AccountPerspectiveDialog(QDialog):
             self.show_status('Error updating confirmation!', error=True)
 
     def update_confirm_all_button_state(self):
-        has_unconfirmed = False
-        all_confirmed = True
-
-        for row in range(self.table.rowCount()):
-            checkbox_widget = self.table.cellWidget(row, 8)
-            if checkbox_widget:
-                checkbox = checkbox_widget.findChild(QCheckBox)
-                if checkbox:
-                    if not checkbox.isChecked():
-                        has_unconfirmed = True
-                        all_confirmed = False
-                        break
+        row_count = self.model.rowCount()
+        has_unconfirmed = not self.model.frame.columns['confirmed'].all()
+        all_confirmed = not has_unconfirmed
 
         self.confirm_all_button.setEnabled(
-            self.table.rowCount() > 0 and has_unconfirmed)
+            row_count > 0 and has_unconfirmed)
 
         self.all_confirmed_label.setVisible(
-            self.table.rowCount() > 0 and all_confirmed)
+            row_count > 0 and all_confirmed)
 
     def reset_filters(self):
         if hasattr(self, 'header_view'):
             self.header_view.clear_filters()
 
-    def on_delete_clicked(self):
+    def on_delete_clicked(self, index):
         try:
-            button = self.sender()
-            trans_id = button.property('trans_id')
+            trans = self.model.frame[self.proxy.mapToSource(index).row()]
+            trans_id = trans.id
 
-            trans = getattr(self, 'trans_id_map', {}).get(trans_id)
-            if not trans:
-                 trans = next((t for t in self.all_transactions_for_account if t.id == trans_id), None)
-            
             if trans and hasattr(trans, 'confirmed') and trans.confirmed:
                 self.show_status("Cannot delete confirmed transaction", error=True)
                 QMessageBox.warning(self, "Transaction Confirmed",
@@ -1045,17 +798,5 @@ class AccountPerspectiveDialog(QDialog):
         if not hasattr(self, 'table'): return
         
         search_text = text.lower()
-        rows = self.table.rowCount()
-        cols = self.table.columnCount()
-        
-        for row in range(rows):
-            should_show = False
-            if not search_text:
-                should_show = True
-            else:
-                for col in range(cols):
-                    item = self.table.item(row, col)
-                    if item and search_text in item.text().lower():
-                        should_show = True
-                        break
-            self.table.setRowHidden(row, not should_show)
+        self.proxy.set_row_mask(
+            'search', self.model.search_mask(search_text) if search_text else None)
@@ -0,0 +1,108 @@
+import copy
+import hashlib
+import os
+import pickle
+import threading
+
+# Bump when the shape of a cached result changes; older files are ignored.
+CACHE_FORMAT = 1
+
+
+class AggregateCache:
+    """
+    Computed aggregates (balance summaries, monthly series, XIRR/TWR tables)
+    pickled to a directory next to the database.
+
+    Each entry keeps the fingerprint of the tables it was computed from, as
+    returned by fingerprint(tables). peek() hands back the stored result
+    without touching the database, so a tab can draw last session's numbers at
+    once; revalidate() (meant for a loader thread) recomputes only when the
+    fingerprint no longer matches. Results are copied on the way out, like
+    QueryCache does.
+    """
+
+    def __init__(self, directory, fingerprint):
+        self.directory = directory
+        self._fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._entries = {}   # (name, key) -> (fingerprint, value), as read or written
+
+    def _path(self, name, key):
+        digest = hashlib.sha1(repr((name, key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{name}-{digest[:16]}.pickle")
+
+    def _load(self, name, key):
+        with self._lock:
+            entry = self._entries.get((name, key))
+        if entry is not None:
+            return entry
+        try:
+            with open(self._path(name, key), 'rb') as f:
+                stored = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached {name}: {e}")
+            return None
+        if stored.get('format') != CACHE_FORMAT or stored.get('name') != name or stored.get('key') != key:
+            return None
+        entry = (stored['fingerprint'], stored['value'])
+        with self._lock:
+            self._entries[(name, key)] = entry
+        return entry
+
+    def _store(self, name, key, fingerprint, value):
+        with self._lock:
+            self._entries[(name, key)] = (fingerprint, value)
+        path = self._path(name, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'format': CACHE_FORMAT, 'name': name, 'key': key,
+                             'fingerprint': fingerprint, 'value': value},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing cached {name}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def peek(self, name, key):
+        """The last stored result for (name, key), possibly stale, or None."""
+        entry = self._load(name, key)
+        return copy.deepcopy(entry[1]) if entry is not None else None
+
+    def revalidate(self, name, key, tables, compute):
+        """
+        (value, changed): the stored result if `tables` still have the
+        fingerprint it was computed from, else compute() stored afresh.
+        """
+        fingerprint = self._fingerprint(tables)
+        entry = self._load(name, key)
+        if entry is not None and entry[0] == fingerprint:
+            return copy.deepcopy(entry[1]), False
+        value = compute()
+        # Empty results are not stored: loaders also return them on errors, and
+        # they are cheap to recompute. The second fingerprint keeps a write
+        # committed while computing from being stored as current.
+        if value and self._fingerprint(tables) == fingerprint:
+            self._store(name, key, fingerprint, copy.deepcopy(value))
+        return value, True
+
+    def clear(self):
+        """Forget every entry, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for file_name in names:
+            if file_name.endswith('.pickle'):
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except OSError as e:
+                    print(f"Error removing cached {file_name}: {e}")
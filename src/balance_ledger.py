@@ -0,0 +1,314 @@
+import sys
+
+import duckdb
+import numpy as np
+
+from connection_pool import registered_columns
+
+
+# account_daily_balance holds the running balance, qty in/out and transaction count
+# of an account at the end of each date on which it changed, so a balance at any
+# date is one as-of lookup instead of an aggregate over all transactions.
+LEDGER_DDL = """
+    CREATE TABLE IF NOT EXISTS account_daily_balance (
+        account_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        balance DECIMAL(18, 2) NOT NULL,
+        qty_in DECIMAL(18, 4) NOT NULL,
+        qty_out DECIMAL(18, 4) NOT NULL,
+        cnt BIGINT NOT NULL,
+        PRIMARY KEY (account_id, date)
+    )
+"""
+
+# Fields whose change moves a balance; other transaction edits skip the ledger.
+BALANCE_FIELDS = {'date', 'type', 'amount', 'account_id', 'to_account_id', 'to_amount', 'qty'}
+
+
+def _moves_sql(tx_filter: str = "") -> str:
+    """One row per account side of each transaction, same rules as get_balance_summary."""
+    return f"""
+        SELECT account_id, date,
+               CAST(COALESCE(amount, 0) AS DECIMAL(18, 2)) AS d_balance,
+               CAST(COALESCE(qty, 0) AS DECIMAL(18, 4)) AS d_qty_in,
+               CAST(0 AS DECIMAL(18, 4)) AS d_qty_out,
+               1 AS cnt
+        FROM transactions WHERE type='income' AND account_id IS NOT NULL {tx_filter}
+
+        UNION ALL
+
+        SELECT account_id, date,
+               CAST(-COALESCE(amount, 0) AS DECIMAL(18, 2)),
+               CAST(0 AS DECIMAL(18, 4)),
+               CAST(COALESCE(qty, 0) AS DECIMAL(18, 4)),
+               1
+        FROM transactions WHERE type IN ('expense', 'transfer') AND account_id IS NOT NULL {tx_filter}
+
+        UNION ALL
+
+        SELECT to_account_id, date,
+               CAST(COALESCE(to_amount, 0) AS DECIMAL(18, 2)),
+               CAST(COALESCE(qty, 0) AS DECIMAL(18, 4)),
+               CAST(0 AS DECIMAL(18, 4)),
+               1
+        FROM transactions WHERE type='transfer' AND to_account_id IS NOT NULL {tx_filter}
+    """
+
+
+_EXPECTED_SQL = f"""
+    SELECT account_id, date,
+           SUM(d_balance) OVER w AS balance,
+           SUM(d_qty_in) OVER w AS qty_in,
+           SUM(d_qty_out) OVER w AS qty_out,
+           SUM(cnt) OVER w AS cnt
+    FROM (
+        SELECT account_id, date,
+               SUM(d_balance) AS d_balance, SUM(d_qty_in) AS d_qty_in,
+               SUM(d_qty_out) AS d_qty_out, SUM(cnt) AS cnt
+        FROM ({_moves_sql()})
+        GROUP BY account_id, date
+    )
+    WINDOW w AS (PARTITION BY account_id ORDER BY date
+                 ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+"""
+
+
+def ensure_table(conn):
+    conn.execute(LEDGER_DDL)
+
+
+def rebuild(conn) -> int:
+    """Recompute the whole ledger from transactions. Returns the number of ledger rows."""
+    ensure_table(conn)
+    conn.execute("DELETE FROM account_daily_balance")
+    conn.execute(f"INSERT INTO account_daily_balance {_EXPECTED_SQL}")
+    return conn.execute("SELECT COUNT(*) FROM account_daily_balance").fetchone()[0]
+
+
+def verify(conn) -> list:
+    """
+    Compare the ledger with a fresh computation.
+    Returns [(account_id, date, expected (balance, qty_in, qty_out, cnt), stored (...))]
+    for every differing row; an empty list means the ledger is correct.
+    """
+    rows = conn.execute(f"""
+        WITH expected AS ({_EXPECTED_SQL})
+        SELECT COALESCE(e.account_id, l.account_id), COALESCE(e.date, l.date),
+               e.balance, e.qty_in, e.qty_out, e.cnt,
+               l.balance, l.qty_in, l.qty_out, l.cnt
+        FROM expected e
+        FULL OUTER JOIN account_daily_balance l
+            ON e.account_id = l.account_id AND e.date = l.date
+        WHERE e.account_id IS NULL OR l.account_id IS NULL
+           OR e.balance != l.balance OR e.qty_in != l.qty_in
+           OR e.qty_out != l.qty_out OR e.cnt != l.cnt
+        ORDER BY 1, 2
+    """).fetchall()
+    return [(r[0], r[1], tuple(r[2:6]), tuple(r[6:10])) for r in rows]
+
+
+def is_consistent(conn) -> bool:
+    """Cheap startup check: ledger totals match the transactions table."""
+    expected = conn.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(d_balance), 0), COALESCE(SUM(d_qty_in - d_qty_out), 0)
+        FROM ({_moves_sql()})
+    """).fetchone()
+    stored = conn.execute("""
+        SELECT COALESCE(SUM(cnt), 0), COALESCE(SUM(balance), 0), COALESCE(SUM(qty_in - qty_out), 0)
+        FROM (
+            SELECT arg_max(cnt, date) AS cnt, arg_max(balance, date) AS balance,
+                   arg_max(qty_in, date) AS qty_in, arg_max(qty_out, date) AS qty_out
+            FROM account_daily_balance
+            GROUP BY account_id
+        )
+    """).fetchone()
+    return tuple(expected) == tuple(stored)
+
+
+# Up to this many touched (account, day) pairs are applied with small per-day
+# statements; larger batches use the set-based path, whose cost is flat.
+_ROW_BY_ROW_LIMIT = 4
+
+
+def apply_transactions(conn, trans_ids: list, sign: int = 1):
+    """
+    Add (sign=1) or remove (sign=-1) the effect of the given transactions, as
+    currently stored in the transactions table, on the ledger. Call after
+    inserting, and before deleting or updating them.
+    """
+    if not len(trans_ids):
+        return
+    sign = -1 if sign < 0 else 1
+    with registered_columns(conn, '_ledger_ids', {'id': np.asarray(trans_ids, dtype=np.int64)}):
+        deltas = conn.execute(f"""
+            SELECT account_id, date,
+                   SUM(d_balance), SUM(d_qty_in), SUM(d_qty_out), SUM(cnt)
+            FROM ({_moves_sql("AND id IN (SELECT id FROM _ledger_ids)")})
+            GROUP BY account_id, date
+            ORDER BY account_id, date
+        """).fetchall()
+
+    if not deltas:
+        return
+    if len(deltas) <= _ROW_BY_ROW_LIMIT:
+        for row in deltas:
+            _apply_day(conn, *row, sign)
+    else:
+        _apply_days(conn, deltas, sign)
+
+
+def _apply_day(conn, account_id, day, d_balance, d_qty_in, d_qty_out, cnt, sign):
+    # Open a row for the day carrying the previous running totals, then shift
+    # that day and every later one by the delta.
+    conn.execute("""
+        INSERT INTO account_daily_balance
+        SELECT ?, ?,
+               COALESCE(arg_max(balance, date), 0), COALESCE(arg_max(qty_in, date), 0),
+               COALESCE(arg_max(qty_out, date), 0), COALESCE(arg_max(cnt, date), 0)
+        FROM account_daily_balance
+        WHERE account_id = ? AND date < ?
+        ON CONFLICT DO NOTHING
+    """, [account_id, day, account_id, day])
+    conn.execute("""
+        UPDATE account_daily_balance
+        SET balance = balance + ?, qty_in = qty_in + ?,
+            qty_out = qty_out + ?, cnt = cnt + ?
+        WHERE account_id = ? AND date >= ?
+    """, [sign * d_balance, sign * d_qty_in, sign * d_qty_out, sign * cnt, account_id, day])
+    if sign < 0:
+        # Drop the day's row once no transaction is left on it.
+        conn.execute("""
+            DELETE FROM account_daily_balance
+            WHERE account_id = ? AND date = ?
+              AND cnt = COALESCE((
+                  SELECT arg_max(cnt, date) FROM account_daily_balance
+                  WHERE account_id = ? AND date < ?), 0)
+        """, [account_id, day, account_id, day])
+
+
+def _apply_days(conn, deltas, sign):
+    """Set-based version of _apply_day for many (account, day) deltas at once."""
+    account_ids, days, d_balance, d_qty_in, d_qty_out, cnt = zip(*deltas)
+    columns = {
+        'account_id': np.array(account_ids, dtype=np.int64),
+        'date': np.array([str(d) for d in days]),
+        'd_balance': np.array(d_balance, dtype=np.float64),
+        'd_qty_in': np.array(d_qty_in, dtype=np.float64),
+        'd_qty_out': np.array(d_qty_out, dtype=np.float64),
+        'cnt': np.array(cnt, dtype=np.int64),
+    }
+    with registered_columns(conn, '_ledger_deltas', columns):
+        _apply_registered_deltas(conn, sign)
+
+
+def _apply_registered_deltas(conn, sign):
+    deltas = """
+        SELECT account_id, CAST(date AS DATE) AS date,
+               CAST(d_balance AS DECIMAL(18, 2)) AS d_balance,
+               CAST(d_qty_in AS DECIMAL(18, 4)) AS d_qty_in,
+               CAST(d_qty_out AS DECIMAL(18, 4)) AS d_qty_out, cnt
+        FROM _ledger_deltas
+    """
+
+    conn.execute(f"""
+        INSERT INTO account_daily_balance
+        SELECT d.account_id, d.date,
+               COALESCE(l.balance, 0), COALESCE(l.qty_in, 0),
+               COALESCE(l.qty_out, 0), COALESCE(l.cnt, 0)
+        FROM ({deltas}) d
+        ASOF LEFT JOIN account_daily_balance l
+            ON d.account_id = l.account_id AND d.date > l.date
+        ON CONFLICT DO NOTHING
+    """)
+
+    # Shift each ledger row by the cumulative delta of all touched days up to it.
+    conn.execute(f"""
+        UPDATE account_daily_balance
+        SET balance = balance + s.d_balance, qty_in = qty_in + s.d_qty_in,
+            qty_out = qty_out + s.d_qty_out, cnt = account_daily_balance.cnt + s.d_cnt
+        FROM (
+            SELECT l.account_id, l.date,
+                   {sign} * c.d_balance AS d_balance, {sign} * c.d_qty_in AS d_qty_in,
+                   {sign} * c.d_qty_out AS d_qty_out, {sign} * c.cnt AS d_cnt
+            FROM account_daily_balance l
+            ASOF JOIN (
+                SELECT account_id, date,
+                       SUM(d_balance) OVER w AS d_balance, SUM(d_qty_in) OVER w AS d_qty_in,
+                       SUM(d_qty_out) OVER w AS d_qty_out, SUM(cnt) OVER w AS cnt
+                FROM ({deltas})
+                WINDOW w AS (PARTITION BY account_id ORDER BY date
+                             ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+            ) c ON l.account_id = c.account_id AND l.date >= c.date
+        ) s
+        WHERE account_daily_balance.account_id = s.account_id
+          AND account_daily_balance.date = s.date
+    """)
+
+    if sign < 0:
+        conn.execute(f"""
+            DELETE FROM account_daily_balance
+            USING (
+                SELECT l.account_id, l.date
+                FROM (
+                    SELECT account_id, date, cnt,
+                           LAG(cnt, 1, 0) OVER (PARTITION BY account_id ORDER BY date) AS prev_cnt
+                    FROM account_daily_balance
+                ) l
+                JOIN ({deltas}) d ON l.account_id = d.account_id AND l.date = d.date
+                WHERE l.cnt = l.prev_cnt
+            ) e
+            WHERE account_daily_balance.account_id = e.account_id
+              AND account_daily_balance.date = e.date
+        """)
+
+
+def balances_at(conn, target_date=None) -> list:
+    """[(account_id, balance, qty_in, qty_out, count)] as of target_date (inclusive)."""
+    date_filter = ""
+    params = []
+    if target_date:
+        date_filter = "WHERE date <= ?"
+        params = [target_date]
+    return conn.execute(f"""
+        SELECT account_id,
+               arg_max(balance, date), arg_max(qty_in, date),
+               arg_max(qty_out, date), arg_max(cnt, date)
+        FROM account_daily_balance
+        {date_filter}
+        GROUP BY account_id
+    """, params).fetchall()
+
+
+def balance_of(conn, account_id, target_date=None, inclusive=True):
+    """Balance of one account at the end of target_date, or of the day before it when not inclusive."""
+    date_filter = ""
+    params = [account_id]
+    if target_date:
+        date_filter = "AND date <= ?" if inclusive else "AND date < ?"
+        params.append(target_date)
+    row = conn.execute(f"""
+        SELECT balance FROM account_daily_balance
+        WHERE account_id = ? {date_filter}
+        ORDER BY date DESC
+        LIMIT 1
+    """, params).fetchone()
+    return row[0] if row else 0
+
+
+if __name__ == '__main__':
+    # python balance_ledger.py <budget.duckdb> [--rebuild]
+    if len(sys.argv) < 2:
+        print("Usage: python balance_ledger.py <database> [--rebuild]")
+        sys.exit(2)
+
+    conn = duckdb.connect(sys.argv[1])
+    try:
+        if '--rebuild' in sys.argv[2:]:
+            print(f"Rebuilt account_daily_balance: {rebuild(conn)} rows")
+        mismatches = verify(conn)
+        for account_id, day, expected, stored in mismatches[:50]:
+            print(f"Account {account_id} {day}: expected {expected}, stored {stored}")
+        print("Ledger OK" if not mismatches else f"{len(mismatches)} mismatched rows")
+        sys.exit(1 if mismatches else 0)
+    finally:
+        conn.close()
@@ -7,6 +7,7 @@ from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont, QColor
 from custom_widgets import NoScrollComboBox
 from excel_filter import ExcelHeaderView
+from search_index import TableSearch
 from transactions_dialog import NumericTableWidgetItem, TOTAL_ROW_ROLE, StringTableWidgetItem
 from utils import format_currency
 
@@ -73,6 +74,7 @@ class BalanceTab(QWidget):
 
 
         self.balance_table = QTableWidget()
+        self.table_search = TableSearch(self.balance_table)
         self.balance_table.setEditTriggers(
             QTableWidget.EditTrigger.NoEditTriggers)
         self.balance_table.setSelectionMode(
@@ -146,22 +148,7 @@ class BalanceTab(QWidget):
             
     def filter_content(self, text):
         """Filter table rows based on text matching."""
-        search_text = text.lower()
-        rows = self.balance_table.rowCount()
-        cols = self.balance_table.columnCount()
-        
-        for row in range(rows):
-            should_show = False
-            if not search_text:
-                should_show = True
-            else:
-                for col in range(cols):
-                    item = self.balance_table.item(row, col)
-                    if item and search_text in item.text().lower():
-                        should_show = True
-                        break
-            
-            self.balance_table.setRowHidden(row, not should_show)
+        self.table_search.filter(text)
 
     def get_end_date(self):
         mode = self.range_combo.currentData()
@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QColor
 from excel_filter import ExcelHeaderView
+from search_index import TableSearch
 from transactions_dialog import NumericTableWidgetItem
 from custom_widgets import NoScrollComboBox
 
@@ -59,6 +60,7 @@ class CategoriesDialog(QDialog):
         layout.addLayout(sub_category_layout)
 
         self.table = QTableWidget()
+        self.table_search = TableSearch(self.table)
         self.table.setColumnCount(5)
         self.table.setHorizontalHeaderLabels(
             ['ID', 'Category Type', 'Main Category', 'Category', 'Delete'])
@@ -493,19 +495,4 @@ class CategoriesDialog(QDialog):
     def filter_content(self, text):
         """Filter table rows based on text matching."""
         if not hasattr(self, 'table'): return
-        
-        search_text = text.lower()
-        rows = self.table.rowCount()
-        cols = self.table.columnCount()
-        
-        for row in range(rows):
-            should_show = False
-            if not search_text:
-                should_show = True
-            else:
-                for col in range(cols):
-                    item = self.table.item(row, col)
-                    if item and search_text in item.text().lower():
-                        should_show = True
-                        break
-            self.table.setRowHidden(row, not should_show)
+        self.table_search.filter(text)
@@ -0,0 +1,95 @@
+import threading
+
+
+class ChangeEvent:
+    """
+    One committed write: the tables it touched and, when known, the accounts
+    and the 'YYYY-MM-DD' date range of the affected rows (None means unknown / any).
+    """
+    __slots__ = ('tables', 'account_ids', 'start_date', 'end_date')
+
+    def __init__(self, tables, account_ids=None, start_date=None, end_date=None):
+        self.tables = frozenset(tables)
+        self.account_ids = frozenset(account_ids) if account_ids is not None else None
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def touches(self, tables=None, account_ids=None, start_date=None, end_date=None) -> bool:
+        """Whether the change may affect data read from tables, accounts and dates."""
+        if tables is not None and not self.tables & set(tables):
+            return False
+        if account_ids is not None and self.account_ids is not None \
+                and not self.account_ids & set(account_ids):
+            return False
+        if self.start_date is not None and end_date is not None and self.start_date > end_date:
+            return False
+        if self.end_date is not None and start_date is not None and self.end_date < start_date:
+            return False
+        return True
+
+    def __repr__(self):
+        return (f"ChangeEvent(tables={sorted(self.tables)}, accounts={self.account_ids}, "
+                f"dates={self.start_date}..{self.end_date})")
+
+
+class ChangeBus:
+    """
+    Publish/subscribe channel for BudgetApp writes.
+    Subscribers are called synchronously in the writing thread after commit,
+    so callbacks should only record the change (e.g. set a dirty flag).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._next_token = 0
+
+    def subscribe(self, callback, tables=None) -> int:
+        """Call callback(event) for changes to any of tables (default: all). Returns a token."""
+        with self._lock:
+            self._next_token += 1
+            self._subscribers[self._next_token] = (callback, frozenset(tables) if tables else None)
+            return self._next_token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def publish(self, event: ChangeEvent):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for callback, tables in subscribers:
+            if tables is not None and not event.tables & tables:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in change subscriber: {e}")
+
+
+class DirtyFlag:
+    """
+    Dirty flag fed by a ChangeBus subscription, for views that recompute lazily.
+    Starts dirty; take() returns whether a refresh is due and clears the flag.
+    An optional predicate(event) narrows which changes count.
+    """
+
+    def __init__(self, bus: ChangeBus, tables, predicate=None):
+        self.dirty = True
+        self._predicate = predicate
+        self._token = bus.subscribe(self._on_change, tables)
+        self._bus = bus
+
+    def _on_change(self, event):
+        if self._predicate is None or self._predicate(event):
+            self.dirty = True
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def take(self) -> bool:
+        dirty, self.dirty = self.dirty, False
+        return dirty
+
+    def close(self):
+        self._bus.unsubscribe(self._token)
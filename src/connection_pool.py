@@ -0,0 +1,168 @@
+import threading
+import weakref
+from contextlib import contextmanager
+
+import duckdb
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+@contextmanager
+def registered_columns(conn, name, columns):
+    """
+    Expose {column: numpy array} to SQL on conn as the view `name` for the
+    duration of the block. Much faster than binding Python lists as parameters
+    for bulk statements. NaN floats read as NULL.
+    """
+    conn.register(name, columns)
+    try:
+        yield name
+    finally:
+        try:
+            conn.unregister(name)
+        except Exception:
+            pass
+
+
+class PooledCursor:
+    """
+    Thread-affine DuckDB cursor handed out by ConnectionPool.
+    Behaves like a connection for callers; close() returns it to the pool
+    instead of tearing down the underlying cursor.
+    """
+
+    def __init__(self, pool, cursor, thread_id):
+        self._pool = pool
+        self._cursor = cursor
+        self.thread_id = thread_id
+        self.depth = 0
+        self.in_transaction = False
+        self.closed = False
+
+    def execute(self, query, parameters=None):
+        head = query.lstrip()[:8].upper()
+        if head.startswith('BEGIN'):
+            self.in_transaction = True
+        elif head.startswith('COMMIT') or head.startswith('ROLLBACK') or head.startswith('ABORT'):
+            self.in_transaction = False
+
+        if parameters is None:
+            return self._cursor.execute(query)
+        return self._cursor.execute(query, parameters)
+
+    def begin(self):
+        self.in_transaction = True
+        return self._cursor.begin()
+
+    def commit(self):
+        self.in_transaction = False
+        return self._cursor.commit()
+
+    def rollback(self):
+        self.in_transaction = False
+        return self._cursor.rollback()
+
+    def close(self):
+        self._pool.release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _discard(self):
+        if self.closed:
+            return
+        self.closed = True
+        _close_quietly(self._cursor)
+
+
+class ConnectionPool:
+    """
+    Hands out one reusable DuckDB cursor per thread, all derived from a
+    single anchor connection, so repeated BudgetApp calls skip connection setup.
+    Nested acquires on the same thread share the cursor (and any open transaction).
+    """
+
+    def __init__(self, anchor_conn, db_path):
+        self._anchor = anchor_conn
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cursors = weakref.WeakValueDictionary()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'released': 0,
+            'rolled_back': 0,
+            'unpooled': 0,
+        }
+
+    def acquire(self):
+        if self._anchor is None:
+            with self._lock:
+                self._stats['unpooled'] += 1
+            return duckdb.connect(self.db_path)
+
+        pooled = getattr(self._local, 'cursor', None)
+        if pooled is None or pooled.closed:
+            thread_id = threading.get_ident()
+            with self._lock:
+                cursor = self._anchor.cursor()
+                pooled = PooledCursor(self, cursor, thread_id)
+                # Thread-local storage is dropped when the thread exits; close the
+                # cursor with it so finished worker threads don't pin connections.
+                weakref.finalize(pooled, _close_quietly, cursor)
+                self._cursors[thread_id] = pooled
+                self._stats['created'] += 1
+            self._local.cursor = pooled
+        else:
+            with self._lock:
+                self._stats['reused'] += 1
+
+        pooled.depth += 1
+        return pooled
+
+    def release(self, pooled):
+        if pooled.closed:
+            return
+        pooled.depth = max(0, pooled.depth - 1)
+        if pooled.depth == 0 and pooled.in_transaction:
+            # A caller bailed out of an explicit transaction without finishing it.
+            try:
+                pooled.rollback()
+            except Exception:
+                pooled.in_transaction = False
+            with self._lock:
+                self._stats['rolled_back'] += 1
+        with self._lock:
+            self._stats['released'] += 1
+
+    def stats(self):
+        with self._lock:
+            live = [c for c in self._cursors.values() if not c.closed]
+            result = dict(self._stats)
+            result['open_cursors'] = len(live)
+            result['checked_out'] = sum(1 for c in live if c.depth > 0)
+            total = result['created'] + result['reused']
+            result['hit_ratio'] = (result['reused'] / total) if total else 0.0
+        return result
+
+    def close(self):
+        with self._lock:
+            cursors = list(self._cursors.values())
+            self._cursors.clear()
+            self._anchor = None
+        for pooled in cursors:
+            pooled._discard()
+        self._local = threading.local()
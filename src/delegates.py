@@ -1,5 +1,7 @@
-from PyQt6.QtWidgets import QStyledItemDelegate, QDateEdit
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtWidgets import (QStyledItemDelegate, QDateEdit, QStyle, QStyleOptionButton,
+                             QStyleOptionViewItem, QApplication, QToolTip)
+from PyQt6.QtCore import Qt, QDate, QRect, QEvent, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor, QFont
 from custom_widgets import NoScrollComboBox
 
 
@@ -64,3 +66,90 @@ class DateDelegate(QStyledItemDelegate):
         date = editor.date()
         value = date.toString("yyyy-MM-dd")
         model.setData(index, value, Qt.ItemDataRole.EditRole)
+
+
+class CheckBoxDelegate(QStyledItemDelegate):
+    """Paints a centred checkbox from CheckStateRole and emits toggled(index) on click."""
+
+    toggled = pyqtSignal(QModelIndex)
+
+    def _indicator_rect(self, option):
+        style = option.widget.style() if option.widget else QApplication.style()
+        indicator = style.subElementRect(
+            QStyle.SubElement.SE_CheckBoxIndicator, QStyleOptionButton(), option.widget)
+        rect = QRect(0, 0, indicator.width(), indicator.height())
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option, index):
+        # Cell panel as the other columns draw it, without the stock check indicator.
+        panel = QStyleOptionViewItem(option)
+        self.initStyleOption(panel, index)
+        panel.features &= ~QStyleOptionViewItem.ViewItemFeature.HasCheckIndicator
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, panel, painter, option.widget)
+
+        button = QStyleOptionButton()
+        button.rect = self._indicator_rect(option)
+        button.state = QStyle.StateFlag.State_Enabled
+        if index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked:
+            button.state |= QStyle.StateFlag.State_On
+        else:
+            button.state |= QStyle.StateFlag.State_Off
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_IndicatorCheckBox, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease \
+                and event.button() == Qt.MouseButton.LeftButton \
+                and self._indicator_rect(option).contains(event.position().toPoint()):
+            self.toggled.emit(index)
+            return True
+        if event.type() == QEvent.Type.MouseButtonDblClick:
+            return True
+        return False
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Paints a round red delete button and emits clicked(index) when it is pressed."""
+
+    clicked = pyqtSignal(QModelIndex)
+
+    SIZE = 22
+
+    def _button_rect(self, option):
+        rect = QRect(0, 0, self.SIZE, self.SIZE)
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor('#cc0000') if hovered else QColor('#ff4444'))
+        painter.drawEllipse(self._button_rect(option))
+        font = QFont(option.font)
+        font.setBold(True)
+        font.setPixelSize(9)
+        painter.setFont(font)
+        painter.setPen(QColor('white'))
+        painter.drawText(self._button_rect(option), Qt.AlignmentFlag.AlignCenter, '✕')
+        painter.restore()
+
+    def helpEvent(self, event, view, option, index):
+        if self._button_rect(option).contains(event.pos()):
+            QToolTip.showText(event.globalPos(), 'Delete transaction', view)
+            return True
+        return super().helpEvent(event, view, option, index)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease \
+                and event.button() == Qt.MouseButton.LeftButton \
+                and self._button_rect(option).contains(event.position().toPoint()):
+            self.clicked.emit(index)
+            return True
+        if event.type() == QEvent.Type.MouseButtonDblClick:
+            return True
+        return False
@@ -1,9 +1,13 @@
 from PyQt6.QtWidgets import (QHeaderView, QMenu, QWidgetAction, QCheckBox,
                              QVBoxLayout, QWidget, QLineEdit, QPushButton,
-                             QHBoxLayout, QLabel, QDateEdit, QScrollArea,
-                             QDialog, QDoubleSpinBox, QTableWidgetItem)
+                             QHBoxLayout, QLabel, QDateEdit, QListWidget,
+                             QListWidgetItem, QDialog, QDoubleSpinBox,
+                             QTableWidgetItem)
 from PyQt6.QtCore import Qt, QRect, pyqtSignal, QDate
 from PyQt6.QtGui import QPainter, QColor
+import numpy as np
+
+from filter_engine import ColumnIndex, filter_mask
 
 
 class NumberFilterDialog(QDialog):
@@ -99,6 +103,11 @@ class ExcelHeaderView(QHeaderView):
         self.padding = 6
         self.filters_enabled = True
 
+        # col -> ColumnIndex of the current table contents, dropped on any data change.
+        self._column_indexes = {}
+        self._total_rows = None
+        self._indexed_model = None
+
     def _get_value(self, item):
         """Get value for filtering/sorting. Checks custom role first, then text."""
         if not item:
@@ -108,6 +117,88 @@ class ExcelHeaderView(QHeaderView):
             return str(val)
         return item.text()
 
+    def _source_model(self):
+        """Source model when the table is a model/view table behind a row-mask proxy."""
+        if hasattr(self.table, 'item'):
+            return None
+        return self.table.model().sourceModel()
+
+    def _row_count(self):
+        source = self._source_model()
+        return source.rowCount() if source is not None else self.table.rowCount()
+
+    def _cell_value(self, row, col):
+        """Filter value of a cell, or None when the cell has no item."""
+        source = self._source_model()
+        if source is None:
+            item = self.table.item(row, col)
+            return self._get_value(item) if item else None
+        index = source.index(row, col)
+        val = index.data(self.FILTER_DATA_ROLE)
+        if val is None:
+            val = index.data(Qt.ItemDataRole.DisplayRole)
+        return "" if val is None else str(val)
+
+    def _data_model(self):
+        source = self._source_model()
+        return source if source is not None else self.table.model()
+
+    def _watch_data_model(self):
+        """Drop the column indexes whenever the rows behind the table change."""
+        model = self._data_model()
+        if model is self._indexed_model:
+            return
+        if self._indexed_model is not None:
+            for signal in self._model_signals(self._indexed_model):
+                try:
+                    signal.disconnect(self.invalidate_index)
+                except TypeError:
+                    pass
+        self._indexed_model = model
+        for signal in self._model_signals(model):
+            signal.connect(self.invalidate_index)
+        self.invalidate_index()
+
+    @staticmethod
+    def _model_signals(model):
+        return (model.modelReset, model.dataChanged, model.rowsInserted,
+                model.rowsRemoved, model.layoutChanged)
+
+    def invalidate_index(self, *args):
+        self._column_indexes = {}
+        self._total_rows = None
+
+    def column_index(self, col):
+        """ColumnIndex of the filter values of a column, built once per data change."""
+        self._watch_data_model()
+        index = self._column_indexes.get(col)
+        if index is None:
+            source = self._source_model()
+            if source is not None and hasattr(source, 'filter_values'):
+                index = ColumnIndex(*source.filter_values(col))
+            else:
+                index = ColumnIndex.from_values(
+                    [self._cell_value(row, col) for row in range(self._row_count())])
+            self._column_indexes[col] = index
+        return index
+
+    def total_rows(self):
+        """Bool per row of a QTableWidget: summary rows that filters never hide."""
+        self._watch_data_model()
+        if self._total_rows is None:
+            TOTAL_ROW_ROLE = Qt.ItemDataRole.UserRole + 1
+            totals = []
+            for row in range(self._row_count()):
+                item0 = self.table.item(row, 0)
+                totals.append(bool(item0 and item0.data(TOTAL_ROW_ROLE)))
+            self._total_rows = np.array(totals, dtype=bool)
+        return self._total_rows
+
+    def filter_mask(self, exclude=None, keep_missing=True):
+        """Bool per row: passes every active column filter except the one of `exclude`."""
+        indexes = {col: self.column_index(col) for col in self.filters if col != exclude}
+        return filter_mask(indexes, self.filters, self._row_count(), exclude, keep_missing)
+
     def set_column_types(self, types):
         """{col_index: 'date'|'number'|'text'}"""
         self.column_types = types
@@ -256,7 +347,7 @@ class ExcelHeaderView(QHeaderView):
                         self.filters[col] = {}
 
                     self.filters[col]['date_range'] = (
-                        dlg.start_date, dlg.end_date)
+                        dlg.start_date.toPyDate(), dlg.end_date.toPyDate())
                     self.apply_filters()
                     self.viewport().update()
 
@@ -274,111 +365,52 @@ class ExcelHeaderView(QHeaderView):
         select_all_cb = QCheckBox("(Select All)")
         layout.addWidget(select_all_cb)
 
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setFixedHeight(150)
-        scroll.setStyleSheet("QScrollArea { border: 1px solid #ddd; }")
-
-        content_widget = QWidget()
-        content_layout = QVBoxLayout(content_widget)
-        content_layout.setContentsMargins(2, 2, 2, 2)
-        content_layout.setSpacing(2)
-
-        unique_values = set()
-
-        def match_other_filters(r, current_col):
-
-            if not self.filters:
-                return True
-
-            for c, f_data in self.filters.items():
-                if c == current_col:
-                    continue
-
-                item = self.table.item(r, c)
-                if not item:
-                    return False
+        # Checkable list items rather than one QCheckBox widget per value,
+        # so columns with tens of thousands of distinct values open at once.
+        value_list = QListWidget()
+        value_list.setFixedHeight(150)
+        value_list.setUniformItemSizes(True)
+        value_list.setStyleSheet("QListWidget { border: 1px solid #ddd; }")
 
-                val = self._get_value(item)
+        # Values offered are those of rows the other columns' filters let through.
+        index = self.column_index(col)
+        visible = self.filter_mask(exclude=col, keep_missing=False)
+        value_counts = index.distinct(visible)
 
-                if 'hidden_values' in f_data and val in f_data['hidden_values']:
-                    return False
-
-                if 'number_filter' in f_data:
-                    nf = f_data['number_filter']
-                    try:
-                        clean = val.split(' ')[0].replace(
-                            "'", "").replace(",", "")
-                        num = float(clean)
-                        if nf['op'] == 'gt' and not (num > nf['value']):
-                            return False
-                        elif nf['op'] == 'lt' and not (num < nf['value']):
-                            return False
-                    except:
-                        pass
-
-                if 'date_range' in f_data:
-                    dr = f_data['date_range']
-                    try:
-                        d = QDate.fromString(val, "yyyy-MM-dd")
-                        if d.isValid():
-                            if d < dr[0] or d > dr[1]:
-                                return False
-                    except:
-                        pass
-
-            return True
-
-        for row in range(self.table.rowCount()):
-            if self.table.isRowHidden(row):
-
-                pass
-
-            if match_other_filters(row, col):
-                item = self.table.item(row, col)
-                if item:
-                    unique_values.add(self._get_value(item))
-
-        sorted_values = sorted(list(unique_values), key=str.lower)
-
-        checkboxes = {}
+        value_items = {}
         current_hidden = self.filters.get(col, {}).get('hidden_values', set())
 
-        def add_checkbox(val):
-            cb = QCheckBox(val if val else "(Blanks)")
-            cb.setChecked(val not in current_hidden)
-            content_layout.addWidget(cb)
-            checkboxes[val] = cb
+        for val, count in value_counts:
+            item = QListWidgetItem(val if val else "(Blanks)")
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked if val in current_hidden
+                               else Qt.CheckState.Checked)
+            item.setToolTip(f"{count} row{'s' if count != 1 else ''}")
+            value_list.addItem(item)
+            value_items[val] = item
 
-        for val in sorted_values:
-            add_checkbox(val)
-
-        content_layout.addStretch()
-        scroll.setWidget(content_widget)
-        layout.addWidget(scroll)
+        layout.addWidget(value_list)
 
         if not current_hidden:
             select_all_cb.setChecked(True)
-        elif len(current_hidden) == len(sorted_values):
+        elif len(current_hidden) == len(value_counts):
             select_all_cb.setChecked(False)
         else:
             select_all_cb.setCheckState(Qt.CheckState.PartiallyChecked)
 
         def on_search(text):
             text = text.lower()
-            for val, cb in checkboxes.items():
-                if text in val.lower():
-                    cb.show()
-                else:
-                    cb.hide()
+            for val, item in value_items.items():
+                item.setHidden(text not in val.lower())
 
         search_box.textChanged.connect(on_search)
 
         def on_select_all(state):
-            is_checked = (state == Qt.CheckState.Checked.value)
-            for cb in checkboxes.values():
-                if not cb.isHidden():
-                    cb.setChecked(is_checked)
+            check_state = (Qt.CheckState.Checked if state == Qt.CheckState.Checked.value
+                           else Qt.CheckState.Unchecked)
+            for item in value_items.values():
+                if not item.isHidden():
+                    item.setCheckState(check_state)
 
         select_all_cb.stateChanged.connect(on_select_all)
 
@@ -397,8 +429,8 @@ class ExcelHeaderView(QHeaderView):
 
         def apply():
             new_hidden = set()
-            for val, cb in checkboxes.items():
-                if not cb.isChecked():
+            for val, item in value_items.items():
+                if item.checkState() != Qt.CheckState.Checked:
                     new_hidden.add(val)
 
             if col not in self.filters:
@@ -418,58 +450,16 @@ class ExcelHeaderView(QHeaderView):
         menu.exec(global_pos)
 
     def apply_filters(self):
+        source = self._source_model()
+        visible = self.filter_mask()
 
-        TOTAL_ROW_ROLE = Qt.ItemDataRole.UserRole + 1
-
-        for row in range(self.table.rowCount()):
-            should_hide = False
-
-            item0 = self.table.item(row, 0)
-            if item0 and item0.data(TOTAL_ROW_ROLE):
-
-                self.table.setRowHidden(row, False)
-                continue
-
-            for col, f_data in self.filters.items():
-                item = self.table.item(row, col)
-                if not item:
-                    continue
-
-                val = self._get_value(item)
-
-                if 'hidden_values' in f_data and val in f_data['hidden_values']:
-                    should_hide = True
-                    break
-
-                if 'number_filter' in f_data:
-                    nf = f_data['number_filter']
-                    try:
-
-                        clean = val.split(' ')[0].replace(
-                            "'", "").replace(",", "")
-                        num = float(clean)
-                        if nf['op'] == 'gt' and not (num > nf['value']):
-                            should_hide = True
-                            break
-                        elif nf['op'] == 'lt' and not (num < nf['value']):
-                            should_hide = True
-                            break
-                    except:
-                        pass
-
-                if 'date_range' in f_data:
-                    dr = f_data['date_range']
-
-                    try:
-                        d = QDate.fromString(val, "yyyy-MM-dd")
-                        if d.isValid():
-                            if d < dr[0] or d > dr[1]:
-                                should_hide = True
-                                break
-                    except:
-                        pass
-
-            self.table.setRowHidden(row, should_hide)
+        if source is None:
+            visible |= self.total_rows()
+            for row, show in enumerate(visible.tolist()):
+                self.table.setRowHidden(row, not show)
+        else:
+            # Total rows are kept visible by the proxy itself.
+            self.table.model().set_row_mask('header', visible)
 
         self.table.scrollToTop()
         self.table.viewport().update()
@@ -286,18 +286,11 @@ class ExchangeRatesTab(QWidget):
 
         if confirm == QMessageBox.StandardButton.Yes:
 
-            conn = self.budget_app._get_connection()
-            try:
-                conn.execute(
-                    "DELETE FROM exchange_rates WHERE date = ?", (date_str,))
-                conn.commit()
+            if self.budget_app.delete_exchange_rates_for_dates([date_str]):
                 self.table.removeRow(row)
                 QMessageBox.information(self, "Deleted", "Rates deleted.")
-
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete: {e}")
-            finally:
-                conn.close()
+            else:
+                QMessageBox.critical(self, "Error", "Failed to delete rates.")
 
     def validate_date(self, date_str):
         try:
@@ -355,25 +348,19 @@ class ExchangeRatesTab(QWidget):
                         raise ValueError(
                             f"Invalid rate '{text}' for {currency} on {date_str}")
 
+            success_delete = True
             if dates_to_delete:
-                conn = self.budget_app._get_connection()
-                try:
-                    for old_date in dates_to_delete:
-                        conn.execute(
-                            "DELETE FROM exchange_rates WHERE date = ?", (old_date,))
-                    conn.commit()
-                finally:
-                    conn.close()
+                success_delete = self.budget_app.delete_exchange_rates_for_dates(
+                    list(dates_to_delete))
 
             success_upsert = True
             if rates_to_save:
                 success_upsert = self.budget_app.add_exchange_rates_bulk(
                     rates_to_save)
 
-            success_delete = True
             if rates_to_delete:
                 success_delete = self.budget_app.delete_exchange_rates_bulk(
-                    rates_to_delete)
+                    rates_to_delete) and success_delete
 
             if success_upsert and success_delete:
                 QApplication.restoreOverrideCursor()
@@ -219,6 +219,8 @@ class ExpensesDashboardTab(QWidget):
         self.current_year = today.year
         self.current_month = today.month
         self.filter_category_ids = None
+        self.loader = None
+        self._old_loaders = []
 
         self.init_ui()
 
@@ -356,12 +358,19 @@ class ExpensesDashboardTab(QWidget):
         if not MATPLOTLIB_AVAILABLE:
             return
 
+        # A replaced loader may still be running; keep it referenced until it ends.
+        self._old_loaders = [l for l in self._old_loaders if l.isRunning()]
+        if self.loader is not None and self.loader.isRunning():
+            self._old_loaders.append(self.loader)
+
         self.loader = DashboardLoaderThread(
             self.budget_app, self.current_year, self.current_month, self.filter_category_ids)
         self.loader.finished.connect(self.update_dashboard)
         self.loader.start()
 
     def update_dashboard(self, data):
+        if self.sender() is not None and self.sender() is not self.loader:
+            return  # result of a superseded load
         if not data:
             return
 
@@ -0,0 +1,128 @@
+import datetime
+
+import numpy as np
+
+
+def parse_number(text):
+    """Number shown in a cell such as "1'234.50" or "-12.00 CHF", or NaN."""
+    try:
+        return float(text.split(' ')[0].replace("'", "").replace(",", ""))
+    except (ValueError, AttributeError):
+        return np.nan
+
+
+def parse_date(text):
+    """A 'yyyy-MM-dd' cell as datetime64[D], or NaT."""
+    try:
+        if len(text) == 10:
+            return np.datetime64(datetime.date.fromisoformat(text), 'D')
+    except (ValueError, TypeError):
+        pass
+    return np.datetime64('NaT', 'D')
+
+
+class ColumnIndex:
+    """
+    Distinct-value index of one table column.
+
+    Holds the sorted distinct cell values (labels) and, per row, the position
+    of its value in labels (-1 for rows without a cell). Filters are decided
+    once per distinct value and spread to the rows through the codes, and
+    numbers and dates are parsed once per distinct value on first use.
+    """
+
+    def __init__(self, labels, codes):
+        self.labels = np.asarray(labels, dtype=object)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self._numbers = None
+        self._dates = None
+
+    @classmethod
+    def from_values(cls, values):
+        """Build from one value per row; None marks a row without a cell."""
+        values = np.array(values, dtype=object)
+        present = values != None  # noqa: E711 - elementwise comparison
+        codes = np.full(len(values), -1, dtype=np.int64)
+        if present.any():
+            labels, inverse = np.unique(values[present].astype(str), return_inverse=True)
+            codes[present] = inverse.ravel()
+        else:
+            labels = np.empty(0, dtype=object)
+        return cls(labels.astype(object), codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def present(self):
+        return self.codes >= 0
+
+    def numbers(self):
+        if self._numbers is None:
+            self._numbers = np.array([parse_number(v) for v in self.labels], dtype=np.float64)
+        return self._numbers
+
+    def dates(self):
+        if self._dates is None:
+            self._dates = np.array([parse_date(v) for v in self.labels], dtype='datetime64[D]')
+        return self._dates
+
+    def counts(self, rows=None):
+        """Rows per distinct value, counting only rows where the bool mask `rows` is set."""
+        codes = self.codes if rows is None else self.codes[rows]
+        return np.bincount(codes[codes >= 0], minlength=len(self.labels))
+
+    def distinct(self, rows=None):
+        """[(value, count)] of the values occurring in `rows`, ordered case-insensitively."""
+        counts = self.counts(rows)
+        found = np.flatnonzero(counts)
+        pairs = [(self.labels[i], int(counts[i])) for i in found]
+        pairs.sort(key=lambda pair: pair[0].lower())
+        return pairs
+
+    def accepted_labels(self, column_filter):
+        """Bool per distinct value: whether it passes the hidden-value, number and date filters."""
+        accepted = np.ones(len(self.labels), dtype=bool)
+
+        hidden = column_filter.get('hidden_values')
+        if hidden:
+            accepted &= ~np.isin(self.labels, list(hidden))
+
+        number_filter = column_filter.get('number_filter')
+        if number_filter:
+            numbers = self.numbers()
+            # Cells that are not numbers are left alone, like blank amounts.
+            with np.errstate(invalid='ignore'):
+                if number_filter['op'] == 'gt':
+                    accepted &= np.isnan(numbers) | (numbers > number_filter['value'])
+                elif number_filter['op'] == 'lt':
+                    accepted &= np.isnan(numbers) | (numbers < number_filter['value'])
+
+        date_range = column_filter.get('date_range')
+        if date_range:
+            start, end = (np.datetime64(d, 'D') for d in date_range)
+            dates = self.dates()
+            accepted &= np.isnat(dates) | ((dates >= start) & (dates <= end))
+
+        return accepted
+
+    def row_mask(self, column_filter, keep_missing=True):
+        """Bool per row: whether its cell passes column_filter; rows without a cell give keep_missing."""
+        # Code -1 picks the trailing keep_missing entry.
+        accepted = np.append(self.accepted_labels(column_filter), keep_missing)
+        return accepted[self.codes]
+
+
+def filter_mask(indexes, filters, row_count, exclude=None, keep_missing=True):
+    """
+    Rows passing every column filter as a bool array.
+
+    indexes maps a column to its ColumnIndex, filters a column to its filter
+    dict ('hidden_values', 'number_filter', 'date_range'); the filter of
+    column `exclude` is ignored.
+    """
+    mask = np.ones(row_count, dtype=bool)
+    for col, column_filter in filters.items():
+        if col == exclude or not column_filter:
+            continue
+        mask &= indexes[col].row_mask(column_filter, keep_missing)
+    return mask
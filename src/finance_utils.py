@@ -1,62 +1,181 @@
 from datetime import date
 import math
 
-def xirr(transactions):
+import numpy as np
+
+# Newton settings of the original solver; the bracketing fallback only runs when they fail.
+_NEWTON_START = 0.1
+_NEWTON_ITERATIONS = 50
+_NEWTON_TOL = 1e-6
+# Iterates beyond this are treated as diverged (a 10^8 % annual rate).
+_NEWTON_MAX_RATE = 1e6
+# Candidate rates scanned for a sign change of the NPV when Newton does not converge.
+_BRACKET_GRID = np.array([-0.9999, -0.99, -0.9, -0.75, -0.5, -0.25, 0.0, 0.1, 0.25, 0.5,
+                          1.0, 2.0, 5.0, 10.0, 100.0, 1000.0])
+
+
+def _day_numbers(dates) -> np.ndarray:
+    """int64 day numbers of date/datetime objects, 'YYYY-MM-DD' strings or datetime64 values."""
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        return dates.astype('datetime64[D]').astype(np.int64)
+    try:
+        # toordinal() is much faster than NumPy's datetime64 conversion of date objects.
+        return np.array([d.toordinal() for d in dates], dtype=np.int64)
+    except AttributeError:
+        return np.array([str(d)[:10] for d in dates], dtype='datetime64[D]').astype(np.int64)
+
+
+def _flow_arrays(flows):
+    """(day numbers, amounts) of a list of (date, amount) or a (dates, amounts) array pair."""
+    if len(flows) == 2 and isinstance(flows[0], np.ndarray):
+        return _day_numbers(flows[0]), np.asarray(flows[1], dtype=np.float64)
+    return (_day_numbers([f[0] for f in flows]),
+            np.array([f[1] for f in flows], dtype=np.float64))
+
+
+def _xnpv(rate, amounts, years):
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        return float(np.sum(amounts * np.exp(-years * np.log1p(rate))))
+
+
+def _brent(f, a, b, fa, fb, xtol=1e-12, max_iter=200):
+    """Brent's method for a root of f in [a, b], where f(a) and f(b) differ in sign."""
+    if abs(fa) < abs(fb):
+        a, b, fa, fb = b, a, fb, fa
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if fb == 0:
+            return b
+        if fa * fb > 0:
+            a, fa = c, fc
+            d = e = b - a
+        if abs(fa) < abs(fb):
+            c, fc = b, fb
+            b, fb = a, fa
+            a, fa = c, fc
+        tol = 2 * np.finfo(float).eps * abs(b) + xtol / 2
+        m = (a - b) / 2
+        if abs(m) <= tol:
+            return b
+        if abs(e) >= tol and abs(fc) > abs(fb):
+            s = fb / fc
+            if a == c:
+                p, q = 2 * m * s, 1 - s
+            else:
+                q, r = fc / fa, fb / fa
+                p = s * (2 * m * q * (q - r) - (b - c) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        c, fc = b, fb
+        b += d if abs(d) > tol else (tol if m > 0 else -tol)
+        fb = f(b)
+    return b
+
+
+def _bracketed_irr(amounts, years):
     """
-    Calculate the Extended Internal Rate of Return.
-    transactions: list of (date, amount) tuples.
-                  Amounts: Negative for investment, Positive for return.
-    Returns: float (0.10 = 10%) or None if didn't converge.
+    Root of the NPV found by scanning _BRACKET_GRID for sign changes and refining
+    the bracket closest to the Newton start with Brent's method; None if there is none.
     """
-    if not transactions or len(transactions) < 2:
+    values = np.array([_xnpv(r, amounts, years) for r in _BRACKET_GRID])
+    brackets = [
+        i for i in range(len(_BRACKET_GRID) - 1)
+        if np.isfinite(values[i]) and np.isfinite(values[i + 1])
+        and np.sign(values[i]) != np.sign(values[i + 1])
+    ]
+    if not brackets:
         return None
-    
-    amounts = [t[1] for t in transactions]
-    if all(a >= 0 for a in amounts) or all(a <= 0 for a in amounts):
-        return 0.0
+    i = min(brackets, key=lambda k: abs((_BRACKET_GRID[k] + _BRACKET_GRID[k + 1]) / 2 - _NEWTON_START))
+    return float(_brent(lambda r: _xnpv(r, amounts, years),
+                        _BRACKET_GRID[i], _BRACKET_GRID[i + 1], values[i], values[i + 1]))
 
-    transactions.sort(key=lambda x: x[0])
-    
-    start_date = transactions[0][0]
-    
-    def xnpv(rate, trans):
-        val = 0.0
-        for d, amt in trans:
-            days = (d - start_date).days
-            val += amt / pow(1.0 + rate, days / 365.0)
-        return val
-
-    def xnpv_deriv(rate, trans):
-        val = 0.0
-        for d, amt in trans:
-            days = (d - start_date).days
-            if days == 0:
-                continue
-            term = days / 365.0
-            val -= term * amt / pow(1.0 + rate, term + 1.0)
-        return val
 
-    try:
-        rate = 0.1 
-        for _ in range(50):
-            f = xnpv(rate, transactions)
-            df = xnpv_deriv(rate, transactions)
-            if df == 0:
+def xirr_batch(flow_sets):
+    """
+    Extended Internal Rate of Return of many cash flow lists in one call.
+    flow_sets: iterable of lists of (date, amount), same convention as xirr(),
+               or of (dates, amounts) NumPy array pairs.
+    Returns a list of floats (0.10 = 10%) or None, one per flow list.
+
+    All sets are iterated together with a vectorized Newton solver; sets where
+    Newton diverges fall back to bracketing with Brent's method.
+    """
+    flow_sets = list(flow_sets)
+    results = [None] * len(flow_sets)
+    solvable = []
+    for k, flows in enumerate(flow_sets):
+        if flows is None or len(flows) == 0:
+            continue
+        days, amounts = _flow_arrays(flows)
+        if len(amounts) < 2:
+            continue
+        if np.all(amounts >= 0) or np.all(amounts <= 0):
+            results[k] = 0.0
+            continue
+        solvable.append((k, amounts, (days - days.min()) / 365.0))
+
+    if not solvable:
+        return results
+
+    width = max(len(a) for _, a, _ in solvable)
+    amounts = np.zeros((len(solvable), width))
+    years = np.zeros((len(solvable), width))
+    for row, (_, a, y) in enumerate(solvable):
+        amounts[row, :len(a)] = a
+        years[row, :len(y)] = y
+
+    rates = np.full(len(solvable), _NEWTON_START)
+    solved = np.full(len(solvable), np.nan)
+    active = np.ones(len(solvable), dtype=bool)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(_NEWTON_ITERATIONS):
+            if not active.any():
                 break
-            new_rate = rate - f / df
-            if abs(new_rate - rate) < 1e-6:
-                return new_rate
-            rate = new_rate
-    except:
-        return None
-        
-    return None
+            r = rates[active, None]
+            a, y = amounts[active], years[active]
+            discount = np.exp(-y * np.log1p(r))
+            f = np.sum(a * discount, axis=1)
+            df = -np.sum(y * a * discount / (1.0 + r), axis=1)
+            new_rates = rates[active] - f / df
+
+            rows = np.flatnonzero(active)
+            failed = (df == 0) | ~np.isfinite(new_rates) | (np.abs(new_rates) > _NEWTON_MAX_RATE)
+            converged = ~failed & (np.abs(new_rates - rates[active]) < _NEWTON_TOL)
+            solved[rows[converged]] = new_rates[converged]
+            active[rows[failed | converged]] = False
+            rates[rows[~failed]] = new_rates[~failed]
+
+    for row, (k, a, y) in enumerate(solvable):
+        if np.isfinite(solved[row]):
+            results[k] = float(solved[row])
+        else:
+            results[k] = _bracketed_irr(a, y)
+    return results
+
+
+def xirr(transactions):
+    """
+    Calculate the Extended Internal Rate of Return.
+    transactions: list of (date, amount) tuples.
+                  Amounts: Negative for investment, Positive for return.
+    Returns: float (0.10 = 10%) or None if no rate solves the flows.
+    """
+    return xirr_batch([transactions])[0]
 
 def calculate_linked_twr(valuations, cashflows):
     """
     Calculate Time-Weighted Return using Linked Modified Dietz.
     valuations: list of (date, value) sorted by date.
-    cashflows: list of (date, amount) sorted by date.
+    cashflows: list of (date, amount) in any order, or a (dates, amounts) array pair.
                Method assumes Flow values are:
                +External Inflow (Deposit)
                -External Outflow (Withdrawal) 
@@ -85,39 +204,53 @@ def calculate_linked_twr(valuations, cashflows):
     if not valuations or len(valuations) < 2:
         return None
 
-    twr = 1.0
-    
-    for i in range(len(valuations) - 1):
-        start_date, start_val = valuations[i]
-        end_date, end_val = valuations[i+1]
-
-        
-        period_flows = [f for f in cashflows if start_date < f[0] <= end_date]
-        
-        net_contrib = 0.0
-        weighted_contrib = 0.0
-        
-        period_len = (end_date - start_date).days
-        if period_len == 0:
-            continue
-            
-        for d, amt in period_flows:
-            contribution = -amt 
-            
-            net_contrib += contribution
-            
-            days_in = (end_date - d).days
-            weight = days_in / period_len
-            weighted_contrib += contribution * weight
-            
-        numerator = end_val - start_val - net_contrib
-        denominator = start_val + weighted_contrib
-        
-        if denominator == 0:
-            period_return = 0.0
-        else:
-            period_return = numerator / denominator
-            
-        twr *= (1.0 + period_return)
-        
-    return (twr - 1.0) * 100.0
+    growth = _period_growth(valuations, cashflows)
+    return (float(np.prod(growth)) - 1.0) * 100.0
+
+
+def calculate_twr_series(valuations, cashflows):
+    """
+    Cumulative linked Modified Dietz TWR at every valuation date.
+    Same inputs and conventions as calculate_linked_twr().
+    Returns: list of (date, cumulative TWR in %), starting with 0.0 at the first valuation.
+    """
+    if not valuations:
+        return []
+
+    growth = _period_growth(valuations, cashflows)
+    cumulative = np.concatenate(([1.0], np.cumprod(growth)))
+    return [(d, (float(g) - 1.0) * 100.0)
+            for (d, _), g in zip(valuations, cumulative)]
+
+
+def _period_growth(valuations, cashflows):
+    """
+    Growth factor (1 + Modified Dietz return) of every interval between consecutive
+    valuations. Each flow belongs to the one interval (start, end] containing its date,
+    so all intervals are computed in a single pass over the flows.
+    """
+    v_days = _day_numbers([v[0] for v in valuations])
+    v_values = np.array([v[1] for v in valuations], dtype=np.float64)
+    starts, ends = v_days[:-1], v_days[1:]
+    period_len = ends - starts
+
+    net_contrib = np.zeros(len(starts))
+    weighted_contrib = np.zeros(len(starts))
+    if cashflows is not None and len(cashflows):
+        f_days, f_amounts = _flow_arrays(cashflows)
+        period = np.searchsorted(v_days, f_days, side='left') - 1
+        inside = (period >= 0) & (period < len(starts))
+        period, f_days, contribution = period[inside], f_days[inside], -f_amounts[inside]
+        lengths = period_len[period]
+        weights = np.divide(ends[period] - f_days, lengths,
+                            out=np.zeros(len(period)), where=lengths != 0)
+        net_contrib = np.bincount(period, weights=contribution, minlength=len(starts))
+        weighted_contrib = np.bincount(period, weights=contribution * weights, minlength=len(starts))
+
+    numerator = v_values[1:] - v_values[:-1] - net_contrib
+    denominator = v_values[:-1] + weighted_contrib
+    period_return = np.divide(numerator, denominator,
+                              out=np.zeros(len(starts)), where=denominator != 0)
+    # Zero-length intervals are skipped, as in the original loop.
+    period_return[period_len == 0] = 0.0
+    return 1.0 + period_return
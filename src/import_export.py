@@ -1,11 +1,14 @@
-import openpyxl
-from openpyxl.utils import get_column_letter
 import duckdb
 import os
 import shutil
 from datetime import datetime
 import traceback
 
+import balance_ledger
+
+# Rows fetched from DuckDB at a time while exporting to Excel.
+EXPORT_BATCH_ROWS = 5000
+
 
 class DataManager:
     def __init__(self, db_path):
@@ -17,13 +20,14 @@ class DataManager:
     def export_to_excel(self, file_path, progress_callback=None):
         """
         Exports all tables (accounts, categories, transactions, budgets) to an Excel file.
+        The workbook is written in openpyxl's write-only mode and every table is
+        fetched in batches, so memory stays bounded however large the database;
+        progress_callback(percent) follows the transaction rows as they are written.
         """
+        import openpyxl
         conn = self._get_connection()
         try:
-            workbook = openpyxl.Workbook()
-
-            if 'Sheet' in workbook.sheetnames:
-                del workbook['Sheet']
+            workbook = openpyxl.Workbook(write_only=True)
 
             if progress_callback:
                 progress_callback(10)
@@ -38,8 +42,15 @@ class DataManager:
             if progress_callback:
                 progress_callback(50)
 
+            transaction_count = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+            def transactions_written(rows):
+                if progress_callback and transaction_count:
+                    progress_callback(50 + 30 * rows // transaction_count)
+
             self._write_table_to_sheet(conn, workbook, 'transactions',
-                                       "SELECT * FROM transactions ORDER BY date DESC, id DESC")
+                                       "SELECT * FROM transactions ORDER BY date DESC, id DESC",
+                                       transactions_written)
             if progress_callback:
                 progress_callback(80)
 
@@ -74,22 +85,38 @@ class DataManager:
         finally:
             conn.close()
 
-    def _write_table_to_sheet(self, conn, workbook, sheet_name, query):
+    def _set_column_widths(self, sheet, column_count, width):
+        # Write-only sheets take column widths only before the first row.
+        from openpyxl.utils import get_column_letter
+        for i in range(column_count):
+            sheet.column_dimensions[get_column_letter(i+1)].width = width
+
+    def _write_table_to_sheet(self, conn, workbook, sheet_name, query, rows_written=None):
+        """
+        Streams the rows of query into a new sheet, EXPORT_BATCH_ROWS at a time.
+        rows_written(count), if given, is called after each batch with the rows so far.
+        """
         sheet = workbook.create_sheet(sheet_name)
-        result = conn.execute(query).fetchall()
+        conn.execute(query)
 
         if not conn.description:
             return
 
         columns = [col[0] for col in conn.description]
 
+        self._set_column_widths(sheet, len(columns), 15)
         sheet.append(columns)
 
-        for row in result:
-            sheet.append(row)
-
-        for i, col in enumerate(columns):
-            sheet.column_dimensions[get_column_letter(i+1)].width = 15
+        count = 0
+        while True:
+            batch = conn.fetchmany(EXPORT_BATCH_ROWS)
+            if not batch:
+                break
+            for row in batch:
+                sheet.append(row)
+            count += len(batch)
+            if rows_written:
+                rows_written(count)
 
     def import_from_excel(self, file_path, progress_callback=None, skip_backup=False):
         """
@@ -98,6 +125,7 @@ class DataManager:
         if not os.path.exists(file_path):
             return False, "File does not exist."
 
+        import openpyxl
         try:
             if progress_callback:
                 progress_callback(5)
@@ -160,6 +188,7 @@ class DataManager:
                 progress_callback(85)
 
             self._import_sheet(conn, workbook['transactions'], 'transactions')
+            balance_ledger.rebuild(conn)
             if progress_callback:
                 progress_callback(100)
 
@@ -241,36 +270,37 @@ class DataManager:
         Date | USD | EUR | ...
         """
 
-        data = conn.execute(
-            "SELECT date, currency, rate FROM exchange_rates ORDER BY date DESC").fetchall()
-
-        currencies = sorted(list(set(r[1] for r in data)))
-
-        pivot_data = {}
-        for row in data:
-            date_val = row[0]
-            curr = row[1]
-            rate = row[2]
-
-            if date_val not in pivot_data:
-                pivot_data[date_val] = {}
-            pivot_data[date_val][curr] = rate
+        currencies = [r[0] for r in conn.execute(
+            "SELECT DISTINCT currency FROM exchange_rates ORDER BY currency").fetchall()]
 
         sheet = workbook.create_sheet('exchange_rates')
         headers = ['date'] + currencies
+        self._set_column_widths(sheet, len(headers), 12)
         sheet.append(headers)
 
-        sorted_dates = sorted(pivot_data.keys(), reverse=True)
+        conn.execute("SELECT date, currency, rate FROM exchange_rates ORDER BY date DESC")
+        self._append_date_matrix(sheet, conn, {curr: i for i, curr in enumerate(currencies)})
 
-        for d in sorted_dates:
-            row = [d]
-            for curr in currencies:
-                row.append(pivot_data[d].get(curr, None))
+    def _append_date_matrix(self, sheet, conn, column_of):
+        """
+        Appends one sheet row per date from the (date, key, value) rows of the
+        last query, which must be ordered by date; column_of maps a key to its
+        position after the date column.
+        """
+        row = None
+        while True:
+            batch = conn.fetchmany(EXPORT_BATCH_ROWS)
+            if not batch:
+                break
+            for date_val, key, value in batch:
+                if row is None or row[0] != date_val:
+                    if row is not None:
+                        sheet.append(row)
+                    row = [date_val] + [None] * len(column_of)
+                row[column_of[key] + 1] = value
+        if row is not None:
             sheet.append(row)
 
-        for col in sheet.columns:
-            sheet.column_dimensions[col[0].column_letter].width = 12
-
     def _import_exchange_rates_matrix(self, conn, workbook):
         sheet = workbook['exchange_rates']
         rows = list(sheet.rows)
@@ -323,47 +353,25 @@ class DataManager:
         Use column names as "Account Name (ID)" to be safe during import map back.
         """
 
-        data = conn.execute("""
-            SELECT v.date, a.account, a.id, v.value
+        accounts = conn.execute("""
+            SELECT DISTINCT a.account, a.id
             FROM investment_valuations v
             JOIN accounts a ON v.account_id = a.id
-            ORDER BY v.date DESC
         """).fetchall()
-
-        accounts_map = {}
-        for r in data:
-            acc_name = r[1]
-            acc_id = r[2]
-            token = f"{acc_name}_{acc_id}"
-            accounts_map[acc_id] = token
-
-        unique_tokens = sorted(
-            list(set(accounts_map.values())), key=lambda x: x.rsplit('_', 1)[0].lower())
-
-        pivot_data = {}
-        for r in data:
-            date_val = r[0]
-            acc_id = r[2]
-            val = r[3]
-            token = accounts_map[acc_id]
-
-            if date_val not in pivot_data:
-                pivot_data[date_val] = {}
-            pivot_data[date_val][token] = val
+        accounts.sort(key=lambda r: r[0].lower())
 
         sheet = workbook.create_sheet('investment_valuations')
-        headers = ['date'] + unique_tokens
+        headers = ['date'] + [f"{acc_name}_{acc_id}" for acc_name, acc_id in accounts]
+        self._set_column_widths(sheet, len(headers), 15)
         sheet.append(headers)
 
-        sorted_dates = sorted(pivot_data.keys(), reverse=True)
-        for d in sorted_dates:
-            row = [d]
-            for token in unique_tokens:
-                row.append(pivot_data[d].get(token, None))
-            sheet.append(row)
-
-        for col in sheet.columns:
-            sheet.column_dimensions[col[0].column_letter].width = 15
+        conn.execute("""
+            SELECT v.date, v.account_id, v.value
+            FROM investment_valuations v
+            JOIN accounts a ON v.account_id = a.id
+            ORDER BY v.date DESC
+        """)
+        self._append_date_matrix(sheet, conn, {acc_id: i for i, (_, acc_id) in enumerate(accounts)})
 
     def _import_investment_valuations_matrix(self, conn, workbook):
         sheet = workbook['investment_valuations']
@@ -423,6 +431,7 @@ class DataManager:
         """
         Generates a sample Excel template for the user with rich sample data.
         """
+        import openpyxl
         try:
             workbook = openpyxl.Workbook()
 
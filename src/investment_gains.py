@@ -0,0 +1,355 @@
+import numpy as np
+
+from net_worth import asof_matrix
+from rate_index import to_day_numbers
+
+# Leg order of a transaction: the source account is booked before the target.
+_FROM, _TO = 0, 1
+
+
+def _floats(data, name):
+    """fetchnumpy column as float64 with NULL as 0.0."""
+    return np.ma.filled(np.ma.asarray(data[name], dtype=np.float64), 0.0)
+
+
+def _ids(data, name):
+    column = data[name]
+    values = np.ma.getdata(column).astype(np.int64)
+    return np.where(np.ma.getmaskarray(column), -1, values)
+
+
+def _month_end_running(rows, buckets, deltas, opening, n_months):
+    """
+    Account x (n_months + 1) matrix of a running position: column 0 is the
+    opening value, column k the value after the last leg of month k - 1.
+    Legs (rows, buckets, deltas) must be in booking order; each account is
+    accumulated leg by leg, like the sequential replay it replaces.
+    """
+    result = np.zeros((len(opening), n_months + 1))
+    result[:, 0] = opening
+    if not len(rows):
+        result[:, 1:] = opening[:, None]
+        return result
+
+    order = np.argsort(rows, kind='stable')
+    rows, buckets, deltas = rows[order], buckets[order], deltas[order]
+    running = np.empty(len(rows))
+    bounds = np.flatnonzero(rows[1:] != rows[:-1]) + 1
+    for s, e in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(rows)]))):
+        running[s:e] = np.cumsum(np.concatenate(([opening[rows[s]]], deltas[s:e])))[1:]
+
+    # Last leg of every (account, month), then carry forward through quiet months.
+    last = np.ones(len(rows), dtype=bool)
+    last[:-1] = (rows[1:] != rows[:-1]) | (buckets[1:] != buckets[:-1])
+    is_set = np.zeros(result.shape, dtype=bool)
+    is_set[:, 0] = True
+    result[rows[last], buckets[last] + 1] = running[last]
+    is_set[rows[last], buckets[last] + 1] = True
+    source = np.where(is_set, np.arange(n_months + 1), 0)
+    np.maximum.accumulate(source, axis=1, out=source)
+    return np.take_along_axis(result, source, axis=1)
+
+
+def _sum_at(shape, rows, buckets, values):
+    """Per (account, month) sums of leg values, added in leg order."""
+    result = np.zeros(shape)
+    np.add.at(result, (rows, buckets), values)
+    return result
+
+
+class InvestmentGainsEngine:
+    """
+    Month-by-month investment gains of the investment accounts, on NumPy arrays.
+
+    Transactions of the period are fetched once and split into source/target legs
+    per account. Month-end balances and quantities come from per-account running
+    sums, flows, income and fees from per (account, month) sums, and valuations
+    and exchange rates from vectorized as-of lookups at each month end.
+
+    Results match the month-by-month replay of get_monthly_investment_gains and
+    get_investment_gains_history, including their valuation and rate rules.
+    """
+
+    def __init__(self, conn, rate_index):
+        self.conn = conn
+        self.rate_index = rate_index
+
+    def _accounts(self, account_ids):
+        """(ids, names, currencies, strategies) of the investment accounts, optionally filtered."""
+        rows = self.conn.execute(
+            "SELECT id, account, currency, valuation_strategy FROM accounts WHERE is_investment = 1"
+        ).fetchall()
+        if account_ids is not None:
+            rows = [r for r in rows if r[0] in account_ids]
+        return (np.array([r[0] for r in rows], dtype=np.int64),
+                [r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows])
+
+    def _opening(self, ids, before_date):
+        """Balance and quantity of each account from the transactions before before_date."""
+        ph = ','.join(['?'] * len(ids))
+        id_list = ids.tolist()
+        rows = self.conn.execute(f"""
+            SELECT account_id,
+                SUM(CASE WHEN t.type='income' THEN t.amount WHEN t.type='expense' THEN -t.amount WHEN t.type='transfer' THEN -t.amount ELSE 0 END),
+                SUM(CASE WHEN t.type='income' THEN t.qty WHEN t.type='expense' THEN -t.qty WHEN t.type='transfer' THEN -t.qty ELSE 0 END)
+            FROM transactions t
+            WHERE t.account_id IN ({ph}) AND t.date < ?
+            GROUP BY account_id
+            UNION ALL
+            SELECT to_account_id, SUM(to_amount), SUM(qty)
+            FROM transactions t
+            WHERE t.to_account_id IN ({ph}) AND t.type='transfer' AND t.date < ?
+            GROUP BY to_account_id
+        """, id_list + [before_date] + id_list + [before_date]).fetchall()
+
+        position = {aid: i for i, aid in enumerate(id_list)}
+        bal = np.zeros(len(ids))
+        qty = np.zeros(len(ids))
+        for aid, b, q in rows:
+            if aid in position:
+                bal[position[aid]] += float(b or 0.0)
+                qty[position[aid]] += float(q or 0.0)
+        return bal, qty
+
+    def _asof(self, ids, table_sql, boundary_days):
+        """Account x boundary matrix of a dated per-account series, 0.0 before its start."""
+        data = self.conn.execute(table_sql).fetchnumpy()
+        aids = np.asarray(data['account_id'], dtype=np.int64)
+        if not len(aids):
+            return np.zeros((len(ids), len(boundary_days)))
+        sorter = np.argsort(ids, kind='stable')
+        values = asof_matrix(ids[sorter], aids, to_day_numbers(np.asarray(data['date'])),
+                             data['value'], boundary_days)
+        result = np.empty_like(values)
+        result[sorter] = values
+        return result
+
+    def _rates(self, currencies, boundary_days):
+        rates = np.ones((len(currencies), len(boundary_days)))
+        for row, currency in enumerate(currencies):
+            rates[row] = self.rate_index.lookup(currency, boundary_days, before=1.0)
+        return rates
+
+    @staticmethod
+    def _rows_of(ids, values):
+        """Position of each value in ids, -1 when it is not one of them."""
+        sorter = np.argsort(ids, kind='stable')
+        pos = np.searchsorted(ids[sorter], values)
+        pos = np.minimum(pos, len(ids) - 1)
+        found = ids[sorter][pos] == values
+        return np.where(found, sorter[pos], -1)
+
+    @staticmethod
+    def _boundary_days(months):
+        """Day numbers of the month end before the first month and of every month end."""
+        return ((np.concatenate(([months[0]], months + 1))).astype('datetime64[D]') - 1).astype(np.int64)
+
+    def monthly_gains(self, year: int, account_ids=None) -> dict:
+        """Result of BudgetApp.get_monthly_investment_gains."""
+        ids, names, currencies, strategies = self._accounts(account_ids)
+        if not len(ids):
+            return {}
+        n_acc, n_months = len(ids), 12
+        months = np.arange(np.datetime64(f"{year}-01", 'M'), np.datetime64(f"{year + 1}-01", 'M'))
+        boundary_days = self._boundary_days(months)
+
+        bal_open, qty_open = self._opening(ids, f"{year}-01-01")
+
+        ph = ','.join(['?'] * n_acc)
+        id_list = ids.tolist()
+        tx = self.conn.execute(f"""
+            SELECT
+                MONTH(CAST(t.date AS DATE)) AS month,
+                t.date, t.type, t.account_id, t.to_account_id,
+                CAST(t.amount AS DOUBLE) AS amount,
+                CAST(t.to_amount AS DOUBLE) AS to_amount,
+                CAST(t.qty AS DOUBLE) AS qty,
+                t.invest_account_id, a.currency
+            FROM transactions t
+            LEFT JOIN accounts a ON t.account_id = a.id
+            WHERE t.date >= ? AND t.date <= ?
+            AND (t.account_id IN ({ph}) OR t.to_account_id IN ({ph}) OR t.invest_account_id IN ({ph}))
+            ORDER BY t.date
+        """, [f"{year}-01-01", f"{year}-12-31"] + id_list * 3).fetchnumpy()
+
+        t_type = np.asarray(np.ma.getdata(tx['type']), dtype=object)
+        dates = np.asarray(tx['date']).astype('datetime64[D]')
+        bucket = np.asarray(np.ma.getdata(tx['month']), dtype=np.int64) - 1
+        amount, qty = _floats(tx, 'amount'), _floats(tx, 'qty')
+        to_amount = np.where(np.ma.getmaskarray(tx['to_amount']), amount, _floats(tx, 'to_amount'))
+        from_row = self._rows_of(ids, _ids(tx, 'account_id'))
+        to_row = self._rows_of(ids, _ids(tx, 'to_account_id'))
+        link_row = self._rows_of(ids, _ids(tx, 'invest_account_id'))
+        source_currency = np.ma.filled(np.ma.asarray(tx['currency'], dtype=object), None)
+
+        is_income, is_expense, is_transfer = t_type == 'income', t_type == 'expense', t_type == 'transfer'
+        val_chf = amount * self.rate_index.lookup_mixed(source_currency, dates, before=1.0)
+        to_rate = np.ones(len(dates))
+        for row in set(to_row[is_transfer & (to_row >= 0)].tolist()):
+            rows = is_transfer & (to_row == row)
+            to_rate[rows] = self.rate_index.lookup(currencies[row], dates[rows], before=1.0)
+        to_val_chf = to_amount * to_rate
+
+        # Income and fees go to the linked investment account, else the source account.
+        target_row = np.where(link_row >= 0, link_row, from_row)
+        shape = (n_acc, n_months)
+        booked = target_row >= 0
+        income = _sum_at(shape, target_row[booked & is_income], bucket[booked & is_income],
+                         val_chf[booked & is_income])
+        expense = _sum_at(shape, target_row[booked & is_expense], bucket[booked & is_expense],
+                          val_chf[booked & is_expense])
+
+        # Legs interleaved in booking order: (tx0 source, tx0 target, tx1 source, ...).
+        sign = np.select([is_income, is_expense | is_transfer], [1.0, -1.0], 0.0)
+        from_leg = (from_row >= 0) & (sign != 0)
+        to_leg = is_transfer & (to_row >= 0)
+        leg_row = np.column_stack((np.where(from_leg, from_row, -1), np.where(to_leg, to_row, -1))).ravel()
+        leg_bucket = np.repeat(bucket, 2)
+        leg_bal = np.column_stack((sign * amount, to_amount)).ravel()
+        leg_qty = np.column_stack((sign * qty, qty)).ravel()
+        leg_flow = np.column_stack((sign * val_chf, to_val_chf)).ravel()
+        legs = leg_row >= 0
+        leg_row, leg_bucket = leg_row[legs], leg_bucket[legs]
+        leg_kind = np.tile([_FROM, _TO], len(dates))[legs]
+        leg_transfer = np.repeat(is_transfer, 2)[legs]
+        leg_flow = leg_flow[legs]
+
+        flows = _sum_at(shape, leg_row, leg_bucket, leg_flow)
+        withdrawn = leg_transfer & (leg_kind == _FROM)
+        withdrawals = _sum_at(shape, leg_row[withdrawn], leg_bucket[withdrawn], -leg_flow[withdrawn])
+        deposited = leg_kind == _TO
+        deposits = _sum_at(shape, leg_row[deposited], leg_bucket[deposited], leg_flow[deposited])
+
+        bal = _month_end_running(leg_row, leg_bucket, leg_bal[legs], bal_open, n_months)
+        held = _month_end_running(leg_row, leg_bucket, leg_qty[legs], qty_open, n_months)
+
+        valuations = self._asof(ids, """
+            SELECT account_id, date, CAST(value AS DOUBLE) AS value
+            FROM investment_valuations
+        """, boundary_days)
+        # Optional per-share price table; valuations stand in where it is missing.
+        has_prices = self.conn.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'stock_prices'"
+        ).fetchone()[0]
+        prices = np.zeros_like(valuations)
+        if has_prices:
+            prices = self._asof(ids, """
+                SELECT account_id, date, CAST(price AS DOUBLE) AS value
+                FROM stock_prices
+            """, boundary_days)
+
+        total_value = np.array([s == 'Total Value' for s in strategies])[:, None]
+        price = np.where(prices != 0.0, prices, valuations)
+        native = np.where(total_value, np.where(valuations != 0.0, valuations, bal), bal + held * price)
+        value_chf = native * self._rates(currencies, boundary_days)
+        gains = (value_chf[:, 1:] - value_chf[:, :-1]) - flows
+
+        results = {}
+        for m in range(n_months):
+            month_res = {
+                'total_gain': 0.0,
+                'total_loss': 0.0,
+                'net': 0.0,
+                'total_income': sum(income[:, m].tolist()),
+                'total_expense': sum(expense[:, m].tolist()),
+                'total_deposits': sum(deposits[:, m].tolist()),
+                'total_withdrawals': sum(withdrawals[:, m].tolist()),
+                'net_flow': sum(flows[:, m].tolist()),
+                'details': {
+                    'gains': {},
+                    'losses': {},
+                    'flows': {},
+                    'income': {names[i]: v for i, v in enumerate(income[:, m].tolist()) if abs(v) > 0.001},
+                    'expense': {names[i]: v for i, v in enumerate(expense[:, m].tolist()) if abs(v) > 0.001},
+                }
+            }
+            details = month_res['details']
+            for i, (flow, gain) in enumerate(zip(flows[:, m].tolist(), gains[:, m].tolist())):
+                if abs(flow) > 0.001:
+                    details['flows'][names[i]] = flow
+                if gain >= 0.001:
+                    month_res['total_gain'] += gain
+                    details['gains'][names[i]] = gain
+                elif gain <= -0.001:
+                    month_res['total_loss'] += gain
+                    details['losses'][names[i]] = gain
+            month_res['net'] = month_res['total_gain'] + month_res['total_loss']
+            results[m + 1] = month_res
+        return results
+
+    def gains_history(self, start_date: str, end_date: str, account_ids=None) -> dict:
+        """Result of BudgetApp.get_investment_gains_history."""
+        ids, _, currencies, strategies = self._accounts(account_ids)
+        if not len(ids):
+            return {}
+        months = np.arange(np.datetime64(str(start_date)[:7], 'M'),
+                           np.datetime64(str(end_date)[:7], 'M') + 1)
+        if not len(months):
+            return {}
+        n_acc, n_months = len(ids), len(months)
+        boundary_days = self._boundary_days(months)
+
+        _, qty_open = self._opening(ids, start_date)
+
+        ph = ','.join(['?'] * n_acc)
+        id_list = ids.tolist()
+        tx = self.conn.execute(f"""
+            SELECT t.date, t.type, t.account_id, t.to_account_id,
+                CAST(t.amount AS DOUBLE) AS amount,
+                CAST(t.to_amount AS DOUBLE) AS to_amount,
+                CAST(t.qty AS DOUBLE) AS qty,
+                a.currency
+            FROM transactions t
+            JOIN accounts a ON t.account_id = a.id
+            WHERE (t.account_id IN ({ph}) OR (t.type='transfer' AND t.to_account_id IN ({ph})))
+              AND t.date >= ? AND t.date <= ?
+            ORDER BY t.date
+        """, id_list + id_list + [start_date, end_date]).fetchnumpy()
+
+        t_type = np.asarray(np.ma.getdata(tx['type']), dtype=object)
+        dates = np.asarray(tx['date']).astype('datetime64[D]')
+        bucket = (dates.astype('datetime64[M]') - months[0]).astype(np.int64)
+        amount, to_amount, qty = _floats(tx, 'amount'), _floats(tx, 'to_amount'), _floats(tx, 'qty')
+        from_row = self._rows_of(ids, _ids(tx, 'account_id'))
+        to_row = self._rows_of(ids, _ids(tx, 'to_account_id'))
+        source_currency = np.ma.filled(np.ma.asarray(tx['currency'], dtype=object), None)
+
+        is_transfer = t_type == 'transfer'
+        sign = np.select([t_type == 'income', (t_type == 'expense') | is_transfer], [1.0, -1.0], 0.0)
+        from_leg = (from_row >= 0) & (sign != 0)
+        to_leg = is_transfer & (to_row >= 0)
+
+        out_chf = -amount * self.rate_index.lookup_mixed(source_currency, dates, before=1.0)
+        in_chf = np.zeros(len(dates))
+        for row in set(to_row[to_leg].tolist()):
+            rows = to_leg & (to_row == row)
+            in_chf[rows] = to_amount[rows] * self.rate_index.lookup(currencies[row], dates[rows], before=1.0)
+
+        leg_row = np.column_stack((np.where(from_leg, from_row, -1), np.where(to_leg, to_row, -1))).ravel()
+        leg_bucket = np.repeat(bucket, 2)
+        leg_qty = np.column_stack((sign * qty, qty)).ravel()
+        leg_invested = np.column_stack((np.where(is_transfer, out_chf, 0.0), in_chf)).ravel()
+        legs = leg_row >= 0
+
+        # Net invested is one running total over all accounts, in booking order.
+        invested = np.zeros(n_months)
+        np.add.at(invested, leg_bucket[legs], leg_invested[legs])
+        held = _month_end_running(leg_row[legs], leg_bucket[legs], leg_qty[legs], qty_open, n_months)
+
+        prices = self._asof(ids, """
+            SELECT account_id, date, CAST(value AS DOUBLE) AS value
+            FROM investment_valuations
+        """, boundary_days)
+        price_qty = np.array([s == 'Price/Qty' for s in strategies])[:, None]
+        native = np.where(price_qty, held * prices, prices)
+        totals = np.add.reduce(native * self._rates(currencies, boundary_days), axis=0)
+        gains = (totals[1:] - totals[:-1]) - invested
+
+        history = {}
+        for ym, gain in zip((str(m) for m in months), gains.tolist()):
+            history[ym] = {
+                'net': gain,
+                'gain': gain if gain > 0 else 0,
+                'loss': abs(gain) if gain < 0 else 0
+            }
+        return history
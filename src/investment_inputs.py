@@ -0,0 +1,188 @@
+import numpy as np
+
+from connection_pool import registered_columns
+
+
+def _empty_dates():
+    return np.empty(0, dtype='datetime64[D]')
+
+
+class InvestmentInputs:
+    """
+    Inputs of the performance calculations for one investment account, as NumPy arrays.
+
+    flow_dates/flow_amounts: external cash flows in the account currency
+        (deposits negative, withdrawals positive), as get_account_cash_flows.
+    qty_dates/qty_deltas: quantity changes sorted by date, as get_qty_changes.
+    valuation_dates/valuation_values: valuation history sorted by date.
+    cost_basis: deposits minus withdrawals in CHF at historical rates.
+    income/fees: {'total': chf, 'years': {year: {'total', 'breakdown'}}} as
+        get_accumulated_dividends / get_accumulated_expenses.
+    """
+
+    def __init__(self, account_id, currency):
+        self.account_id = account_id
+        self.currency = currency
+        self.flow_dates = _empty_dates()
+        self.flow_amounts = np.empty(0)
+        self.qty_dates = _empty_dates()
+        self.qty_deltas = np.empty(0)
+        self.valuation_dates = _empty_dates()
+        self.valuation_values = np.empty(0)
+        self.cost_basis = 0.0
+        self.income = {'total': 0.0, 'years': {}}
+        self.fees = {'total': 0.0, 'years': {}}
+
+    def flows(self) -> list:
+        """Cash flows as a list of (date, amount)."""
+        return list(zip(self.flow_dates.tolist(), self.flow_amounts.tolist()))
+
+    def qty_changes(self) -> list:
+        return list(zip(self.qty_dates.tolist(), self.qty_deltas.tolist()))
+
+    def valuation_history(self) -> list:
+        return list(zip(self.valuation_dates.tolist(), self.valuation_values.tolist()))
+
+    def valuation_at(self, d) -> float:
+        """
+        Valuation in effect at date d (SCD2, end of day inclusive), the earliest one
+        before history starts, 0.0 without history; as get_investment_valuation_for_date.
+        """
+        if not len(self.valuation_values):
+            return 0.0
+        idx = np.searchsorted(self.valuation_dates, np.datetime64(str(d)[:10], 'D'), side='right') - 1
+        return float(self.valuation_values[max(idx, 0)])
+
+    def qty_at(self, dates) -> np.ndarray:
+        """Cumulative quantity at the end of each of `dates`."""
+        held = np.concatenate(([0.0], np.cumsum(self.qty_deltas)))
+        return held[np.searchsorted(self.qty_dates, np.asarray(dates, dtype='datetime64[D]'), side='right')]
+
+
+def _split(keys, *arrays):
+    """{key: tuple of the arrays' rows for that key}, keeping row order within a key."""
+    if not len(keys):
+        return {}
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    arrays = [a[order] for a in arrays]
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(keys)]))
+    return {int(keys[s]): tuple(a[s:e] for a in arrays) for s, e in zip(starts, ends)}
+
+
+def _summaries(acc_ids, amounts_chf, years, categories):
+    """Per-account {'total', 'years'} summaries of income or fee rows."""
+    summary = {}
+    for acc_id, val_chf, year, category_name in zip(
+            acc_ids.tolist(), amounts_chf.tolist(), years, categories):
+        acc_data = summary.setdefault(acc_id, {'total': 0.0, 'years': {}})
+        if not val_chf or val_chf != val_chf:
+            continue
+        acc_data['total'] += val_chf
+        year_data = acc_data['years'].setdefault(year, {'total': 0.0, 'breakdown': {}})
+        year_data['total'] += val_chf
+        cat_key = category_name if category_name else "Uncategorized"
+        year_data['breakdown'][cat_key] = year_data['breakdown'].get(cat_key, 0.0) + val_chf
+    return summary
+
+
+def load(conn, rate_index, accounts) -> dict:
+    """
+    {account_id: InvestmentInputs} for accounts, a list of (id, currency) pairs,
+    from one scan of transactions and one of investment_valuations.
+    """
+    result = {acc_id: InvestmentInputs(acc_id, currency) for acc_id, currency in accounts}
+    if not result:
+        return result
+    ids = np.array(sorted(result), dtype=np.int64)
+
+    with registered_columns(conn, '_investment_ids', {'id': ids}):
+        tx = conn.execute("""
+            SELECT t.type, t.date, t.account_id, t.to_account_id, t.invest_account_id,
+                CAST(t.amount AS DOUBLE) AS amount,
+                CAST(t.to_amount AS DOUBLE) AS to_amount,
+                CAST(t.qty AS DOUBLE) AS qty,
+                a.currency, c.sub_category
+            FROM transactions t
+            LEFT JOIN accounts a ON t.account_id = a.id
+            LEFT JOIN categories c ON t.category_id = c.id
+            WHERE t.account_id IN (SELECT id FROM _investment_ids)
+               OR t.to_account_id IN (SELECT id FROM _investment_ids)
+               OR t.invest_account_id IN (SELECT id FROM _investment_ids)
+            ORDER BY t.date, t.id
+        """).fetchnumpy()
+        vals = conn.execute("""
+            SELECT account_id, date, CAST(value AS DOUBLE) AS value
+            FROM investment_valuations
+            WHERE account_id IN (SELECT id FROM _investment_ids)
+            ORDER BY account_id, date
+        """).fetchnumpy()
+
+    def ids_of(name):
+        column = tx[name]
+        values = np.ma.getdata(column).astype(np.int64)
+        return np.where(np.ma.getmaskarray(column), -1, values)
+
+    def floats(name):
+        return np.ma.filled(np.ma.asarray(tx[name], dtype=np.float64), np.nan)
+
+    t_type = np.asarray(np.ma.getdata(tx['type']), dtype=object)
+    dates = np.asarray(tx['date']).astype('datetime64[D]')
+    account_id, to_account_id, invest_id = ids_of('account_id'), ids_of('to_account_id'), ids_of('invest_account_id')
+    amount, to_amount, qty = floats('amount'), floats('to_amount'), floats('qty')
+
+    is_transfer = t_type == 'transfer'
+    deposit = is_transfer & np.isin(to_account_id, ids)
+    withdrawal = is_transfer & np.isin(account_id, ids)
+
+    # External cash flows: deposits first, then withdrawals (get_account_cash_flows order).
+    flow_keys = np.concatenate((to_account_id[deposit], account_id[withdrawal]))
+    flow_dates = np.concatenate((dates[deposit], dates[withdrawal]))
+    flow_amounts = np.nan_to_num(np.concatenate((-to_amount[deposit], amount[withdrawal])))
+    for acc_id, (f_dates, f_amounts) in _split(flow_keys, flow_dates, flow_amounts).items():
+        result[acc_id].flow_dates, result[acc_id].flow_amounts = f_dates, f_amounts
+
+    # Cost basis in CHF at the rate of the investment account's currency on each date.
+    currencies = np.array([result[int(k)].currency for k in flow_keys], dtype=object)
+    flow_chf = -flow_amounts * rate_index.lookup_mixed(currencies, flow_dates)
+    for acc_id, (chf,) in _split(flow_keys, flow_chf).items():
+        result[acc_id].cost_basis = float(chf.sum())
+
+    # Quantity changes, signed as in get_qty_changes.
+    has_qty = ~np.isnan(qty) & (np.nan_to_num(qty) != 0)
+    in_set = np.isin(account_id, ids)
+    qty_parts = [
+        (deposit & has_qty, to_account_id, 1.0),
+        ((t_type == 'expense') & in_set & has_qty, account_id, 1.0),
+        (withdrawal & has_qty, account_id, -1.0),
+        ((t_type == 'income') & in_set & has_qty, account_id, -1.0),
+    ]
+    qty_keys = np.concatenate([keys[mask] for mask, keys, _ in qty_parts])
+    qty_dates = np.concatenate([dates[mask] for mask, _, _ in qty_parts])
+    qty_deltas = np.concatenate([qty[mask] * sign for mask, _, sign in qty_parts])
+    order = np.argsort(qty_dates, kind='stable')
+    for acc_id, (q_dates, q_deltas) in _split(qty_keys[order], qty_dates[order], qty_deltas[order]).items():
+        result[acc_id].qty_dates, result[acc_id].qty_deltas = q_dates, q_deltas
+
+    # Income and fees booked against the investment account, at the paying account's rate.
+    account_currency = np.asarray(np.ma.getdata(tx['currency']), dtype=object)
+    has_currency = ~np.ma.getmaskarray(tx['currency'])
+    sub_category = np.ma.filled(np.ma.asarray(tx['sub_category'], dtype=object), None)
+    for kind, attr in (('income', 'income'), ('expense', 'fees')):
+        rows = (t_type == kind) & np.isin(invest_id, ids) & has_currency
+        if not rows.any():
+            continue
+        chf = amount[rows] * rate_index.lookup_mixed(account_currency[rows], dates[rows])
+        years = [str(y) for y in dates[rows].astype('datetime64[Y]')]
+        for acc_id, summary in _summaries(invest_id[rows], chf, years, sub_category[rows]).items():
+            setattr(result[acc_id], attr, summary)
+
+    v_ids = np.asarray(vals['account_id'], dtype=np.int64)
+    v_dates = np.asarray(vals['date']).astype('datetime64[D]')
+    v_values = np.asarray(vals['value'], dtype=np.float64)
+    for acc_id, (d, v) in _split(v_ids, v_dates, v_values).items():
+        result[acc_id].valuation_dates, result[acc_id].valuation_values = d, v
+
+    return result
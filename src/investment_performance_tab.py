@@ -1,246 +1,246 @@
 from datetime import date, datetime
-from finance_utils import xirr, calculate_linked_twr
+from finance_utils import xirr_batch, calculate_linked_twr
+from investment_inputs import InvestmentInputs
 from utils import format_currency
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                              QTableWidget, QProgressBar)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QColor
 from excel_filter import ExcelHeaderView
+from search_index import TableSearch
 from transactions_dialog import NumericTableWidgetItem, StringTableWidgetItem
 
 
+# Tables the figures are computed from; a change to any of them voids the cached result.
+PERFORMANCE_TABLES = ('transactions', 'accounts', 'categories', 'exchange_rates',
+                      'investment_valuations')
+PERFORMANCE_CACHE = 'investment_performance'
+
+
 class PerformanceLoaderThread(QThread):
     finished = pyqtSignal(object)
 
-    def __init__(self, budget_app):
+    def __init__(self, budget_app, today):
         super().__init__()
         self.budget_app = budget_app
+        self.today = today
 
     def run(self):
         try:
-            balances = self.budget_app.get_balance_summary()
-            dividends = self.budget_app.get_accumulated_dividends()
-            expenses = self.budget_app.get_accumulated_expenses()
-            rates = self.budget_app.get_exchange_rates_map()
-            all_accounts = self.budget_app.get_all_accounts()
-
-            data = []
-
-            total_stats = {
-                'cost_basis': 0.0,
-                'market_val': 0.0,
-                'unrealized': 0.0,
-                'income': 0.0,
-                'fees': 0.0,
-                'return_sum': 0.0,
-                'income_bd': {},
-                'fees_bd': {},
-            }
-            
-            all_value_histories_chf = []
-            all_flows_chf = []
-
-            today = date.today()
-
-            for acc in all_accounts:
-                if not getattr(acc, 'is_investment', False):
-                    continue
-                if not getattr(acc, 'is_active', True):
-                    continue
-
-                acc_id = acc.id
-                name = acc.account
-                currency = acc.currency
+            data, changed = self.budget_app.aggregate_cache.revalidate(
+                PERFORMANCE_CACHE, (self.today.isoformat(),), PERFORMANCE_TABLES, self.compute)
+            # None tells the tab that the cached figures it shows are current.
+            self.finished.emit(data if changed else None)
+        except Exception as e:
+            print(f"Error loading performance data: {e}")
+            import traceback
+            traceback.print_exc()
+            self.finished.emit([])
 
-                balance_data = balances.get(acc_id, {})
-                qty = balance_data.get('qty', 0.0)
-                cost_basis_chf = self.budget_app.get_historical_cost_basis(acc_id)
-                rate = rates.get(currency, 1.0)
+    def compute(self):
+        balances = self.budget_app.get_balance_summary()
+        rates = self.budget_app.get_exchange_rates_map()
+        all_accounts = self.budget_app.get_all_accounts()
+        investment_accounts = [
+            acc for acc in all_accounts
+            if getattr(acc, 'is_investment', False) and getattr(acc, 'is_active', True)]
+        inputs = self.budget_app.get_investment_inputs(
+            [acc.id for acc in investment_accounts])
+
+        data = []
+
+        total_stats = {
+            'cost_basis': 0.0,
+            'market_val': 0.0,
+            'unrealized': 0.0,
+            'income': 0.0,
+            'fees': 0.0,
+            'return_sum': 0.0,
+            'income_bd': {},
+            'fees_bd': {},
+        }
+            
+        all_value_histories_chf = []
+        all_flows_chf = []
+        account_xirr_flows = []
+
+        today = self.today
+
+        for acc in investment_accounts:
+            acc_id = acc.id
+            name = acc.account
+            currency = acc.currency
+            acc_inputs = inputs.get(acc_id) or InvestmentInputs(acc_id, currency)
+
+            balance_data = balances.get(acc_id, {})
+            qty = balance_data.get('qty', 0.0)
+            cost_basis_chf = acc_inputs.cost_basis
+            rate = rates.get(currency, 1.0)
                 
-                valuation_native = 0.0
-                strategy = getattr(acc, 'valuation_strategy', 'Total Value')
-                raw_val = self.budget_app.get_investment_valuation_for_date(acc_id)
-
-                if strategy == 'Price/Qty':
-                    valuation_native = qty * raw_val
-                elif raw_val > 0:
-                    valuation_native = raw_val
-                else:
-                    valuation_native = balance_data.get('balance', 0.0)
+            valuation_native = 0.0
+            strategy = getattr(acc, 'valuation_strategy', 'Total Value')
+            raw_val = acc_inputs.valuation_at(today)
+
+            if strategy == 'Price/Qty':
+                valuation_native = qty * raw_val
+            elif raw_val > 0:
+                valuation_native = raw_val
+            else:
+                valuation_native = balance_data.get('balance', 0.0)
 
-                market_val_chf = valuation_native * rate
+            market_val_chf = valuation_native * rate
 
-                income_data = dividends.get(acc_id, {'total': 0.0, 'years': {}})
-                income_chf = income_data['total']
-                years_data = income_data['years']
+            income_data = acc_inputs.income
+            income_chf = income_data['total']
+            years_data = income_data['years']
 
-                expense_data = expenses.get(acc_id, {'total': 0.0, 'years': {}})
-                fees_chf = expense_data['total']
-                fees_years_data = expense_data['years']
+            expense_data = acc_inputs.fees
+            fees_chf = expense_data['total']
+            fees_years_data = expense_data['years']
 
-                unrealized_pl_chf = market_val_chf - cost_basis_chf
-                total_return_chf = unrealized_pl_chf + income_chf - fees_chf
+            unrealized_pl_chf = market_val_chf - cost_basis_chf
+            total_return_chf = unrealized_pl_chf + income_chf - fees_chf
 
-                unrealized_pl_pct = 0.0
-                if abs(cost_basis_chf) > 0.01:
-                    unrealized_pl_pct = (unrealized_pl_chf / abs(cost_basis_chf)) * 100
+            unrealized_pl_pct = 0.0
+            if abs(cost_basis_chf) > 0.01:
+                unrealized_pl_pct = (unrealized_pl_chf / abs(cost_basis_chf)) * 100
 
-                total_return_pct = 0.0
-                if abs(cost_basis_chf) > 0.01:
-                    total_return_pct = (total_return_chf / abs(cost_basis_chf)) * 100
+            total_return_pct = 0.0
+            if abs(cost_basis_chf) > 0.01:
+                total_return_pct = (total_return_chf / abs(cost_basis_chf)) * 100
 
-                flows = self.budget_app.get_account_cash_flows(acc_id)
+            flows = acc_inputs.flows()
                 
-                xirr_flows = flows.copy()
-                xirr_flows.append((today, market_val_chf))
-                xirr_flows_native = flows.copy()
-                xirr_flows_native.append((today, valuation_native))
-                irr_val = xirr(xirr_flows_native)
-                irr_pct = (irr_val * 100.0) if irr_val is not None else None
-
-                val_history = []
+            xirr_flows_native = flows.copy()
+            xirr_flows_native.append((today, valuation_native))
+            account_xirr_flows.append(xirr_flows_native)
+
+            val_history = []
                 
-                if strategy == 'Total Value':
-                    raw_history = self.budget_app.get_investment_valuation_history(acc_id)
-                    val_history = raw_history
+            if strategy == 'Total Value':
+                val_history = acc_inputs.valuation_history()
                 
-                elif strategy == 'Price/Qty':
-                    price_history = self.budget_app.get_investment_valuation_history(acc_id)
-                    qty_changes = self.budget_app.get_qty_changes(acc_id)
+            elif strategy == 'Price/Qty':
+                price_dates = acc_inputs.valuation_dates
+                values = acc_inputs.valuation_values * acc_inputs.qty_at(price_dates)
+                val_history = list(zip(price_dates.tolist(), values.tolist()))
+
+            twr_pct = None
+            if val_history:
+                if not val_history or val_history[-1][0] < today:
+                    val_history.append((today, valuation_native))
                     
-                    if price_history:
-                        price_history.sort(key=lambda x: x[0])
-                        qty_changes.sort(key=lambda x: x[0])
-                        
-                        current_qty = 0.0
-                        qty_idx = 0
-                        n_qty = len(qty_changes)
-                        
-                        for p_date, price in price_history:
-                            while qty_idx < n_qty and qty_changes[qty_idx][0] <= p_date:
-                                current_qty += qty_changes[qty_idx][1]
-                                qty_idx += 1
-                            
-                            val = price * current_qty
-                            val_history.append((p_date, val))
-
-                twr_pct = None
-                if val_history:
-                    if not val_history or val_history[-1][0] < today:
-                        val_history.append((today, valuation_native))
-                    
-                    twr_val = calculate_linked_twr(val_history, flows)
-                    twr_pct = twr_val
+                twr_val = calculate_linked_twr(val_history, flows)
+                twr_pct = twr_val
 
-                flows_chf_acc = [(d, amt * rate) for d, amt in flows]
-                all_flows_chf.extend(flows_chf_acc)
+            flows_chf_acc = [(d, amt * rate) for d, amt in flows]
+            all_flows_chf.extend(flows_chf_acc)
 
                 
-                history_chf = [(d, v * rate) for d, v in val_history]
-                all_value_histories_chf.append(history_chf)
-
-                total_stats['cost_basis'] += cost_basis_chf
-                total_stats['market_val'] += market_val_chf
-                total_stats['unrealized'] += unrealized_pl_chf
-                total_stats['income'] += income_chf
-                total_stats['fees'] += fees_chf
-                total_stats['return_sum'] += total_return_chf
+            history_chf = [(d, v * rate) for d, v in val_history]
+            all_value_histories_chf.append(history_chf)
+
+            total_stats['cost_basis'] += cost_basis_chf
+            total_stats['market_val'] += market_val_chf
+            total_stats['unrealized'] += unrealized_pl_chf
+            total_stats['income'] += income_chf
+            total_stats['fees'] += fees_chf
+            total_stats['return_sum'] += total_return_chf
                 
-                def agg_bd(src, limit_dict):
-                    for y, d in src.items():
-                        if y not in limit_dict: limit_dict[y] = {'total':0.0,'breakdown':{}}
-                        limit_dict[y]['total'] += d['total']
-                        for c, v in d['breakdown'].items():
-                            limit_dict[y]['breakdown'][c] = limit_dict[y]['breakdown'].get(c, 0.0) + v
+            def agg_bd(src, limit_dict):
+                for y, d in src.items():
+                    if y not in limit_dict: limit_dict[y] = {'total':0.0,'breakdown':{}}
+                    limit_dict[y]['total'] += d['total']
+                    for c, v in d['breakdown'].items():
+                        limit_dict[y]['breakdown'][c] = limit_dict[y]['breakdown'].get(c, 0.0) + v
                 
-                agg_bd(years_data, total_stats['income_bd'])
-                agg_bd(fees_years_data, total_stats['fees_bd'])
-
-                row = {
-                    'name': name,
-                    'currency': currency,
-                    'qty': qty,
-                    'cost_basis': cost_basis_chf,
-                    'market_value': market_val_chf,
-                    'unrealized_pl': unrealized_pl_chf,
-                    'unrealized_pl_pct': unrealized_pl_pct,
-                    'dividends': income_chf,
-                    'income_breakdown': years_data,
-                    'fees': fees_chf,
-                    'fees_breakdown': fees_years_data,
-                    'total_return': total_return_chf,
-                    'total_return_pct': total_return_pct,
-                    'irr': irr_pct,
-                    'twr': twr_pct,
-                    'is_total': False
-                }
-                data.append(row)
-
-            total_twr_pct = None
-            if all_value_histories_chf:
-                all_dates = set()
-                for h in all_value_histories_chf:
-                    for d, v in h:
-                        all_dates.add(d)
-                sorted_dates = sorted(list(all_dates))
+            agg_bd(years_data, total_stats['income_bd'])
+            agg_bd(fees_years_data, total_stats['fees_bd'])
+
+            row = {
+                'name': name,
+                'currency': currency,
+                'qty': qty,
+                'cost_basis': cost_basis_chf,
+                'market_value': market_val_chf,
+                'unrealized_pl': unrealized_pl_chf,
+                'unrealized_pl_pct': unrealized_pl_pct,
+                'dividends': income_chf,
+                'income_breakdown': years_data,
+                'fees': fees_chf,
+                'fees_breakdown': fees_years_data,
+                'total_return': total_return_chf,
+                'total_return_pct': total_return_pct,
+                'irr': None,
+                'twr': twr_pct,
+                'is_total': False
+            }
+            data.append(row)
+
+        total_twr_pct = None
+        if all_value_histories_chf:
+            all_dates = set()
+            for h in all_value_histories_chf:
+                for d, v in h:
+                    all_dates.add(d)
+            sorted_dates = sorted(list(all_dates))
                 
-                total_history = []
-                curr_vals = [0.0] * len(all_value_histories_chf)
+            total_history = []
+            curr_vals = [0.0] * len(all_value_histories_chf)
                 
-                updates_by_date = {d: [] for d in sorted_dates}
-                for idx, h in enumerate(all_value_histories_chf):
-                    for d, v in h:
-                        updates_by_date[d].append((idx, v))
+            updates_by_date = {d: [] for d in sorted_dates}
+            for idx, h in enumerate(all_value_histories_chf):
+                for d, v in h:
+                    updates_by_date[d].append((idx, v))
                 
-                for d in sorted_dates:
-                    for idx, v in updates_by_date[d]:
-                        curr_vals[idx] = v
+            for d in sorted_dates:
+                for idx, v in updates_by_date[d]:
+                    curr_vals[idx] = v
                     
-                    total_val = sum(curr_vals)
-                    total_history.append((d, total_val))
-                total_twr_pct = calculate_linked_twr(total_history, all_flows_chf)
-
-            total_irr_pct = None
-            if all_flows_chf or total_stats['market_val'] > 0:
-                total_xirr_flows = all_flows_chf.copy()
-                total_xirr_flows.append((today, total_stats['market_val']))
-                
-                t_irr = xirr(total_xirr_flows)
-                if t_irr is not None:
-                     total_irr_pct = t_irr * 100.0
-
-            t_unreal_pct = (total_stats['unrealized'] / abs(total_stats['cost_basis']) * 100) if abs(total_stats['cost_basis']) > 0.01 else 0.0
-            t_ret_pct = (total_stats['return_sum'] / abs(total_stats['cost_basis']) * 100) if abs(total_stats['cost_basis']) > 0.01 else 0.0
-
-            total_row = {
-                'name': 'TOTAL',
-                'currency': '',
-                'qty': 0,
-                'cost_basis': total_stats['cost_basis'],
-                'market_value': total_stats['market_val'],
-                'unrealized_pl': total_stats['unrealized'],
-                'unrealized_pl_pct': t_unreal_pct,
-                'dividends': total_stats['income'],
-                'income_breakdown': total_stats['income_bd'],
-                'fees': total_stats['fees'],
-                'fees_breakdown': total_stats['fees_bd'],
-                'total_return': total_stats['return_sum'],
-                'total_return_pct': t_ret_pct,
-                'irr': total_irr_pct,
-                'twr': total_twr_pct,
-                'is_total': True
-            }
+                total_val = sum(curr_vals)
+                total_history.append((d, total_val))
+            total_twr_pct = calculate_linked_twr(total_history, all_flows_chf)
+
+        # Solve every account's IRR and the portfolio IRR in one batch.
+        total_xirr_flows = None
+        if all_flows_chf or total_stats['market_val'] > 0:
+            total_xirr_flows = all_flows_chf.copy()
+            total_xirr_flows.append((today, total_stats['market_val']))
+
+        irr_values = xirr_batch(account_xirr_flows + [total_xirr_flows])
+        for row, irr_val in zip(data, irr_values):
+            row['irr'] = (irr_val * 100.0) if irr_val is not None else None
+
+        total_irr_pct = None
+        if irr_values[-1] is not None:
+            total_irr_pct = irr_values[-1] * 100.0
+
+        t_unreal_pct = (total_stats['unrealized'] / abs(total_stats['cost_basis']) * 100) if abs(total_stats['cost_basis']) > 0.01 else 0.0
+        t_ret_pct = (total_stats['return_sum'] / abs(total_stats['cost_basis']) * 100) if abs(total_stats['cost_basis']) > 0.01 else 0.0
+
+        total_row = {
+            'name': 'TOTAL',
+            'currency': '',
+            'qty': 0,
+            'cost_basis': total_stats['cost_basis'],
+            'market_value': total_stats['market_val'],
+            'unrealized_pl': total_stats['unrealized'],
+            'unrealized_pl_pct': t_unreal_pct,
+            'dividends': total_stats['income'],
+            'income_breakdown': total_stats['income_bd'],
+            'fees': total_stats['fees'],
+            'fees_breakdown': total_stats['fees_bd'],
+            'total_return': total_stats['return_sum'],
+            'total_return_pct': t_ret_pct,
+            'irr': total_irr_pct,
+            'twr': total_twr_pct,
+            'is_total': True
+        }
 
-            if data:
-                data.insert(0, total_row)
+        if data:
+            data.insert(0, total_row)
 
-            self.finished.emit(data)
-
-        except Exception as e:
-            print(f"Error loading performance data: {e}")
-            import traceback
-            traceback.print_exc()
-            self.finished.emit([])
+        return data
 
 
 class InvestmentPerformanceTab(QWidget):
@@ -248,27 +248,6 @@ class InvestmentPerformanceTab(QWidget):
         super().__init__(parent)
         self.budget_app = budget_app
         self.init_ui()
-        
-    def filter_content(self, text):
-        """Filter table rows based on text matching."""
-        if not hasattr(self, 'performance_table'): return
-        
-        search_text = text.lower()
-        rows = self.performance_table.rowCount()
-        cols = self.performance_table.columnCount()
-        
-        for row in range(rows):
-            should_show = False
-            if not search_text:
-                should_show = True
-            else:
-                for col in range(cols):
-                    item = self.performance_table.item(row, col)
-                    if item and search_text in item.text().lower():
-                        should_show = True
-                        break
-            self.performance_table.setRowHidden(row, not should_show)
-        self.refresh_data()
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -297,6 +276,7 @@ class InvestmentPerformanceTab(QWidget):
         layout.addWidget(self.progress_bar)
 
         self.table = QTableWidget()
+        self.table_search = TableSearch(self.table)
         self.table.setColumnCount(12) 
         self.table.setHorizontalHeaderLabels([
             "Account", "Quantity", "Cost Basis", "Market Value",
@@ -365,14 +345,20 @@ class InvestmentPerformanceTab(QWidget):
         self.sort_order = Qt.SortOrder.DescendingOrder
 
     def refresh_data(self):
-        self.table.setRowCount(0)
+        today = date.today()
+        # Show the figures of the last run at once; the loader swaps in fresh ones if the data changed.
+        cached = self.budget_app.aggregate_cache.peek(PERFORMANCE_CACHE, (today.isoformat(),))
+        if cached is not None:
+            self.show_data(cached)
+        else:
+            self.table.setRowCount(0)
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)
 
         if hasattr(self, 'loader') and self.loader.isRunning():
             self.loader.wait()
 
-        self.loader = PerformanceLoaderThread(self.budget_app)
+        self.loader = PerformanceLoaderThread(self.budget_app, today)
         self.loader.finished.connect(self.on_data_loaded)
         self.loader.start()
 
@@ -386,6 +372,10 @@ class InvestmentPerformanceTab(QWidget):
 
     def on_data_loaded(self, data):
         self.progress_bar.setVisible(False)
+        if data is not None:
+            self.show_data(data)
+
+    def show_data(self, data):
         self.current_data = data
 
         self.table.horizontalHeader().setSortIndicator(self.sort_column, self.sort_order)
@@ -526,19 +516,4 @@ class InvestmentPerformanceTab(QWidget):
     def filter_content(self, text):
         """Filter table rows based on text matching."""
         if not hasattr(self, 'table'): return
-        
-        search_text = text.lower()
-        rows = self.table.rowCount()
-        cols = self.table.columnCount()
-        
-        for row in range(rows):
-            should_show = False
-            if not search_text:
-                should_show = True
-            else:
-                for col in range(cols):
-                    item = self.table.item(row, col)
-                    if item and search_text in item.text().lower():
-                        should_show = True
-                        break
-            self.table.setRowHidden(row, not should_show)
+        self.table_search.filter(text)
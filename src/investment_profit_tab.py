@@ -105,6 +105,8 @@ class InvestmentProfitTab(QWidget):
         self.current_end_date = None
         self.chart_data = None
         self.filter_account_ids = None
+        self.loader = None
+        self._old_loaders = []
         self.init_ui()
 
     def showEvent(self, event):
@@ -250,11 +252,18 @@ class InvestmentProfitTab(QWidget):
         self.progress_bar.setVisible(True)
         self.canvas.setVisible(False)
 
+        # A replaced loader may still be running; keep it referenced until it ends.
+        self._old_loaders = [l for l in self._old_loaders if l.isRunning()]
+        if self.loader is not None and self.loader.isRunning():
+            self._old_loaders.append(self.loader)
+
         self.loader = InvestmentProfitLoaderThread(self.budget_app, start_date, end_date, self.filter_account_ids)
         self.loader.finished.connect(self.on_data_loaded)
         self.loader.start()
     
     def on_data_loaded(self, data):
+        if self.sender() is not None and self.sender() is not self.loader:
+            return  # result of a superseded load
         self.progress_bar.setVisible(False)
         self.canvas.setVisible(True)
         self.chart_data = data
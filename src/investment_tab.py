@@ -7,6 +7,7 @@ from datetime import datetime
 
 from transactions_dialog import NumericTableWidgetItem
 from excel_filter import ExcelHeaderView
+from search_index import TableSearch
 from utils import format_currency
 
 from delegates import DateDelegate
@@ -82,6 +83,7 @@ class InvestmentTab(QWidget):
         layout.addWidget(info_label)
 
         self.table = QTableWidget()
+        self.table_search = TableSearch(self.table)
         self.table.setAlternatingRowColors(True)
         self.table.itemChanged.connect(self.on_item_changed)
         self.table.setStyleSheet("""
@@ -323,17 +325,11 @@ class InvestmentTab(QWidget):
         )
 
         if confirm == QMessageBox.StandardButton.Yes:
-            conn = self.budget_app._get_connection()
-            try:
-                conn.execute(
-                    "DELETE FROM investment_valuations WHERE date = ?", (date_str,))
-                conn.commit()
+            if self.budget_app.delete_investment_valuations_for_dates([date_str]):
                 self.table.removeRow(row)
                 QMessageBox.information(self, "Deleted", "Entries deleted.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete: {e}")
-            finally:
-                conn.close()
+            else:
+                QMessageBox.critical(self, "Error", "Failed to delete entries.")
 
     def validate_date(self, date_str):
         try:
@@ -391,14 +387,8 @@ class InvestmentTab(QWidget):
                             f"Invalid value '{text}' for {acc.account} on {date_str}")
 
             if dates_to_delete:
-                conn = self.budget_app._get_connection()
-                try:
-                    for old_date in dates_to_delete:
-                        conn.execute(
-                            "DELETE FROM investment_valuations WHERE date = ?", (old_date,))
-                    conn.commit()
-                finally:
-                    conn.close()
+                if not self.budget_app.delete_investment_valuations_for_dates(sorted(dates_to_delete)):
+                    raise ValueError("Failed to delete the valuations of renamed dates")
 
             if data_to_save:
                 self.budget_app.add_investment_valuations_bulk(data_to_save)
@@ -431,18 +421,4 @@ class InvestmentTab(QWidget):
 
     def filter_content(self, text):
         """Filter table rows based on text matching."""
-        search_text = text.lower()
-        rows = self.table.rowCount()
-        cols = self.table.columnCount()
-        
-        for row in range(rows):
-            should_show = False
-            if not search_text:
-                should_show = True
-            else:
-                for col in range(cols):
-                    item = self.table.item(row, col)
-                    if item and search_text in item.text().lower():
-                        should_show = True
-                        break
-            self.table.setRowHidden(row, not should_show)
+        self.table_search.filter(text)
@@ -1,12 +1,48 @@
 import sys
 import os
+import startup_timing
+startup_timing.install()
 from PyQt6.QtWidgets import QApplication, QSplashScreen, QMessageBox
 from PyQt6.QtGui import QPixmap, QColor, QPainter, QFont
-from PyQt6.QtCore import Qt, QSettings
-from main_window_tabbed import BudgetTrackerWindow
+from PyQt6.QtCore import Qt, QSettings, QThread, QEventLoop, pyqtSignal
 from startup_dialog import StartupDialog
 
 
+class AppLoaderThread(QThread):
+    """
+    Opens the database (lock retries, schema migrations, balance ledger,
+    indexes) and runs the warm-up reads off the GUI thread, so the main window
+    can be imported and built meanwhile. Afterwards budget_app holds the
+    opened BudgetApp, or error the exception that prevented it.
+    """
+    progress = pyqtSignal(int, str)
+
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = db_path
+        self.budget_app = None
+        self.error = None
+
+    def run(self):
+        try:
+            from models import BudgetApp
+            startup_timing.mark('loader: models imported')
+            budget_app = BudgetApp(self.db_path, progress_callback=self.progress.emit)
+            startup_timing.mark('loader: database opened')
+
+            self.progress.emit(80, "Loading accounts and categories...")
+            budget_app.get_all_accounts()
+            budget_app.get_all_categories()
+            budget_app.get_transaction_counts()
+            budget_app.get_rate_index()
+            startup_timing.mark('loader: warm-up reads done')
+            self.budget_app = budget_app
+            self.progress.emit(100, "Starting...")
+        except Exception as e:
+            # Re-raised by main() on the GUI thread, which reports it.
+            self.error = e
+
+
 def create_placeholder_splash():
 
     pixmap = QPixmap(500, 300)
@@ -33,6 +69,11 @@ def create_placeholder_splash():
     return pixmap
 
 
+def show_progress(splash, percent, message):
+    splash.showMessage(f"{message} {percent}%", Qt.AlignmentFlag.AlignBottom |
+                       Qt.AlignmentFlag.AlignCenter, QColor("black"))
+
+
 def main():
     print("Starting Budget Tracker v5.1...")
     def exception_hook(exctype, value, tb):
@@ -66,6 +107,7 @@ def main():
         splash = QSplashScreen(splash_pix)
         splash.show()
         app.processEvents()
+        startup_timing.mark('splash shown')
 
         settings = QSettings()
         db_path = settings.value("db_path", "")
@@ -106,7 +148,32 @@ def main():
                 sys.exit(0)
 
         try:
-            window = BudgetTrackerWindow(db_path)
+            # The database opens on a worker while the window is imported and
+            # built, so start-up takes the longer of the two instead of their sum.
+            loader = AppLoaderThread(db_path)
+            loader.progress.connect(
+                lambda percent, message: show_progress(splash, percent, message))
+            loader_done = QEventLoop()
+            loader.finished.connect(loader_done.quit)
+            loader.start()
+
+            # Imported behind the splash: the window pulls in models, duckdb and numpy.
+            from main_window_tabbed import BudgetTrackerWindow
+            startup_timing.mark('main window imported')
+
+            window = BudgetTrackerWindow(db_path, defer_data=True)
+            startup_timing.mark('main window built')
+
+            if not loader.isFinished():
+                loader_done.exec()
+            loader.wait()
+            startup_timing.mark('database ready')
+            if loader.error is not None:
+                raise loader.error
+
+            window.set_budget_app(loader.budget_app)
+            startup_timing.mark('main window filled')
+            startup_timing.report_on_first_paint(window)
             window.show()
             splash.finish(window)
 
@@ -8,11 +8,9 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
 from PyQt6.QtCore import Qt, QDate, QSettings, QTimer
 from PyQt6.QtGui import QIcon, QAction, QKeySequence, QShortcut
 
-from models import BudgetApp
+from change_bus import DirtyFlag
 from utils import safe_eval_math, format_currency
 from custom_widgets import NoScrollComboBox
-from expenses_dashboard_tab import ExpensesDashboardTab
-from investment_profit_tab import InvestmentProfitTab
 
 class LazyTabWrapper(QWidget):
     def __init__(self, tab_id, factory_func):
@@ -47,13 +45,59 @@ class LazyTabWrapper(QWidget):
 
 
 
+# Tables each tab reads; a tab is refreshed on activation only after one of them changed.
+TAB_TABLES = {
+    'overview': ('transactions', 'accounts', 'exchange_rates', 'investment_valuations'),
+    'expenses_dashboard': ('transactions', 'categories', 'accounts', 'exchange_rates'),
+    'transactions': ('transactions', 'categories', 'accounts'),
+    'account_entries': ('transactions', 'categories', 'accounts'),
+    'budget': ('transactions', 'categories', 'accounts', 'exchange_rates', 'budgets'),
+    'balance_report': ('transactions', 'accounts', 'exchange_rates', 'investment_valuations'),
+    'cash_flow': ('transactions', 'categories', 'accounts', 'exchange_rates'),
+    'investments': ('investment_valuations', 'accounts'),
+    'performance': ('transactions', 'categories', 'accounts', 'exchange_rates', 'investment_valuations'),
+    'currencies': ('exchange_rates', 'accounts'),
+    'manage_accounts': ('accounts', 'transactions'),
+    'manage_categories': ('categories', 'transactions', 'budgets'),
+    'investment_profit': ('transactions', 'accounts', 'exchange_rates', 'investment_valuations'),
+}
+
+
+# Pause in typing (ms) before the search bar filters the current tab.
+SEARCH_DEBOUNCE_MS = 200
+
+
 class BudgetTrackerWindow(QMainWindow):
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, defer_data=False):
+        """
+        With defer_data the window is built without opening db_path; the
+        caller opens the BudgetApp (e.g. on a worker thread) and hands it
+        over with set_budget_app() before showing the window.
+        """
         super().__init__()
         self.db_path = db_path
-        self.budget_app = BudgetApp(db_path)
-        self.transaction_counts = self.budget_app.get_transaction_counts()
+        self.budget_app = None
+        self.transaction_counts = {'accounts': {}, 'categories': {}, 'payees': {}}
+        self.tab_dirty = {}
         self.init_ui()
+        if not defer_data:
+            from models import BudgetApp
+            self.set_budget_app(BudgetApp(db_path))
+
+    def set_budget_app(self, budget_app):
+        """Attach the opened database: fill the Add Transaction form and load the current tab."""
+        self.budget_app = budget_app
+        self.transaction_counts = budget_app.get_transaction_counts()
+        self.tab_dirty = {tab_id: DirtyFlag(budget_app.changes, tables)
+                          for tab_id, tables in TAB_TABLES.items()}
+
+        self.update_account_combo()
+        self.update_to_account_combo()
+        self.update_payee_combo()
+        self.update_invest_account_combo()
+        self.update_ui_for_type()
+
+        QTimer.singleShot(0, lambda: self.on_tab_changed(self.tab_widget.currentIndex()))
 
     def init_ui(self):
         title = 'Budget Tracker 5.1'
@@ -106,7 +150,13 @@ class BudgetTrackerWindow(QMainWindow):
                 color: #888;
             }
         """)
-        self.search_input.textChanged.connect(self.perform_search)
+        self.search_input.textChanged.connect(self.on_search_text_changed)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(
+            lambda: self.perform_search(self.search_input.text()))
 
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_input)
@@ -181,8 +231,6 @@ class BudgetTrackerWindow(QMainWindow):
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
 
         main_layout.addWidget(self.tab_widget)
-        
-        QTimer.singleShot(100, lambda: self.on_tab_changed(self.tab_widget.currentIndex()))
 
 
 
@@ -190,6 +238,14 @@ class BudgetTrackerWindow(QMainWindow):
 
 
 
+    def on_search_text_changed(self, text):
+        """Search once typing pauses; clearing the search applies at once."""
+        if text:
+            self.search_timer.start()
+        else:
+            self.search_timer.stop()
+            self.perform_search(text)
+
     def perform_search(self, text):
         current_widget = self.tab_widget.currentWidget()
         if not current_widget:
@@ -219,7 +275,7 @@ class BudgetTrackerWindow(QMainWindow):
 
     def on_tab_changed(self, index):
         """Called when user switches tabs - Handles search and data refresh"""
-        if index < 0 or index >= self.tab_widget.count():
+        if index < 0 or index >= self.tab_widget.count() or self.budget_app is None:
             return
 
         self.search_input.clear()
@@ -248,6 +304,10 @@ class BudgetTrackerWindow(QMainWindow):
         else:
             current_widget = current_wrapper
 
+        dirty = self.tab_dirty.get(getattr(current_wrapper, 'tab_id', None))
+        if dirty is not None and not dirty.take():
+            return
+
         try:
             
             if hasattr(self, 'balance_tab_widget') and current_widget == self.balance_tab_widget:
@@ -283,12 +343,12 @@ class BudgetTrackerWindow(QMainWindow):
             elif hasattr(self, 'investment_tab_widget') and current_widget == self.investment_tab_widget:
                 if hasattr(self, 'investment_tab_ref'):
                     self.investment_tab_ref.refresh_data()
-            elif hasattr(self, 'investment_profit') and current_widget == self.tab_defs.get('investment_profit', [None])[0]:
-                if hasattr(current_widget, 'refresh_data'):
-                    current_widget.refresh_data()
-            elif hasattr(self, 'expenses_dashboard') and current_widget == self.tab_defs.get('expenses_dashboard', [None])[0]:
+            elif current_wrapper == self.tab_defs.get('investment_profit', [None])[0]:
                 if hasattr(current_widget, 'refresh_data'):
                     current_widget.refresh_data()
+            elif current_wrapper == self.tab_defs.get('expenses_dashboard', [None])[0]:
+                if hasattr(current_widget, 'load_data'):
+                    current_widget.load_data()
 
         except Exception as e:
             print(f"Error in on_tab_changed: {e}")
@@ -717,7 +777,6 @@ class BudgetTrackerWindow(QMainWindow):
         self.from_account_layout.addWidget(QLabel('Account:'))
         self.account_combo = NoScrollComboBox()
         self.account_combo.setMinimumWidth(250)
-        self.update_account_combo()
         self.from_account_layout.addWidget(self.account_combo)
         self.from_account_layout.addStretch()
         form_layout.addLayout(self.from_account_layout)
@@ -726,7 +785,6 @@ class BudgetTrackerWindow(QMainWindow):
         self.to_account_layout.addWidget(QLabel('To Account:'))
         self.to_account_combo = NoScrollComboBox()
         self.to_account_combo.setMinimumWidth(250)
-        self.update_to_account_combo()
         self.to_account_layout.addWidget(self.to_account_combo)
         self.to_account_layout.addStretch()
         form_layout.addLayout(self.to_account_layout)
@@ -738,7 +796,6 @@ class BudgetTrackerWindow(QMainWindow):
         self.payee_input.setInsertPolicy(QComboBox.InsertPolicy.InsertAtTop)
         self.payee_input.setPlaceholderText('Optional - select or type new')
         self.payee_input.currentTextChanged.connect(self.on_payee_text_changed)
-        self.update_payee_combo()
         self.payee_layout.addWidget(self.payee_input)
         self.payee_layout.addStretch()
         form_layout.addLayout(self.payee_layout)
@@ -819,7 +876,6 @@ class BudgetTrackerWindow(QMainWindow):
         self.invest_account_combo.setMinimumWidth(250)
         self.invest_account_combo.setPlaceholderText(
             'Optional - select if dividend')
-        self.update_invest_account_combo()
         self.invest_account_layout.addWidget(self.invest_account_combo)
         self.invest_account_layout.addStretch()
         form_layout.addLayout(self.invest_account_layout)
@@ -1032,6 +1088,7 @@ class BudgetTrackerWindow(QMainWindow):
 
     def create_expenses_dashboard_tab(self):
         def factory():
+            from expenses_dashboard_tab import ExpensesDashboardTab
             tab = ExpensesDashboardTab(self.budget_app, self)
             return tab
         return LazyTabWrapper('expenses_dashboard', factory), "📊 Expenses", "Dashboard of Expenses and Spending Habits"
@@ -1423,6 +1480,7 @@ class BudgetTrackerWindow(QMainWindow):
 
     def create_investment_profit_tab(self):
         def factory():
+            from investment_profit_tab import InvestmentProfitTab
             tab = InvestmentProfitTab(self.budget_app, self)
             return tab
         return LazyTabWrapper('investment_profit', factory), "💹 Invest P&L", "Monthly Investment Gains and Losses."
@@ -1430,6 +1488,8 @@ class BudgetTrackerWindow(QMainWindow):
     def update_parent_categories(self, trans_type):
 
         self.parent_category_combo.clear()
+        if self.budget_app is None:
+            return  # filled in by set_budget_app()
         categories = self.budget_app.get_all_categories()
 
         parent_categories = set()
@@ -1460,10 +1520,9 @@ class BudgetTrackerWindow(QMainWindow):
         return account.currency if account else 'CHF'
 
     def get_account_by_id(self, account_id):
-        accounts = self.budget_app.get_all_accounts()
-        for account in accounts:
-            if account.id == account_id:
-                return account
+        account = self.budget_app.get_account_by_id(account_id)
+        if account and account.is_active:
+            return account
         return None
 
     def add_transaction(self):
@@ -1606,11 +1665,10 @@ class BudgetTrackerWindow(QMainWindow):
             self.notes_input.clear()
             self.invest_account_combo.setCurrentIndex(0)
             self.starting_balance_checkbox.setChecked(False)
+            known_payees = self.transaction_counts['payees']
             self.transaction_counts = self.budget_app.get_transaction_counts()
-            self.update_payee_combo()
-
-            if hasattr(self, 'balance_tab_widget'):
-                self.balance_tab_widget.refresh_data()
+            if payee and payee not in known_payees:
+                self.update_payee_combo()
         else:
             self.show_status('Error adding transaction', error=True)
 
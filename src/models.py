@@ -1,9 +1,27 @@
 import sys
 import os
 import time
+import threading
+import copy
 import duckdb
+import numpy as np
 from datetime import datetime, date, timedelta
 
+from connection_pool import ConnectionPool, registered_columns
+from rate_index import RateIndex
+from net_worth import NetWorthEngine
+from investment_gains import InvestmentGainsEngine
+import balance_ledger
+import schema
+from reference_cache import ReferenceDataCache
+from query_cache import QueryCache, memoized
+from aggregate_cache import AggregateCache
+from change_bus import ChangeBus, ChangeEvent
+from transaction_frame import TransactionFrame, TRANSACTION_SELECT
+import payee_index
+import transaction_counts
+import investment_inputs
+
 
 
 class Transaction:
@@ -50,7 +68,12 @@ class Category:
 
 
 class BudgetApp:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, progress_callback=None):
+        """
+        Open (creating or upgrading if needed) the database at db_path.
+        progress_callback(percent, message), if given, is called as each
+        start-up stage begins; it may be called from a worker thread.
+        """
         if db_path is None:
             if getattr(sys, 'frozen', False):
                 application_path = os.path.dirname(sys.executable)
@@ -62,6 +85,18 @@ class BudgetApp:
         self.db_path = db_path
 
         self._anchor_conn = None
+        self._rate_index = None
+        self._rate_index_lock = threading.Lock()
+        self._ref_cache = ReferenceDataCache(self._load_accounts, self._load_categories)
+        self._query_cache = QueryCache()
+        self.aggregate_cache = AggregateCache(
+            os.path.splitext(self.db_path)[0] + '.cache', self.get_data_fingerprint)
+        self.changes = ChangeBus()
+        self._payee_index = payee_index.PayeeIndex(self._load_payee_rows, self._ref_cache.category)
+        self._transaction_counts = transaction_counts.TransactionCounts(
+            self._load_count_rows, self._ref_cache.category)
+        if progress_callback:
+            progress_callback(10, "Opening database...")
         max_retries = 5
         for attempt in range(max_retries):
             try:
@@ -70,18 +105,32 @@ class BudgetApp:
             except Exception as e:
                 if attempt < max_retries - 1:
                     print(f"Database locked, retrying in 1s... ({attempt+1}/{max_retries})")
+                    if progress_callback:
+                        progress_callback(10, f"Database locked, retrying... ({attempt+1}/{max_retries})")
                     time.sleep(1.0)
                 else:
                     print(f"Failed to acquire DB lock after {max_retries} attempts: {e}")
                     raise e
 
-        self.init_database()
-        self.update_database_schema()
-        self.get_or_create_starting_balance_account()
+        self._pool = ConnectionPool(self._anchor_conn, self.db_path)
+
+        if progress_callback:
+            progress_callback(30, "Checking database schema...")
+        self.migrate_schema()
+        if progress_callback:
+            progress_callback(45, "Checking account balances...")
+        self._ensure_balance_ledger()
+        self._ref_cache.invalidate()
+        self._query_cache.invalidate()
+        if progress_callback:
+            progress_callback(60, "Indexing payees and categories...")
+        self._payee_index.load()
+        self._transaction_counts.load()
 
     def close(self):
         """Explicitly close the anchor connection to release the file lock."""
         try:
+            self._pool.close()
             if self._anchor_conn:
                 self._anchor_conn.close()
                 self._anchor_conn = None
@@ -89,112 +138,53 @@ class BudgetApp:
             print(f"Error closing anchor connection: {e}")
 
     def _get_connection(self):
-        return duckdb.connect(self.db_path)
+        return self._pool.acquire()
 
-    def init_database(self):
-        conn = self._get_connection()
-        try:
-            try:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS accounts (
-                        id INTEGER PRIMARY KEY,
-                        account VARCHAR NOT NULL,
-                        type VARCHAR NOT NULL,
-                        company VARCHAR,
-                        currency VARCHAR DEFAULT 'CHF',
-                        is_investment BOOLEAN DEFAULT FALSE
-                    )
-                """)
-            except Exception as e:
-                print(f"Error creating accounts table: {e}")
-
-            try:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS categories (
-                        id INTEGER PRIMARY KEY,
-                        sub_category VARCHAR NOT NULL,
-                        category VARCHAR NOT NULL,
-                        category_type VARCHAR DEFAULT 'Expense',
-                        UNIQUE(sub_category, category, category_type)
-                    )
-                """)
-            except Exception as e:
-                print(f"Error creating categories table: {e}")
+    def get_pool_stats(self) -> dict:
+        """Connection pool counters (cursors created/reused, open cursors, hit ratio)."""
+        return self._pool.stats()
 
-            try:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS transactions (
-                        id INTEGER PRIMARY KEY,
-                        date DATE NOT NULL,
-                        type VARCHAR NOT NULL,
-                        amount DECIMAL(10, 2),
-                        account_id INTEGER,
-                        category_id INTEGER,
-                        payee VARCHAR,
-                        notes TEXT,
-                        invest_account_id INTEGER,
-                        qty DECIMAL(10, 4),
-                        to_account_id INTEGER,
-                        to_amount DECIMAL(10, 2),
-                        confirmed BOOLEAN DEFAULT FALSE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                        FOREIGN KEY (account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (to_account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (invest_account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (category_id) REFERENCES categories(id)
-                    )
-                """)
-            except Exception as e:
+    def get_query_cache_stats(self) -> dict:
+        """Read cache counters (hits, misses, evictions, entries, hit ratio)."""
+        return self._query_cache.stats()
 
-                pass
+    def get_data_fingerprint(self, tables) -> tuple:
+        """
+        Content fingerprint of tables: (table, row count, XOR of the row hashes)
+        per table. Equal fingerprints mean unchanged data, also across restarts.
+        """
+        tables = tuple(sorted(tables))
 
+        def compute(tables):
+            conn = self._get_connection()
             try:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS budgets (
-                        category_id INTEGER PRIMARY KEY,
-                        budget_amount DECIMAL(10, 2) NOT NULL,
-                        FOREIGN KEY (category_id) REFERENCES categories(id)
-                    )
-                """)
-            except Exception as e:
+                query = " UNION ALL ".join(
+                    f"SELECT '{table}', COUNT(*), COALESCE(BIT_XOR(HASH(t)), 0) FROM {table} t"
+                    for table in tables)
+                rows = conn.execute(query).fetchall()
+            finally:
+                conn.close()
+            return tuple(sorted((table, int(count), int(digest)) for table, count, digest in rows))
 
-                pass
+        # Kept in the query cache until one of the tables is written.
+        return self._query_cache.call('get_data_fingerprint', tables, compute, (tables,), {})
 
-            try:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS exchange_rates (
-                        id INTEGER PRIMARY KEY,
-                        date DATE NOT NULL,
-                        currency VARCHAR NOT NULL,
-                        rate DECIMAL(10, 6) NOT NULL,
-                        UNIQUE(date, currency)
-                    )
-                """)
-            except Exception as e:
-                print(f"Error creating exchange_rates table: {e}")
-
-            try:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS investment_valuations (
-                        id INTEGER PRIMARY KEY,
-                        date DATE NOT NULL,
-                        account_id INTEGER NOT NULL,
-                        value DECIMAL(12, 4) NOT NULL,
-                        FOREIGN KEY (account_id) REFERENCES accounts(id),
-                        UNIQUE(date, account_id)
-                    )
-                """)
-            except Exception as e:
-                print(f"Error creating investment_valuations table: {e}")
+    def _notify_change(self, *tables, account_ids=None, start_date=None, end_date=None):
+        """Invalidate cached reads of tables and publish the committed change on self.changes."""
+        self._query_cache.invalidate(*tables)
+        self.changes.publish(ChangeEvent(tables, account_ids, start_date, end_date))
 
-            conn.close()
+    def migrate_schema(self):
+        """Create or upgrade the database schema; see schema.MIGRATIONS."""
+        conn = self._get_connection()
+        try:
+            schema.migrate(conn)
         except Exception as e:
-            print(f"Database initialization error: {e}")
-            try:
-                conn.close()
-            except:
-                pass
+            print(f"Error updating database schema: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            conn.close()
 
     def get_exchange_rates(self):
         conn = self._get_connection()
@@ -207,50 +197,110 @@ class BudgetApp:
         return self.add_exchange_rates_bulk([(date, currency, rate)]) is True
 
     def get_predicted_category(self, payee: str):
-        conn = self._get_connection()
         try:
-            result = conn.execute("""
-                SELECT c.category, c.sub_category
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                WHERE t.payee = ?
-                GROUP BY c.category, c.sub_category
-                ORDER BY COUNT(*) DESC, MAX(t.date) DESC
-                LIMIT 1
-            """, [payee]).fetchone()
-            return result
+            return self._payee_index.predict(payee)
         except Exception as e:
             print(f"Error predicting category: {e}")
             return None
+
+    def get_payee_suggestions(self, prefix: str, limit: int = 10) -> list:
+        """Known payees starting with prefix, most used first."""
+        try:
+            return self._payee_index.suggest(prefix, limit)
+        except Exception as e:
+            print(f"Error suggesting payees: {e}")
+            return []
+
+    def _load_payee_rows(self):
+        conn = self._get_connection()
+        try:
+            return conn.execute("""
+                SELECT payee, category_id, CAST(date - DATE '1970-01-01' AS BIGINT), COUNT(*)
+                FROM transactions
+                WHERE payee IS NOT NULL AND payee != '' AND category_id IS NOT NULL
+                GROUP BY payee, category_id, date
+            """).fetchall()
         finally:
             conn.close()
 
+    # Transaction fields read by the in-memory payee index and transaction counts.
+    _INDEX_FIELDS = payee_index.PAYEE_FIELDS | transaction_counts.COUNT_FIELDS
+
+    def _index_rows(self, conn, trans_ids, fields=None):
+        """
+        (payee, category_id, day, account_id, to_account_id) rows of trans_ids for the
+        in-memory indexes, or [] when the edited fields cannot affect them.
+        """
+        if not trans_ids or (fields is not None and not self._INDEX_FIELDS & set(fields)):
+            return []
+        query = """
+            SELECT payee, category_id, CAST(date - DATE '1970-01-01' AS BIGINT),
+                account_id, to_account_id
+            FROM transactions
+            WHERE {}
+        """
+        if len(trans_ids) == 1:
+            return conn.execute(query.format("id = ?"), [trans_ids[0]]).fetchall()
+        with registered_columns(conn, '_index_ids', {'id': np.asarray(trans_ids, dtype=np.int64)}):
+            return conn.execute(query.format("id IN (SELECT id FROM _index_ids)")).fetchall()
+
+    def _apply_index_rows(self, removed=(), added=()):
+        """Apply committed transaction changes to the payee index, transaction counts and read cache."""
+        for index in (self._payee_index, self._transaction_counts):
+            index.apply(removed, -1)
+            index.apply(added)
+
+        # Index rows are (payee, category_id, day, account_id, to_account_id); without
+        # them (edits of other fields) the change is published without a scope.
+        rows = list(removed) + list(added)
+        days = [row[2] for row in rows if row[2] is not None]
+        if not rows:
+            self._notify_change('transactions')
+            return
+        epoch = date(1970, 1, 1)
+        self._notify_change(
+            'transactions',
+            account_ids={acc for row in rows for acc in row[3:5] if acc is not None},
+            start_date=(epoch + timedelta(days=min(days))).isoformat() if days else None,
+            end_date=(epoch + timedelta(days=max(days))).isoformat() if days else None)
+
     def add_exchange_rates_bulk(self, rates_data: list):
         """
         Bulk add exchange rates efficiently.
         rates_data: list of tuples (date, currency, rate)
+        Rows identical to the stored rate are skipped, so re-saving an unchanged
+        matrix neither writes nor invalidates the rate index.
         """
         conn = self._get_connection()
         try:
+            existing = {
+                (d, c): float(r) for d, c, r in conn.execute(
+                    "SELECT strftime(date, '%Y-%m-%d'), currency, rate FROM exchange_rates").fetchall()
+            }
+
+            changed = []
+            for day, currency, rate in rates_data:
+                key = (str(day)[:10], currency)
+                if key in existing and abs(existing[key] - round(float(rate), 6)) < 1e-9:
+                    continue
+                changed.append((day, currency, rate))
+
+            if not changed:
+                return True
 
             new_id_res = conn.execute(
                 "SELECT COALESCE(MAX(id), 0) FROM exchange_rates").fetchone()
             current_max_id = new_id_res[0] if new_id_res else 0
 
-            for i, (date, currency, rate) in enumerate(rates_data):
-
-                pass
-
-            for i, (date, currency, rate) in enumerate(rates_data):
-
-                current_max_id += 1
-                conn.execute("""
-                    INSERT INTO exchange_rates (id, date, currency, rate)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT (date, currency) DO UPDATE SET rate = excluded.rate
-                """, (current_max_id, date, currency, rate))
+            conn.executemany("""
+                INSERT INTO exchange_rates (id, date, currency, rate)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (date, currency) DO UPDATE SET rate = excluded.rate
+            """, [(current_max_id + i + 1, day, currency, rate)
+                  for i, (day, currency, rate) in enumerate(changed)])
 
             conn.commit()
+            self._invalidate_rate_index([d for d, _, _ in changed])
             return True
         except Exception as e:
             print(f"Error adding exchange rates: {e}")
@@ -261,8 +311,11 @@ class BudgetApp:
     def delete_exchange_rate(self, rate_id: int):
         conn = self._get_connection()
         try:
-            conn.execute("DELETE FROM exchange_rates WHERE id = ?", (rate_id,))
+            deleted = conn.execute(
+                "DELETE FROM exchange_rates WHERE id = ?", (rate_id,)).fetchone()[0]
             conn.commit()
+            if deleted:
+                self._invalidate_rate_index()
             return True
         except Exception as e:
             print(f"Error deleting exchange rate: {e}")
@@ -280,10 +333,34 @@ class BudgetApp:
 
         conn = self._get_connection()
         try:
-            for date, currency in rates_data:
-                conn.execute(
-                    "DELETE FROM exchange_rates WHERE date = ? AND currency = ?", (date, currency))
+            deleted = 0
+            for day, currency in rates_data:
+                deleted += conn.execute(
+                    "DELETE FROM exchange_rates WHERE date = ? AND currency = ?", (day, currency)).fetchone()[0]
+            conn.commit()
+            if deleted:
+                self._invalidate_rate_index([d for d, _ in rates_data])
+            return True
+        except Exception as e:
+            print(f"Error deleting exchange rates: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def delete_exchange_rates_for_dates(self, dates: list):
+        """Delete every currency's rate on the given dates (a whole matrix row)."""
+        if not dates:
+            return True
+
+        conn = self._get_connection()
+        try:
+            deleted = 0
+            for day in dates:
+                deleted += conn.execute(
+                    "DELETE FROM exchange_rates WHERE date = ?", (day,)).fetchone()[0]
             conn.commit()
+            if deleted:
+                self._invalidate_rate_index(dates)
             return True
         except Exception as e:
             print(f"Error deleting exchange rates: {e}")
@@ -291,6 +368,33 @@ class BudgetApp:
         finally:
             conn.close()
 
+    def get_rate_index(self) -> RateIndex:
+        """
+        Shared in-memory as-of index of all exchange rates.
+        Built on first use and kept until the rate tables are edited through BudgetApp.
+        """
+        index = self._rate_index
+        if index is not None:
+            return index
+
+        with self._rate_index_lock:
+            if self._rate_index is None:
+                conn = self._get_connection()
+                try:
+                    self._rate_index = RateIndex.from_connection(conn)
+                finally:
+                    conn.close()
+            return self._rate_index
+
+    def _invalidate_rate_index(self, dates=None):
+        """Drop the rate index after rates changed on dates (None: unknown)."""
+        with self._rate_index_lock:
+            self._rate_index = None
+        days = sorted(str(d)[:10] for d in dates) if dates else None
+        self._notify_change('exchange_rates',
+                            start_date=days[0] if days else None,
+                            end_date=days[-1] if days else None)
+
     def get_exchange_rate_for_date(self, currency: str, target_date: str = None):
         """
         Get the effective exchange rate for a currency at a specific date.
@@ -302,93 +406,39 @@ class BudgetApp:
         if target_date is None:
             target_date = datetime.now().strftime('%Y-%m-%d')
 
-        conn = self._get_connection()
-        try:
-
-            result = conn.execute("""
-                SELECT rate FROM exchange_rates
-                WHERE currency = ? AND date <= ?
-                ORDER BY date DESC
-                LIMIT 1
-            """, (currency, target_date)).fetchone()
-
-            if result:
-                return float(result[0])
-
-            result = conn.execute("""
-                SELECT rate FROM exchange_rates
-                WHERE currency = ?
-                ORDER BY date ASC
-                LIMIT 1
-            """, (currency,)).fetchone()
-
-            if result:
-                return float(result[0])
-
-            return 1.0
-        finally:
-            conn.close()
+        return self.get_rate_index().rate_at(currency, target_date)
 
     def get_exchange_rates_map(self, target_date: str = None) -> dict:
         """
         Get a dictionary of {currency: rate} for all known currencies at a specific date.
-        Efficient bulk fetch to avoid multiple DB connections.
         Ensures valid rates are taken up to the very end of the target_date (SCD2).
         """
         if target_date is None:
-            today = datetime.now().date()
-            target_date_str = today.strftime('%Y-%m-%d')
-
-            next_day_str = (today + timedelta(days=1)).strftime('%Y-%m-%d')
-        else:
-            target_date_str = target_date
-
-            try:
-                t_date = datetime.strptime(target_date, '%Y-%m-%d').date()
-                next_day = t_date + timedelta(days=1)
-                next_day_str = next_day.strftime('%Y-%m-%d')
-            except ValueError:
-
-                next_day_str = target_date_str
-
-        conn = self._get_connection()
-        try:
-
-            currencies = conn.execute(
-                "SELECT DISTINCT currency FROM exchange_rates").fetchall()
-            currencies = [c[0] for c in currencies]
-
-            rates_map = {'CHF': 1.0}
-
-            for curr in currencies:
-                if curr == 'CHF':
-                    continue
-
-                res = conn.execute("""
-                    SELECT rate FROM exchange_rates
-                    WHERE currency = ? AND date < ?
-                    ORDER BY date DESC
-                    LIMIT 1
-                """, (curr, next_day_str)).fetchone()
+            target_date = datetime.now().strftime('%Y-%m-%d')
 
-                if res:
-                    rates_map[curr] = float(res[0])
-                else:
+        return self.get_rate_index().rates_map(target_date)
 
-                    res = conn.execute("""
-                        SELECT rate FROM exchange_rates
-                        WHERE currency = ?
-                        ORDER BY date ASC
-                        LIMIT 1
-                    """, (curr,)).fetchone()
-                    if res:
-                        rates_map[curr] = float(res[0])
-                    else:
-                        rates_map[curr] = 1.0
+    def _fx_join_sql(self, currency_expr: str, date_expr: str, alias: str = 'fx') -> str:
+        """
+        Shared CHF conversion joins for set-based queries.
+        ASOF-joins the rate in effect at date_expr plus the currency's earliest rate,
+        so the matching {alias}_rate expression (see _fx_rate_sql) keeps SCD2 semantics:
+        earliest rate before history starts, 1.0 when the currency has no rates.
+        """
+        return f"""
+            ASOF LEFT JOIN exchange_rates {alias}
+                ON {alias}.currency = {currency_expr} AND {date_expr} >= {alias}.date
+            LEFT JOIN (
+                SELECT currency, arg_min(rate, date) AS rate
+                FROM exchange_rates
+                GROUP BY currency
+            ) {alias}_first ON {alias}_first.currency = {currency_expr}
+        """
 
-            return rates_map
-        finally:
-            conn.close()
+    def _fx_rate_sql(self, currency_expr: str, alias: str = 'fx') -> str:
+        """Rate expression paired with _fx_join_sql (CHF is always 1.0)."""
+        return (f"(CASE WHEN {currency_expr} = 'CHF' THEN 1.0 "
+                f"ELSE COALESCE({alias}.rate, {alias}_first.rate, 1.0) END)")
 
     def get_history_matrix_data(self):
         """
@@ -408,226 +458,6 @@ class BudgetApp:
         finally:
             conn.close()
 
-    def update_database_schema(self):
-        conn = self._get_connection()
-        try:
-
-            try:
-                tables = conn.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table'").fetchall()
-                table_names = [t[0] for t in tables]
-
-                if 'categories' not in table_names and 'categories_new' in table_names:
-                    print("Recovering categories table...")
-                    conn.execute(
-                        "ALTER TABLE categories_new RENAME TO categories")
-
-                if 'transactions' not in table_names and 'transactions_new' in table_names:
-                    print("Recovering transactions table...")
-                    conn.execute(
-                        "ALTER TABLE transactions_new RENAME TO transactions")
-
-                if 'budgets' not in table_names and 'budgets_new_schema' in table_names:
-                    print("Recovering budgets table...")
-                    conn.execute(
-                        "ALTER TABLE budgets_new_schema RENAME TO budgets")
-
-                if 'budgets' not in table_names and 'budgets_new' in table_names:
-                    print("Recovering budgets table (from budgets_new)...")
-                    conn.execute("ALTER TABLE budgets_new RENAME TO budgets")
-
-            except Exception as e:
-                print(f"Recovery check failed: {e}")
-
-            conn.execute("DROP TABLE IF EXISTS budgets_new_schema")
-            conn.execute("DROP TABLE IF EXISTS transactions_new")
-            conn.execute("DROP TABLE IF EXISTS categories_new")
-
-            conn.execute(
-                "ALTER TABLE accounts ADD COLUMN IF NOT EXISTS show_in_balance BOOLEAN DEFAULT TRUE")
-            conn.execute(
-                "ALTER TABLE accounts ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE")
-            conn.execute(
-                "ALTER TABLE accounts ADD COLUMN IF NOT EXISTS valuation_strategy VARCHAR DEFAULT NULL")
-            conn.execute(
-                "ALTER TABLE categories ADD COLUMN IF NOT EXISTS category_type VARCHAR DEFAULT 'Expense'")
-
-            columns_result = conn.execute(
-                "PRAGMA table_info(categories)").fetchall()
-            has_id = any(col[1] == 'id' for col in columns_result)
-
-            if not has_id:
-                print("Migrating categories to use ID as Primary Key...")
-
-                conn.execute("""
-                    CREATE TABLE categories_new (
-                        id INTEGER PRIMARY KEY,
-                        sub_category VARCHAR NOT NULL,
-                        category VARCHAR NOT NULL,
-                        category_type VARCHAR DEFAULT 'Expense',
-                        UNIQUE(sub_category, category, category_type)
-                    )
-                """)
-
-                conn.execute("""
-                    INSERT INTO categories_new (id, sub_category, category, category_type)
-                    SELECT row_number() OVER (), sub_category, category, category_type FROM categories
-                """)
-
-                conn.execute("""
-                    CREATE TABLE transactions_new (
-                        id INTEGER PRIMARY KEY,
-                        date DATE NOT NULL,
-                        type VARCHAR NOT NULL,
-                        amount DECIMAL(10, 2),
-                        account_id INTEGER,
-                        category_id INTEGER,
-                        payee VARCHAR,
-                        notes TEXT,
-                        invest_account_id INTEGER,
-                        qty DECIMAL(10, 4),
-                        to_account_id INTEGER,
-                        to_amount DECIMAL(10, 2),
-                        confirmed BOOLEAN DEFAULT FALSE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                        FOREIGN KEY (account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (to_account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (invest_account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (category_id) REFERENCES categories_new(id)
-                    )
-                """)
-
-                conn.execute("""
-                    INSERT INTO transactions_new (
-                        id, date, type, amount, account_id, category_id, payee, notes,
-                        invest_account_id, qty, to_account_id, to_amount, confirmed, created_at
-                    )
-                    SELECT
-                        t.id, t.date, t.type, t.amount, t.account_id, c.id, t.payee, t.notes,
-                        t.invest_account_id, t.qty, t.to_account_id, t.to_amount, t.confirmed, t.created_at
-                    FROM transactions t
-                    LEFT JOIN categories_new c ON t.sub_category = c.sub_category
-                """)
-
-                conn.execute("""
-                    CREATE TABLE budgets_new_schema (
-                        category_id INTEGER PRIMARY KEY,
-                        budget_amount DECIMAL(10, 2) NOT NULL,
-                        FOREIGN KEY (category_id) REFERENCES categories_new(id)
-                    )
-                """)
-
-                conn.execute("""
-                    INSERT INTO budgets_new_schema (category_id, budget_amount)
-                    SELECT c.id, b.budget_amount
-                    FROM budgets b
-                    JOIN categories_new c ON b.sub_category = c.sub_category
-                """)
-
-                print("Clearing data...")
-                conn.execute("DELETE FROM budgets")
-                conn.execute("DELETE FROM transactions")
-
-                print("Dropping budgets...")
-                conn.execute("DROP TABLE IF EXISTS budgets CASCADE")
-                conn.commit()
-
-                print("Dropping transactions...")
-                conn.execute("DROP TABLE IF EXISTS transactions CASCADE")
-                conn.commit()
-
-                print("Dropping categories...")
-                try:
-                    conn.execute("DROP TABLE IF EXISTS categories CASCADE")
-                    conn.commit()
-                except Exception as e:
-                    print(f"WARNING: Could not drop categories table: {e}")
-
-                conn.execute("DROP TABLE IF EXISTS budgets_new")
-
-                print("Recreating final tables...")
-
-                conn.execute("""
-                    CREATE TABLE categories (
-                        id INTEGER PRIMARY KEY,
-                        sub_category VARCHAR NOT NULL,
-                        category VARCHAR NOT NULL,
-                        category_type VARCHAR DEFAULT 'Expense',
-                        UNIQUE(sub_category, category, category_type)
-                    )
-                """)
-                conn.execute(
-                    "INSERT INTO categories SELECT * FROM categories_new")
-
-                conn.execute("""
-                    CREATE TABLE budgets (
-                        category_id INTEGER PRIMARY KEY,
-                        budget_amount DECIMAL(10, 2) NOT NULL,
-                        FOREIGN KEY (category_id) REFERENCES categories(id)
-                    )
-                """)
-                conn.execute(
-                    "INSERT INTO budgets SELECT * FROM budgets_new_schema")
-
-                conn.execute("""
-                    CREATE TABLE transactions (
-                        id INTEGER PRIMARY KEY,
-                        date DATE NOT NULL,
-                        type VARCHAR NOT NULL,
-                        amount DECIMAL(10, 2),
-                        account_id INTEGER,
-                        category_id INTEGER,
-                        payee VARCHAR,
-                        notes TEXT,
-                        invest_account_id INTEGER,
-                        qty DECIMAL(10, 4),
-                        to_account_id INTEGER,
-                        to_amount DECIMAL(10, 2),
-                        confirmed BOOLEAN DEFAULT FALSE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                        FOREIGN KEY (account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (to_account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (invest_account_id) REFERENCES accounts(id),
-                        FOREIGN KEY (category_id) REFERENCES categories(id)
-                    )
-                """)
-                conn.execute(
-                    "INSERT INTO transactions SELECT * FROM transactions_new")
-
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS exchange_rates (
-                        id INTEGER PRIMARY KEY,
-                        date DATE NOT NULL,
-                        currency VARCHAR NOT NULL,
-                        rate DECIMAL(10, 6) NOT NULL,
-                        UNIQUE(date, currency)
-                    )
-                """)
-
-                conn.execute("DROP TABLE IF EXISTS budgets_new_schema")
-                conn.execute("DROP TABLE IF EXISTS transactions_new")
-                conn.execute("DROP TABLE IF EXISTS categories_new")
-
-                print("Categories migration completed!")
-
-            result = conn.execute("""
-                SELECT name FROM sqlite_master
-                WHERE type='table' AND name='budgets'
-            """).fetchone()
-
-            if not result:
-                pass
-
-            conn.commit()
-        except Exception as e:
-            print(f"Error updating database schema: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            conn.close()
-
     def _get_next_id(self, table_name: str) -> int:
         conn = self._get_connection()
         try:
@@ -638,20 +468,20 @@ class BudgetApp:
             conn.close()
 
     def get_all_accounts(self, show_inactive=False):
-        conn = self._get_connection()
         try:
+            return self._ref_cache.accounts(show_inactive)
+        except Exception as e:
+            print(f"Error getting accounts: {e}")
+            return []
 
-            query = """
+    def _load_accounts(self):
+        conn = self._get_connection()
+        try:
+            result = conn.execute("""
                 SELECT id, account, type, company, currency, show_in_balance, is_active, is_investment, valuation_strategy
                 FROM accounts
-            """
-            
-            if not show_inactive:
-                query += " WHERE is_active = 1"
-            
-            query += " ORDER BY id"
-
-            result = conn.execute(query).fetchall()
+                ORDER BY id
+            """).fetchall()
 
             accounts = []
             for row in result:
@@ -666,12 +496,13 @@ class BudgetApp:
                 account.valuation_strategy = row[8] if len(row) > 8 else None
                 accounts.append(account)
             return accounts
-        except Exception as e:
-            print(f"Error getting accounts: {e}")
-            return []
         finally:
             conn.close()
 
+    def get_reference_data_version(self) -> int:
+        """Bumped whenever accounts or categories change through BudgetApp."""
+        return self._ref_cache.version
+
     def add_account(self, account_name, account_type, company, currency, show_in_balance=True, is_active=True, is_investment=False, valuation_strategy=None):
         conn = self._get_connection()
         try:
@@ -696,6 +527,8 @@ class BudgetApp:
             return False, str(e)
         finally:
             conn.close()
+            self._ref_cache.invalidate('accounts')
+            self._notify_change('accounts')
 
     def update_account(self, account_id: int, account: str, type: str,
                        company: str = None, currency: str = 'CHF', is_investment: bool = False, valuation_strategy: str = None):
@@ -713,6 +546,8 @@ class BudgetApp:
             return False
         finally:
             conn.close()
+            self._ref_cache.invalidate('accounts')
+            self._notify_change('accounts', account_ids=[account_id])
 
     def update_account_show_in_balance(self, account_id, show_in_balance):
         conn = self._get_connection()
@@ -729,6 +564,8 @@ class BudgetApp:
             return False
         finally:
             conn.close()
+            self._ref_cache.invalidate('accounts')
+            self._notify_change('accounts', account_ids=[account_id])
 
     def update_account_active(self, account_id, is_active):
         conn = self._get_connection()
@@ -745,6 +582,8 @@ class BudgetApp:
             return False
         finally:
             conn.close()
+            self._ref_cache.invalidate('accounts')
+            self._notify_change('accounts', account_ids=[account_id])
 
     def update_account_id(self, old_id: int, new_id: int):
         conn = self._get_connection()
@@ -775,6 +614,8 @@ class BudgetApp:
                 "UPDATE transactions SET invest_account_id = ? WHERE invest_account_id = ?", (new_id, old_id))
 
             conn.execute("DELETE FROM accounts WHERE id = ?", [old_id])
+            conn.execute(
+                "UPDATE account_daily_balance SET account_id = ? WHERE account_id = ?", (new_id, old_id))
 
             conn.commit()
             return True, "Account ID updated successfully."
@@ -787,6 +628,9 @@ class BudgetApp:
             return False, str(e)
         finally:
             conn.close()
+            self._ref_cache.invalidate('accounts')
+            self._notify_change('accounts', 'transactions', account_ids=[old_id, new_id])
+            self._transaction_counts.invalidate()
 
     def delete_account(self, account_id: int):
         conn = self._get_connection()
@@ -807,8 +651,17 @@ class BudgetApp:
             return False, str(e)
         finally:
             conn.close()
+            self._ref_cache.invalidate('accounts')
+            self._notify_change('accounts', account_ids=[account_id])
 
     def get_all_categories(self):
+        try:
+            return self._ref_cache.categories()
+        except Exception as e:
+            print(f"Error getting categories: {e}")
+            return []
+
+    def _load_categories(self):
         conn = self._get_connection()
         try:
             result = conn.execute("""
@@ -817,9 +670,6 @@ class BudgetApp:
                 ORDER BY category, sub_category
             """).fetchall()
             return [Category(*row) for row in result]
-        except Exception as e:
-            print(f"Error getting categories: {e}")
-            return []
         finally:
             conn.close()
 
@@ -843,6 +693,8 @@ class BudgetApp:
             return False, str(e)
         finally:
             conn.close()
+            self._ref_cache.invalidate('categories')
+            self._notify_change('categories', 'budgets')
 
     def add_category(self, sub_category: str, category: str, category_type: str = "Expense"):
         cat_id = self._get_next_id('categories')
@@ -865,6 +717,8 @@ class BudgetApp:
             return False
         finally:
             conn.close()
+            self._ref_cache.invalidate('categories')
+            self._notify_change('categories')
 
     def update_category(self, cat_id: int, new_category: str = None, new_type: str = None, new_sub_category: str = None):
         conn = self._get_connection()
@@ -910,6 +764,10 @@ class BudgetApp:
             return False
         finally:
             conn.close()
+            self._ref_cache.invalidate('categories')
+            self._notify_change('categories')
+            self._payee_index.invalidate()
+            self._transaction_counts.invalidate()
 
     def add_income(self, date: str, amount: float, account_id: int,
                    payee: str = "", sub_category: str = "",
@@ -918,19 +776,23 @@ class BudgetApp:
         conn = self._get_connection()
         try:
 
-            cat_row = conn.execute("SELECT id FROM categories WHERE sub_category = ?", [
-                                   sub_category]).fetchone()
-            category_id = cat_row[0] if cat_row else None
+            category = self._ref_cache.category_by_sub(sub_category)
+            category_id = category.id if category else None
 
+            conn.execute("BEGIN TRANSACTION")
             conn.execute("""
                 INSERT INTO transactions
                 (id, date, type, amount, account_id, payee, category_id, notes, invest_account_id)
                 VALUES (?, ?, 'income', ?, ?, ?, ?, ?, ?)
             """, [trans_id, date, amount, account_id, payee, category_id, notes, invest_account_id])
+            balance_ledger.apply_transactions(conn, [trans_id])
+            added = self._index_rows(conn, [trans_id])
             conn.commit()
+            self._apply_index_rows(added=added)
             return True
         except Exception as e:
             print(f"Error adding income: {e}")
+            self._rollback_quietly(conn)
             return False
         finally:
             conn.close()
@@ -941,19 +803,23 @@ class BudgetApp:
         conn = self._get_connection()
         try:
 
-            cat_row = conn.execute("SELECT id FROM categories WHERE sub_category = ?", [
-                                   sub_category]).fetchone()
-            category_id = cat_row[0] if cat_row else None
+            category = self._ref_cache.category_by_sub(sub_category)
+            category_id = category.id if category else None
 
+            conn.execute("BEGIN TRANSACTION")
             conn.execute("""
                 INSERT INTO transactions
                 (id, date, type, amount, account_id, category_id, payee, notes, invest_account_id)
                 VALUES (?, ?, 'expense', ?, ?, ?, ?, ?, ?)
             """, [trans_id, date, amount, account_id, category_id, payee, notes, invest_account_id])
+            balance_ledger.apply_transactions(conn, [trans_id])
+            added = self._index_rows(conn, [trans_id])
             conn.commit()
+            self._apply_index_rows(added=added)
             return True
         except Exception as e:
             print(f"Error adding expense: {e}")
+            self._rollback_quietly(conn)
             return False
         finally:
             conn.close()
@@ -983,15 +849,20 @@ class BudgetApp:
             if from_account_id == 0 or to_account_id == 0:
                 self.get_or_create_starting_balance_account()
 
+            conn.execute("BEGIN TRANSACTION")
             conn.execute("""
                 INSERT INTO transactions
                 (id, date, type, account_id, to_account_id, amount, to_amount, qty, notes)
                 VALUES (?, ?, 'transfer', ?, ?, ?, ?, ?, ?)
             """, [trans_id, date, from_account_id, to_account_id, from_amount, to_amount, qty, notes])
+            balance_ledger.apply_transactions(conn, [trans_id])
+            added = self._index_rows(conn, [trans_id])
             conn.commit()
+            self._apply_index_rows(added=added)
             return True
         except Exception as e:
             print(f"Error adding transfer: {e}")
+            self._rollback_quietly(conn)
             return False
         finally:
             conn.close()
@@ -1012,6 +883,8 @@ class BudgetApp:
                     VALUES (0, 'Starting Balance', 'System', 'System', 'MULTI', FALSE)
                 """)
                 conn.commit()
+                self._ref_cache.invalidate('accounts')
+                self._notify_change('accounts')
                 return Account(0, 'Starting Balance', 'System', 'System', 'MULTI', False)
         except Exception as e:
             print(f"Error getting starting balance account: {e}")
@@ -1022,32 +895,19 @@ class BudgetApp:
     def get_all_transactions(self):
         conn = self._get_connection()
         try:
-            result = conn.execute("""
-                SELECT t.id, t.date, t.type, c.sub_category, t.amount, t.account_id,
-                    t.payee, t.notes, t.invest_account_id, t.qty, t.to_account_id,
-                    t.to_amount, t.confirmed
+            data = conn.execute(f"""
+                SELECT {TRANSACTION_SELECT}
                 FROM transactions t
                 LEFT JOIN categories c ON t.category_id = c.id
                 ORDER BY t.date DESC, t.id DESC
-            """).fetchall()
+            """).fetchnumpy()
 
-            transactions = []
-            for row in result:
-                trans = Transaction(
-                    trans_id=row[0], date=row[1], type=row[2],
-                    sub_category=row[3], amount=row[4], account_id=row[5],
-                    payee=row[6], notes=row[7], invest_account_id=row[8],
-                    qty=row[9], to_account_id=row[10], to_amount=row[11],
-                    confirmed=row[12]
-                )
-                transactions.append(trans)
-
-            return transactions
+            return TransactionFrame.from_numpy(data)
         except Exception as e:
             print(f"Error getting transactions: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return TransactionFrame.empty()
         finally:
             conn.close()
 
@@ -1063,12 +923,23 @@ class BudgetApp:
 
             values.append(trans_id)
 
+            moves_balance = bool(balance_ledger.BALANCE_FIELDS & set(kwargs))
+
+            conn.execute("BEGIN TRANSACTION")
+            if moves_balance:
+                balance_ledger.apply_transactions(conn, [trans_id], -1)
+            removed = self._index_rows(conn, [trans_id], kwargs)
             query = f"UPDATE transactions SET {', '.join(set_clause)} WHERE id = ?"
             conn.execute(query, values)
+            if moves_balance:
+                balance_ledger.apply_transactions(conn, [trans_id])
+            added = self._index_rows(conn, [trans_id], kwargs)
             conn.commit()
+            self._apply_index_rows(removed, added)
             return True
         except Exception as e:
             print(f"Error updating transaction: {e}")
+            self._rollback_quietly(conn)
             return False
         finally:
             conn.close()
@@ -1076,8 +947,15 @@ class BudgetApp:
     def delete_transaction(self, trans_id: int):
         conn = self._get_connection()
         try:
+            conn.execute("BEGIN TRANSACTION")
+            balance_ledger.apply_transactions(conn, [trans_id], -1)
+            removed = self._index_rows(conn, [trans_id])
             conn.execute("DELETE FROM transactions WHERE id = ?", [trans_id])
             conn.commit()
+            self._apply_index_rows(removed)
+        except Exception:
+            self._rollback_quietly(conn)
+            raise
         finally:
             conn.close()
 
@@ -1090,9 +968,246 @@ class BudgetApp:
                 WHERE id = ?
             """, [trans_id])
             conn.commit()
+            self._notify_change('transactions')
+        finally:
+            conn.close()
+
+    # SQL types of the transaction columns the bulk API can write.
+    _TRANSACTION_FIELD_TYPES = {
+        'date': 'DATE', 'type': 'VARCHAR', 'amount': 'DECIMAL(10, 2)',
+        'account_id': 'INTEGER', 'category_id': 'INTEGER', 'payee': 'VARCHAR',
+        'notes': 'VARCHAR', 'invest_account_id': 'INTEGER', 'qty': 'DECIMAL(10, 4)',
+        'to_account_id': 'INTEGER', 'to_amount': 'DECIMAL(10, 2)', 'confirmed': 'BOOLEAN',
+    }
+
+    def _transaction_columns(self, ids: list, values: dict):
+        """
+        NumPy columns (for registered_columns) and matching SELECT expressions
+        for bulk writes. values maps field name -> list of values aligned with ids.
+        """
+        columns = {'id': np.asarray(ids, dtype=np.int64)}
+        selects = {}
+        for field, vals in values.items():
+            sql_type = self._TRANSACTION_FIELD_TYPES[field]
+            if sql_type == 'BOOLEAN':
+                columns[field] = np.array([bool(v) for v in vals])
+                selects[field] = field
+            elif sql_type in ('DATE', 'VARCHAR'):
+                columns[field] = np.array(["" if v is None else str(v) for v in vals])
+                columns[f"{field}__null"] = np.array([v is None for v in vals])
+                selects[field] = f"CASE WHEN {field}__null THEN NULL ELSE CAST({field} AS {sql_type}) END"
+            else:
+                # NaN reads as NULL through the registered view.
+                columns[field] = np.array(
+                    [np.nan if v is None else float(v) for v in vals], dtype=np.float64)
+                selects[field] = f"CAST({field} AS {sql_type})"
+        return columns, selects
+
+    def add_transactions_bulk(self, transactions: list):
+        """
+        Insert many transactions in one database transaction.
+        Each item is a dict with the add_transaction fields: date, type, amount,
+        account_id and optionally sub_category, payee, notes, invest_account_id,
+        qty, to_account_id, to_amount, confirmed.
+        Returns the list of new ids, or None if nothing was inserted.
+        """
+        if not transactions:
+            return []
+
+        values = {field: [] for field in self._TRANSACTION_FIELD_TYPES}
+        uses_starting_balance = False
+        for tx in transactions:
+            t_type = tx['type'].lower()
+            if t_type not in ('income', 'expense', 'transfer'):
+                print(f"Error adding transactions: unknown type '{tx['type']}'")
+                return None
+
+            category_id = None
+            if t_type != 'transfer' and tx.get('sub_category'):
+                category = self._ref_cache.category_by_sub(tx['sub_category'])
+                category_id = category.id if category else None
+
+            to_amount = tx.get('to_amount')
+            if t_type == 'transfer':
+                if to_amount is None:
+                    to_amount = tx.get('amount')
+                if tx.get('account_id') == 0 or tx.get('to_account_id') == 0:
+                    uses_starting_balance = True
+
+            row = dict(tx, type=t_type, category_id=category_id, to_amount=to_amount,
+                       confirmed=bool(tx.get('confirmed', False)))
+            if t_type != 'transfer':
+                row.setdefault('payee', "")
+            row.setdefault('notes', "")
+            for field in values:
+                values[field].append(row.get(field))
+
+        if uses_starting_balance:
+            self.get_or_create_starting_balance_account()
+
+        next_id = self._get_next_id('transactions')
+        new_ids = list(range(next_id, next_id + len(transactions)))
+        columns, selects = self._transaction_columns(new_ids, values)
+
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            with registered_columns(conn, '_bulk_transactions', columns):
+                conn.execute(f"""
+                    INSERT INTO transactions (id, {', '.join(selects)})
+                    SELECT id, {', '.join(selects.values())}
+                    FROM _bulk_transactions
+                    ORDER BY id
+                """)
+            balance_ledger.apply_transactions(conn, new_ids)
+            added = self._index_rows(conn, new_ids)
+            conn.commit()
+            self._apply_index_rows(added=added)
+            return new_ids
+        except Exception as e:
+            print(f"Error adding transactions: {e}")
+            self._rollback_quietly(conn)
+            return None
+        finally:
+            conn.close()
+
+    def update_transactions_bulk(self, updates: list):
+        """
+        Apply many update_transaction style edits in one database transaction.
+        updates: [(trans_id, {field: value, ...}), ...]
+        Edits touching the same set of fields are written with one UPDATE ... FROM.
+        """
+        groups = {}
+        for trans_id, fields in updates:
+            if fields:
+                groups.setdefault(tuple(sorted(fields)), []).append((trans_id, fields))
+        if not groups:
+            return True
+
+        balance_ids = [trans_id for keys, group in groups.items()
+                       if balance_ledger.BALANCE_FIELDS & set(keys)
+                       for trans_id, _ in group]
+        index_ids = [trans_id for keys, group in groups.items()
+                     if self._INDEX_FIELDS & set(keys)
+                     for trans_id, _ in group]
+
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            balance_ledger.apply_transactions(conn, balance_ids, -1)
+            removed = self._index_rows(conn, index_ids)
+            for keys, group in groups.items():
+                columns, selects = self._transaction_columns(
+                    [trans_id for trans_id, _ in group],
+                    {key: [fields[key] for _, fields in group] for key in keys})
+                set_clause = ', '.join(f"{key} = u.{key}" for key in keys)
+                with registered_columns(conn, '_bulk_updates', columns):
+                    conn.execute(f"""
+                        UPDATE transactions SET {set_clause}
+                        FROM (
+                            SELECT id, {', '.join(f"{expr} AS {key}" for key, expr in selects.items())}
+                            FROM _bulk_updates
+                        ) u
+                        WHERE transactions.id = u.id
+                    """)
+            balance_ledger.apply_transactions(conn, balance_ids)
+            added = self._index_rows(conn, index_ids)
+            conn.commit()
+            self._apply_index_rows(removed, added)
+            return True
+        except Exception as e:
+            print(f"Error updating transactions: {e}")
+            self._rollback_quietly(conn)
+            return False
+        finally:
+            conn.close()
+
+    def delete_transactions_bulk(self, trans_ids: list):
+        """Delete many transactions in one database transaction."""
+        if not trans_ids:
+            return True
+
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            balance_ledger.apply_transactions(conn, trans_ids, -1)
+            removed = self._index_rows(conn, trans_ids)
+            with registered_columns(conn, '_bulk_ids', {'id': np.asarray(trans_ids, dtype=np.int64)}):
+                conn.execute(
+                    "DELETE FROM transactions WHERE id IN (SELECT id FROM _bulk_ids)")
+            conn.commit()
+            self._apply_index_rows(removed)
+            return True
+        except Exception as e:
+            print(f"Error deleting transactions: {e}")
+            self._rollback_quietly(conn)
+            return False
+        finally:
+            conn.close()
+
+    def set_confirmed_bulk(self, trans_ids: list, value: bool = True):
+        """Set the confirmed flag of many transactions with a single UPDATE."""
+        if not trans_ids:
+            return True
+
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            with registered_columns(conn, '_bulk_ids', {'id': np.asarray(trans_ids, dtype=np.int64)}):
+                conn.execute(
+                    "UPDATE transactions SET confirmed = ? WHERE id IN (SELECT id FROM _bulk_ids)",
+                    [bool(value)])
+            conn.commit()
+            self._notify_change('transactions')
+            return True
+        except Exception as e:
+            print(f"Error confirming transactions: {e}")
+            self._rollback_quietly(conn)
+            return False
+        finally:
+            conn.close()
+
+    def _ensure_balance_ledger(self):
+        """Rebuild the account_daily_balance ledger if it is stale."""
+        conn = self._get_connection()
+        try:
+            if not balance_ledger.is_consistent(conn):
+                print("Rebuilding account balance ledger...")
+                self.rebuild_balance_ledger()
+        except Exception as e:
+            print(f"Error checking balance ledger: {e}")
+        finally:
+            conn.close()
+
+    def rebuild_balance_ledger(self) -> int:
+        """Recompute account_daily_balance from all transactions. Returns the row count."""
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            rows = balance_ledger.rebuild(conn)
+            conn.commit()
+            return rows
+        except Exception as e:
+            print(f"Error rebuilding balance ledger: {e}")
+            self._rollback_quietly(conn)
+            return 0
+        finally:
+            conn.close()
+
+    def verify_balance_ledger(self) -> list:
+        """Rows where account_daily_balance differs from a fresh computation (empty if correct)."""
+        conn = self._get_connection()
+        try:
+            return balance_ledger.verify(conn)
         finally:
             conn.close()
 
+    def _rollback_quietly(self, conn):
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
     def get_balance_summary(self, target_date: str = None):
         conn = self._get_connection()
         try:
@@ -1108,46 +1223,7 @@ class BudgetApp:
                     'is_investment': getattr(account, 'is_investment', False)
                 }
      
-            date_filter = ""
-            params = []
-            if target_date:
-                date_filter = " AND date <= ?"
-                params = [target_date, target_date, target_date, target_date]
-
-            query = f"""
-                SELECT 
-                    account_id, 
-                    SUM(balance_change), 
-                    SUM(qty_in), 
-                    SUM(qty_out), 
-                    SUM(cnt) 
-                FROM (
-                    -- Income: +amount, +qty, count=1
-                    SELECT account_id, COALESCE(amount, 0) as balance_change, COALESCE(qty, 0) as qty_in, 0.0 as qty_out, 1 as cnt 
-                    FROM transactions WHERE type='income' AND account_id IS NOT NULL {date_filter}
-                    
-                    UNION ALL
-                    
-                    -- Expense: -amount, qty_out=qty (potentially), count=1
-                    SELECT account_id, -COALESCE(amount, 0), 0.0, COALESCE(qty, 0), 1 
-                    FROM transactions WHERE type='expense' AND account_id IS NOT NULL {date_filter}
-                    
-                    UNION ALL
-                    
-                    -- Transfer Out: -amount, qty_out=qty (potentially), count=1
-                    SELECT account_id, -COALESCE(amount, 0), 0.0, COALESCE(qty, 0), 1 
-                    FROM transactions WHERE type='transfer' AND account_id IS NOT NULL {date_filter}
-                    
-                    UNION ALL
-                    
-                    -- Transfer In: +to_amount, +qty, count=1
-                    SELECT to_account_id, COALESCE(to_amount, 0), COALESCE(qty, 0), 0.0, 1 
-                    FROM transactions WHERE type='transfer' AND to_account_id IS NOT NULL {date_filter}
-                ) 
-                GROUP BY account_id
-            """
-            
-            results = conn.execute(query, params).fetchall()
+            results = balance_ledger.balances_at(conn, target_date)
 
             for row in results:
                 acc_id = row[0]
@@ -1174,6 +1250,7 @@ class BudgetApp:
         finally:
             conn.close()
 
+    @memoized('transactions', 'categories', copy_result=TransactionFrame.copy)
     def get_transactions_by_month(self, year: int, month: int):
         conn = self._get_connection()
         try:
@@ -1189,104 +1266,42 @@ class BudgetApp:
                 else:
                     end_date = f"{year}-{month+1:02d}-01"
 
-            result = conn.execute("""
-                SELECT t.id, t.date, t.type, c.sub_category, t.amount, t.account_id,
-                    t.payee, t.notes, t.invest_account_id, t.qty, t.to_account_id,
-                    t.to_amount, t.confirmed
+            data = conn.execute(f"""
+                SELECT {TRANSACTION_SELECT}
                 FROM transactions t
                 LEFT JOIN categories c ON t.category_id = c.id
                 WHERE t.date >= ? AND t.date < ?
                 ORDER BY t.date DESC, t.id DESC
-            """, [start_date, end_date]).fetchall()
+            """, [start_date, end_date]).fetchnumpy()
 
-            transactions = []
-            for row in result:
-                trans = Transaction(
-                    trans_id=row[0], date=row[1], type=row[2],
-                    sub_category=row[3], amount=row[4], account_id=row[5],
-                    payee=row[6], notes=row[7], invest_account_id=row[8],
-                    qty=row[9], to_account_id=row[10], to_amount=row[11],
-                    confirmed=row[12]
-                )
-                transactions.append(trans)
-
-            return transactions
+            return TransactionFrame.from_numpy(data)
         except Exception as e:
             print(f"Error getting transactions by month: {e}")
-            return []
+            return TransactionFrame.empty()
         finally:
             conn.close()
 
     def get_account_currency(self, account_id):
-        conn = self._get_connection()
-        try:
-            result = conn.execute("""
-                SELECT currency FROM accounts WHERE id = ?
-            """, [account_id]).fetchone()
-            return result[0] if result else 'USD'
-        finally:
-            conn.close()
+        account = self._ref_cache.account(account_id)
+        return account.currency if account else 'USD'
 
     def get_account_by_name_currency(self, account_name: str, currency: str):
-        conn = self._get_connection()
-        try:
-            result = conn.execute("""
-                SELECT id, account, type, company, currency, show_in_balance, is_active
-                FROM accounts
-                WHERE account = ? AND currency = ?
-            """, [account_name, currency]).fetchone()
-
-            if result:
-                account = Account(result[0], result[1],
-                                  result[2], result[3], result[4])
-                account.show_in_balance = bool(
-                    result[5]) if result[5] is not None else True
-                account.is_active = bool(result[6]) if len(
-                    result) > 6 and result[6] is not None else True
-                return account
-            return None
-        finally:
-            conn.close()
+        # Copies, since callers edit the returned account before saving it.
+        account = self._ref_cache.account_by_name_currency(account_name, currency)
+        return copy.copy(account) if account else None
 
     def get_account_by_id(self, account_id: int):
-        conn = self._get_connection()
         try:
-            result = conn.execute("""
-                SELECT id, account, type, company, currency, show_in_balance, is_active, is_investment
-                FROM accounts
-                WHERE id = ?
-            """, [account_id]).fetchone()
-
-            if result:
-                account = Account(result[0], result[1],
-                                  result[2], result[3], result[4])
-                account.show_in_balance = bool(
-                    result[5]) if result[5] is not None else True
-                account.is_active = bool(
-                    result[6]) if result[6] is not None else True
-                account.is_investment = bool(result[7]) if len(
-                    result) > 7 and result[7] is not None else False
-                return account
-            return None
+            account = self._ref_cache.account(account_id)
+            return copy.copy(account) if account else None
         except Exception as e:
             print(f"Error getting account by id: {e}")
             return None
-        finally:
-            conn.close()
 
     def get_account_id_from_name_currency(self, account_str):
         """Helper to get account ID from 'Name Currency' string format"""
-        conn = self._get_connection()
-        try:
-
-            accounts = self.get_all_accounts()
-            for account in accounts:
-                if f"{account.account} {account.currency}" == account_str:
-                    return account.id
-
-            return None
-        finally:
-            conn.close()
+        account = self._ref_cache.account_by_label(account_str)
+        return account.id if account else None
 
     def count_transactions_for_account(self, account_id):
         conn = self._get_connection()
@@ -1305,69 +1320,50 @@ class BudgetApp:
             conn.close()
 
     def get_transaction_counts(self):
-        """Get counts of transactions by account, category, and payee"""
-        conn = self._get_connection()
-        try:
-            account_counts = {}
-            result = conn.execute("""
-                SELECT account_id, COUNT(*) FROM transactions
-                WHERE account_id IS NOT NULL
-                GROUP BY account_id
-                UNION ALL
-                SELECT to_account_id, COUNT(*) FROM transactions
-                WHERE to_account_id IS NOT NULL
-                GROUP BY to_account_id
-            """).fetchall()
-
-            for account_id, count in result:
-                if account_id not in account_counts:
-                    account_counts[account_id] = 0
-                account_counts[account_id] += count
-
-            category_counts = {}
-            result = conn.execute("""
-                SELECT c.sub_category, COUNT(*)
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                WHERE t.category_id IS NOT NULL
-                GROUP BY c.sub_category
-            """).fetchall()
-
-            for sub_category, count in result:
-                category_counts[sub_category] = count
-
-            payee_counts = {}
-            result = conn.execute("""
-                SELECT payee, COUNT(*) FROM transactions
-                WHERE payee IS NOT NULL AND payee != ''
-                GROUP BY payee
-            """).fetchall()
-
-            for payee, count in result:
-                payee_counts[payee] = count
-
-            return {
-                'accounts': account_counts,
-                'categories': category_counts,
-                'payees': payee_counts
-            }
+        """Get counts of transactions by account, category, and payee"""
+        try:
+            return self._transaction_counts.snapshot()
         except Exception as e:
             print(f"Error getting transaction counts: {e}")
             return {'accounts': {}, 'categories': {}, 'payees': {}}
+
+    def _load_count_rows(self):
+        conn = self._get_connection()
+        try:
+            return conn.execute("""
+                SELECT account_id, to_account_id, category_id, payee, COUNT(*)
+                FROM transactions
+                GROUP BY account_id, to_account_id, category_id, payee
+            """).fetchall()
         finally:
             conn.close()
 
+    def verify_transaction_counts(self) -> list:
+        """(kind, key, maintained, actual) for every count that differs from a fresh GROUP BY."""
+        fresh = transaction_counts.TransactionCounts(self._load_count_rows, self._ref_cache.category)
+        actual = fresh.snapshot()
+        maintained = self.get_transaction_counts()
+        mismatches = []
+        for kind in ('accounts', 'categories', 'payees'):
+            for key in set(actual[kind]) | set(maintained[kind]):
+                if actual[kind].get(key, 0) != maintained[kind].get(key, 0):
+                    mismatches.append((kind, key, maintained[kind].get(key, 0), actual[kind].get(key, 0)))
+        return mismatches
+
+    def rebuild_transaction_counts(self):
+        """Reload the maintained transaction counts and payee index from the database."""
+        self._transaction_counts.load()
+        self._payee_index.load()
+
     def get_account_transactions_with_balance(self, account_id):
         """
         Fetch all transactions for an account with running balance calculated in SQL.
-        Returns: (list[Transaction], dict{trans_id: running_balance})
+        Returns: (TransactionFrame with dates as strings, dict{trans_id: running_balance})
         """
         conn = self._get_connection()
         try:
-            query = """
-                SELECT 
-                    t.id, t.date, t.type, c.sub_category, t.amount, t.account_id, t.payee, t.notes, 
-                    t.invest_account_id, t.qty, t.to_account_id, t.to_amount, t.confirmed,
+            query = f"""
+                SELECT {TRANSACTION_SELECT},
                     SUM(
                         CASE 
                             WHEN t.type = 'income' AND t.account_id = ? THEN COALESCE(t.amount, 0)
@@ -1385,28 +1381,91 @@ class BudgetApp:
             
             params = (account_id, account_id, account_id, account_id, account_id, account_id)
             
-            rows = conn.execute(query, params).fetchall()
-            
-            transactions = []
-            balance_history = {}
-            
-            for row in rows:
-                
-                t = Transaction(
-                    trans_id=row[0], date=str(row[1]), type=row[2],
-                    sub_category=row[3], amount=row[4], account_id=row[5],
-                    payee=row[6], notes=row[7], invest_account_id=row[8],
-                    qty=row[9], to_account_id=row[10], to_amount=row[11],
-                    confirmed=bool(row[12])
-                )
-                transactions.append(t)
-                balance_history[t.id] = float(row[13] or 0.0)
-                
+            data = conn.execute(query, params).fetchnumpy()
+            transactions = TransactionFrame.from_numpy(data, date_as_str=True)
+            transactions.nulls.pop('confirmed', None)
+
+            balance_history = dict(zip(
+                transactions.column('id').tolist(),
+                transactions.column('running_balance', fill=0.0).tolist()))
+
             return transactions, balance_history
-            
+
         except Exception as e:
             print(f"Error fetching account transactions with balance: {e}")
-            return [], {}
+            return TransactionFrame.empty(date_as_str=True), {}
+        finally:
+            conn.close()
+
+    def get_account_period_transactions(self, account_id, start_date=None, end_date=None, months=None):
+        """
+        Transactions moving account_id's balance between start_date and end_date
+        ('YYYY-MM-DD', inclusive, None = open ended), optionally only those in the
+        given calendar months (1-12), newest first. The running balance starts from
+        the ledger balance before start_date, so earlier history is never read.
+        Returns: (TransactionFrame with dates as strings and a running_balance column,
+                  opening balance)
+        """
+        conn = self._get_connection()
+        try:
+            opening = balance_ledger.balance_of(conn, account_id, start_date, inclusive=False) \
+                if start_date else 0
+
+            filters = []
+            params = [opening, account_id, account_id, account_id, account_id, account_id, account_id]
+            if start_date:
+                filters.append("AND t.date >= ?")
+                params.append(start_date)
+            if end_date:
+                filters.append("AND t.date <= ?")
+                params.append(end_date)
+            month_filter = ""
+            if months:
+                month_filter = f"WHERE month(date) IN ({', '.join('?' for _ in months)})"
+                params.extend(months)
+
+            query = f"""
+                SELECT * FROM (
+                    SELECT {TRANSACTION_SELECT},
+                        CAST(? + SUM(
+                            CASE
+                                WHEN t.type = 'income' AND t.account_id = ? THEN COALESCE(t.amount, 0)
+                                WHEN t.type = 'expense' AND t.account_id = ? THEN -COALESCE(t.amount, 0)
+                                WHEN t.type = 'transfer' AND t.account_id = ? THEN -COALESCE(t.amount, 0)
+                                WHEN t.type = 'transfer' AND t.to_account_id = ? THEN COALESCE(t.to_amount, 0)
+                                ELSE 0
+                            END
+                        ) OVER (ORDER BY t.date, t.id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+                        AS DOUBLE) AS running_balance
+                    FROM transactions t
+                    LEFT JOIN categories c ON t.category_id = c.id
+                    WHERE (t.account_id = ? OR t.to_account_id = ?)
+                      AND t.date IS NOT NULL
+                      {' '.join(filters)}
+                )
+                {month_filter}
+                ORDER BY date DESC, id DESC
+            """
+
+            data = conn.execute(query, params).fetchnumpy()
+            transactions = TransactionFrame.from_numpy(data, date_as_str=True)
+            transactions.nulls.pop('confirmed', None)
+            return transactions, float(opening)
+
+        except Exception as e:
+            print(f"Error fetching account period transactions: {e}")
+            return TransactionFrame.empty(date_as_str=True), 0.0
+        finally:
+            conn.close()
+
+    def get_account_balance(self, account_id, target_date=None, inclusive=True) -> float:
+        """Balance of one account at the end of target_date (default: latest), from the ledger."""
+        conn = self._get_connection()
+        try:
+            return float(balance_ledger.balance_of(conn, account_id, target_date, inclusive))
+        except Exception as e:
+            print(f"Error fetching balance for account {account_id}: {e}")
+            return 0.0
         finally:
             conn.close()
 
@@ -1497,6 +1556,10 @@ class BudgetApp:
             return False, f"Unexpected Global Error: {e}"
         finally:
             conn.close()
+            self._ref_cache.invalidate('categories')
+            self._notify_change('categories', 'transactions', 'budgets')
+            self._payee_index.invalidate()
+            self._transaction_counts.invalidate()
 
     def get_account_cash_flows(self, account_id: int):
         """
@@ -1613,20 +1676,38 @@ class BudgetApp:
         finally:
             conn.close()
 
-    def get_category_by_id(self, category_id):
+    def get_investment_inputs(self, account_ids: list = None) -> dict:
+        """
+        Cash flows, quantity changes, valuation histories, cost basis and income/fees
+        for many investment accounts at once (default: all investment accounts).
+        Returns {account_id: InvestmentInputs}; see investment_inputs.py.
+        """
+        accounts = self._ref_cache.accounts(show_inactive=True)
+        if account_ids is None:
+            selected = [(a.id, a.currency) for a in accounts if a.is_investment]
+        else:
+            wanted = set(account_ids)
+            selected = [(a.id, a.currency) for a in accounts if a.id in wanted]
+
         conn = self._get_connection()
         try:
-            row = conn.execute(
-                "SELECT id, sub_category, category, category_type FROM categories WHERE id = ?", [category_id]).fetchone()
-            if row:
-                return Category(*row)
-            return None
+            return investment_inputs.load(conn, self.get_rate_index(), selected)
         except Exception as e:
-            print(f"Error getting category by id: {e}")
-            return None
+            print(f"Error loading investment inputs: {e}")
+            return {}
         finally:
             conn.close()
 
+    def get_category_by_sub_category(self, sub_category: str):
+        return self._ref_cache.category_by_sub(sub_category)
+
+    def get_category_by_id(self, category_id):
+        try:
+            return self._ref_cache.category(category_id)
+        except Exception as e:
+            print(f"Error getting category by id: {e}")
+            return None
+
     def get_expenses_breakdown(self, year, month=None):
         conn = self._get_connection()
         try:
@@ -1662,6 +1743,7 @@ class BudgetApp:
         finally:
             conn.close()
 
+    @memoized('transactions', 'categories', 'accounts', 'exchange_rates')
     def get_expenses_breakdown(self, year, month, category_ids=None):
         """
         Get hierarchical expenses breakdown for a specific month.
@@ -1684,21 +1766,18 @@ class BudgetApp:
                 filter_clause = f"AND t.category_id IN ({placeholders})"
                 params.extend(category_ids)
 
+            fx_join = self._fx_join_sql('a.currency', 't.date')
+            fx_rate = self._fx_rate_sql('a.currency')
+
             result = conn.execute(f"""
                 SELECT c.category, c.sub_category,
                     COALESCE(SUM(
-                        CASE
-                            WHEN a.currency = 'CHF' THEN t.amount
-                            ELSE t.amount * COALESCE(
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency AND er.date <= t.date ORDER BY er.date DESC LIMIT 1),
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency ORDER BY er.date ASC LIMIT 1),
-                                1.0
-                            )
-                        END
+                        t.amount * {fx_rate}
                     ), 0)
                 FROM transactions t
                 JOIN categories c ON t.category_id = c.id
                 JOIN accounts a ON t.account_id = a.id
+                {fx_join}
                 WHERE t.type = 'expense' AND t.date >= ? AND t.date < ? {filter_clause}
                 GROUP BY c.category, c.sub_category
                 ORDER BY c.category, 3 DESC
@@ -1728,6 +1807,7 @@ class BudgetApp:
         finally:
             conn.close()
 
+    @memoized('transactions', 'accounts', 'exchange_rates')
     def get_monthly_expense_trend(self, end_year, end_month, category_ids=None):
         """
         Get monthly total expenses for the trailing 12 months ending at end_year-end_month.
@@ -1765,22 +1845,19 @@ class BudgetApp:
                 filter_clause = f"AND category_id IN ({placeholders})"
                 params.extend(category_ids)
 
+            fx_join = self._fx_join_sql('a.currency', 't.date')
+            fx_rate = self._fx_rate_sql('a.currency')
+
             result = conn.execute(f"""
-                SELECT strftime('%Y', date), strftime('%m', date),
+                SELECT strftime('%Y', t.date), strftime('%m', t.date),
                     COALESCE(SUM(
-                        CASE
-                            WHEN a.currency = 'CHF' THEN t.amount
-                            ELSE t.amount * COALESCE(
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency AND er.date <= t.date ORDER BY er.date DESC LIMIT 1),
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency ORDER BY er.date ASC LIMIT 1),
-                                1.0
-                            )
-                        END
+                        t.amount * {fx_rate}
                     ), 0)
                 FROM transactions t
                 JOIN accounts a ON t.account_id = a.id
+                {fx_join}
                 WHERE t.type = 'expense' AND t.date >= ? AND t.date < ? {filter_clause}
-                GROUP BY strftime('%Y', date), strftime('%m', date)
+                GROUP BY strftime('%Y', t.date), strftime('%m', t.date)
             """, params).fetchall()
 
             data_map = {}
@@ -1811,6 +1888,7 @@ class BudgetApp:
         finally:
             conn.close()
 
+    @memoized('transactions', 'accounts', 'exchange_rates')
     def get_top_payees(self, year, month=None, limit=10, category_ids=None):
         conn = self._get_connection()
         try:
@@ -1825,20 +1903,17 @@ class BudgetApp:
 
             params.append(limit)
 
+            fx_join = self._fx_join_sql('a.currency', 't.date')
+            fx_rate = self._fx_rate_sql('a.currency')
+
             result = conn.execute(f"""
                 SELECT t.payee,
                     COALESCE(SUM(
-                        CASE
-                            WHEN a.currency = 'CHF' THEN t.amount
-                            ELSE t.amount * COALESCE(
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency AND er.date <= t.date ORDER BY er.date DESC LIMIT 1),
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency ORDER BY er.date ASC LIMIT 1),
-                                1.0
-                            )
-                        END
+                        t.amount * {fx_rate}
                     ), 0)
                 FROM transactions t
                 JOIN accounts a ON t.account_id = a.id
+                {fx_join}
                 WHERE t.type = 'expense' AND t.date >= ? AND t.date < ? AND t.payee IS NOT NULL AND t.payee != '' {filter_clause}
                 GROUP BY t.payee
                 ORDER BY 2 DESC
@@ -1884,21 +1959,18 @@ class BudgetApp:
         """
         conn = self._get_connection()
         try:
-            result = conn.execute("""
+            fx_join = self._fx_join_sql('a.currency', 't.date')
+            fx_rate = self._fx_rate_sql('a.currency')
+
+            result = conn.execute(f"""
                 SELECT
                     t.invest_account_id,
-                    CASE
-                        WHEN a.currency = 'CHF' THEN t.amount
-                        ELSE t.amount * COALESCE(
-                            (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency AND er.date <= t.date ORDER BY er.date DESC LIMIT 1),
-                            (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency ORDER BY er.date ASC LIMIT 1),
-                            1.0
-                        )
-                    END as amount_chf,
+                    t.amount * {fx_rate} as amount_chf,
                     c.sub_category,
                     strftime('%Y', t.date) as year
                 FROM transactions t
                 JOIN accounts a ON t.account_id = a.id
+                {fx_join}
                 LEFT JOIN categories c ON t.category_id = c.id
                 WHERE t.type = 'income' AND t.invest_account_id IS NOT NULL
             """).fetchall()
@@ -1940,21 +2012,18 @@ class BudgetApp:
         """
         conn = self._get_connection()
         try:
-            result = conn.execute("""
+            fx_join = self._fx_join_sql('a.currency', 't.date')
+            fx_rate = self._fx_rate_sql('a.currency')
+
+            result = conn.execute(f"""
                 SELECT
                     t.invest_account_id,
-                    CASE
-                        WHEN a.currency = 'CHF' THEN t.amount
-                        ELSE t.amount * COALESCE(
-                            (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency AND er.date <= t.date ORDER BY er.date DESC LIMIT 1),
-                            (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency ORDER BY er.date ASC LIMIT 1),
-                            1.0
-                        )
-                    END as amount_chf,
+                    t.amount * {fx_rate} as amount_chf,
                     c.sub_category,
                     strftime('%Y', t.date) as year
                 FROM transactions t
                 JOIN accounts a ON t.account_id = a.id
+                {fx_join}
                 LEFT JOIN categories c ON t.category_id = c.id
                 WHERE t.type = 'expense' AND t.invest_account_id IS NOT NULL
             """).fetchall()
@@ -2005,6 +2074,7 @@ class BudgetApp:
                 VALUES (?, ?)
             """, [category_id, budget_amount])
             conn.commit()
+            self._notify_change('budgets')
             return True
         except Exception as e:
             print(f"Error adding/updating budget: {e}")
@@ -2012,6 +2082,7 @@ class BudgetApp:
         finally:
             conn.close()
 
+    @memoized('budgets', 'categories')
     def get_all_budgets(self, category_type='Expense'):
         """Get all monthly budgets for specified category type"""
         conn = self._get_connection()
@@ -2033,6 +2104,7 @@ class BudgetApp:
         finally:
             conn.close()
 
+    @memoized('transactions', 'categories', 'accounts', 'exchange_rates')
     def get_l12m_breakdown(self, end_year: int, end_month: int, category_type='Expense', transaction_type='expense') -> dict:
         """
         Get total amounts per sub-category for the last 12 months using Python-based optimization.
@@ -2061,38 +2133,18 @@ class BudgetApp:
             """
             transactions = conn.execute(query, [transaction_type, start_date_str, limit_date_str, category_type]).fetchall()
             
-            all_rates = conn.execute("SELECT date, currency, rate FROM exchange_rates ORDER BY date ASC").fetchall()
-            
-            rates_history = {}
-            for r_date, r_curr, r_rate in all_rates:
-                if r_curr not in rates_history:
-                    rates_history[r_curr] = []
-                rates_history[r_curr].append((str(r_date), float(r_rate)))
-
-            import bisect
-
-            def get_rate_at(date_str, currency):
-                if currency == 'CHF': return 1.0
-                history = rates_history.get(currency)
-                if not history: return 1.0
-                
-                idx = bisect.bisect_right(history, (date_str, float('inf')))
-                if idx > 0:
-                    return history[idx-1][1]
-                return history[0][1]
+            rate_index = self.get_rate_index()
+            rates = rate_index.lookup_mixed(
+                [row[2] for row in transactions], [row[0] for row in transactions])
 
             l12m_data = {}
             
-            for row in transactions:
-                t_date = row[0]
+            for row, rate in zip(transactions, rates):
                 amount = float(row[1]) if row[1] else 0.0
-                currency = row[2]
                 sub_cat = row[3]
                 
                 if not amount: continue
                 
-                t_date_str = str(t_date)
-                rate = get_rate_at(t_date_str, currency)
                 val_chf = amount * rate
                 
                 l12m_data[sub_cat] = l12m_data.get(sub_cat, 0.0) + val_chf
@@ -2126,6 +2178,7 @@ class BudgetApp:
                 WHERE category_id = ?
             """, [category_id])
             conn.commit()
+            self._notify_change('budgets')
             return True
         except Exception as e:
             print(f"Error deleting budget: {e}")
@@ -2133,6 +2186,7 @@ class BudgetApp:
         finally:
             conn.close()
 
+    @memoized('transactions', 'categories', 'accounts', 'exchange_rates', 'budgets')
     def get_budget_vs_actual(self, year: int, month: int, category_type='Expense', transaction_type='expense'):
         """Get budget vs actual amounts for a given month using Python-based optimization"""
         conn = self._get_connection()
@@ -2155,38 +2209,19 @@ class BudgetApp:
             """
             transactions = conn.execute(query, [transaction_type, start_date_str, end_date_str, category_type]).fetchall()
             
-            all_rates = conn.execute("SELECT date, currency, rate FROM exchange_rates ORDER BY date ASC").fetchall()
-            
-            rates_history = {}
-            for r_date, r_curr, r_rate in all_rates:
-                if r_curr not in rates_history:
-                    rates_history[r_curr] = []
-                rates_history[r_curr].append((str(r_date), float(r_rate)))
-
-            import bisect
-
-            def get_rate_at(date_str, currency):
-                if currency == 'CHF': return 1.0
-                history = rates_history.get(currency)
-                if not history: return 1.0
-                idx = bisect.bisect_right(history, (date_str, float('inf')))
-                if idx > 0:
-                    return history[idx-1][1]
-                return history[0][1]
+            rate_index = self.get_rate_index()
+            rates = rate_index.lookup_mixed(
+                [row[2] for row in transactions], [row[0] for row in transactions])
 
             actuals_map = {}
             
-            for row in transactions:
-                t_date = row[0]
+            for row, rate in zip(transactions, rates):
                 amount = float(row[1]) if row[1] else 0.0
-                currency = row[2]
                 sub_cat = row[3]
                 cat_name = row[4]
                 
                 if not amount: continue
                 
-                t_date_str = str(t_date)
-                rate = get_rate_at(t_date_str, currency)
                 val_chf = amount * rate
                 
                 if sub_cat not in actuals_map:
@@ -2260,15 +2295,16 @@ class BudgetApp:
                 "SELECT COALESCE(MAX(id), 0) FROM investment_valuations").fetchone()
             current_max_id = new_id_res[0] if new_id_res else 0
 
-            for i, (date, account_id, value) in enumerate(valuations_data):
+            for i, (day, account_id, value) in enumerate(valuations_data):
                 current_max_id += 1
                 conn.execute("""
                     INSERT INTO investment_valuations (id, date, account_id, value)
                     VALUES (?, ?, ?, ?)
                     ON CONFLICT (date, account_id) DO UPDATE SET value = excluded.value
-                """, (current_max_id, date, account_id, value))
+                """, (current_max_id, day, account_id, value))
 
             conn.commit()
+            self._notify_valuations_changed(valuations_data)
             return True
         except Exception as e:
             print(f"Error adding investment valuations: {e}")
@@ -2286,10 +2322,31 @@ class BudgetApp:
 
         conn = self._get_connection()
         try:
-            for date, account_id in valuations_data:
+            for day, account_id in valuations_data:
+                conn.execute(
+                    "DELETE FROM investment_valuations WHERE date = ? AND account_id = ?", (day, account_id))
+            conn.commit()
+            self._notify_valuations_changed(valuations_data)
+            return True
+        except Exception as e:
+            print(f"Error deleting investment valuations: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def delete_investment_valuations_for_dates(self, dates: list):
+        """Delete every account's valuation on the given dates (a whole matrix row)."""
+        if not dates:
+            return True
+
+        conn = self._get_connection()
+        try:
+            for day in dates:
                 conn.execute(
-                    "DELETE FROM investment_valuations WHERE date = ? AND account_id = ?", (date, account_id))
+                    "DELETE FROM investment_valuations WHERE date = ?", (day,))
             conn.commit()
+            days = sorted(str(d)[:10] for d in dates)
+            self._notify_change('investment_valuations', start_date=days[0], end_date=days[-1])
             return True
         except Exception as e:
             print(f"Error deleting investment valuations: {e}")
@@ -2297,6 +2354,15 @@ class BudgetApp:
         finally:
             conn.close()
 
+    def _notify_valuations_changed(self, valuations_data):
+        """Publish a valuation write; rows start with (date, account_id)."""
+        if not valuations_data:
+            return
+        days = sorted(str(row[0])[:10] for row in valuations_data)
+        self._notify_change('investment_valuations',
+                            account_ids={row[1] for row in valuations_data},
+                            start_date=days[0], end_date=days[-1])
+
     def get_investment_valuation_for_date(self, account_id: int, target_date: str = None) -> float:
         """
         Get the effective valuation for an account at a specific date.
@@ -2379,169 +2445,17 @@ class BudgetApp:
         """
         Calculate the total net worth (of show_in_balance accounts)
         at the end of each month for the given year.
-        Optimized to use batched queries and in-memory aggregation.
+        Runs on the vectorized NetWorthEngine.
         Returns: {month_int: total_balance_float}
         """
         conn = self._get_connection()
         try:
-            import bisect
-            from datetime import date, timedelta
-
-            accounts = conn.execute("""
-                SELECT id, currency, is_investment, valuation_strategy, account
-                FROM accounts
-                WHERE show_in_balance = TRUE AND id != 0
-            """).fetchall()
-            
-            if not accounts:
+            engine = NetWorthEngine(conn, self.get_rate_index())
+            months, totals = engine.month_end_totals(
+                f"{year}-01-01", f"{year}-12-31", backfill=True)
+            if not months:
                 return {m: 0.0 for m in range(1, 13)}
-
-            acc_meta = {}
-            for row in accounts:
-                acc_meta[row[0]] = {
-                    'curr': row[1], 
-                    'is_inv': bool(row[2]) if row[2] else False, 
-                    'strat': row[3], 
-                    'bal': 0.0, 
-                    'qty': 0.0
-                }
-
-            year_start = date(year, 1, 1).strftime('%Y-%m-%d')
-            year_end = date(year, 12, 31).strftime('%Y-%m-%d')
-            
-            opening_rows = conn.execute("""
-                SELECT 
-                    account_id, 
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.amount 
-                        WHEN t.type='expense' THEN -t.amount 
-                        WHEN t.type='transfer' THEN -t.amount 
-                        ELSE 0 END),
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.qty 
-                        WHEN t.type='expense' AND a.is_investment THEN -t.qty 
-                        WHEN t.type='transfer' AND a.is_investment THEN -t.qty 
-                        ELSE 0 END)
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.date < ? AND t.account_id IS NOT NULL
-                GROUP BY account_id
-                
-                UNION ALL 
-                
-                SELECT 
-                    to_account_id, 
-                    SUM(to_amount),
-                    SUM(qty)
-                FROM transactions t
-                JOIN accounts a ON t.to_account_id = a.id
-                WHERE t.date < ? AND t.to_account_id IS NOT NULL AND t.type='transfer'
-                GROUP BY to_account_id
-            """, (year_start, year_start)).fetchall()
-            
-            for aid, bal, qty in opening_rows:
-                if aid in acc_meta:
-                    acc_meta[aid]['bal'] += float(bal or 0.0)
-                    acc_meta[aid]['qty'] += float(qty or 0.0)
-
-            delta_rows = conn.execute("""
-                SELECT 
-                    MONTH(CAST(t.date AS DATE)),
-                    account_id, 
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.amount 
-                        WHEN t.type='expense' THEN -t.amount 
-                        WHEN t.type='transfer' THEN -t.amount 
-                        ELSE 0 END),
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.qty 
-                        WHEN t.type='expense' AND a.is_investment THEN -t.qty 
-                        WHEN t.type='transfer' AND a.is_investment THEN -t.qty 
-                        ELSE 0 END)
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.date >= ? AND t.date <= ? AND t.account_id IS NOT NULL
-                GROUP BY MONTH(CAST(t.date AS DATE)), account_id
-                
-                UNION ALL 
-                
-                SELECT 
-                    MONTH(CAST(t.date AS DATE)),
-                    to_account_id, 
-                    SUM(to_amount),
-                    SUM(qty)
-                FROM transactions t
-                JOIN accounts a ON t.to_account_id = a.id
-                WHERE t.date >= ? AND t.date <= ? AND t.to_account_id IS NOT NULL AND t.type='transfer'
-                GROUP BY MONTH(CAST(t.date AS DATE)), to_account_id
-            """, (year_start, year_end, year_start, year_end)).fetchall()
-
-            deltas = {}
-            for m_idx, aid, d_bal, d_qty in delta_rows:
-                if aid in acc_meta:
-                    k = (m_idx, aid)
-                    if k not in deltas: deltas[k] = {'bal': 0.0, 'qty': 0.0}
-                    deltas[k]['bal'] += float(d_bal or 0.0)
-                    deltas[k]['qty'] += float(d_qty or 0.0)
-
-            rates_rows = conn.execute("SELECT currency, date, rate FROM exchange_rates ORDER BY date").fetchall()
-            rates_cache = {}
-            for c, d, r in rates_rows:
-                if c not in rates_cache: rates_cache[c] = []
-                rates_cache[c].append((str(d), float(r)))
-
-            prices_rows = conn.execute("SELECT account_id, date, value FROM investment_valuations ORDER BY date").fetchall()
-            prices_cache = {}
-            for aid, d, v in prices_rows:
-                if aid not in prices_cache: prices_cache[aid] = []
-                prices_cache[aid].append((str(d), float(v)))
-
-            def get_rate_locf(curr, target_d):
-                if curr == 'CHF': return 1.0
-                history = rates_cache.get(curr, [])
-                if not history: return 1.0
-                idx = bisect.bisect_right(history, (target_d, float('inf')))
-                if idx == 0: return history[0][1]
-                return history[idx-1][1]
-
-            def get_price_locf(aid, target_d):
-                history = prices_cache.get(aid, [])
-                if not history: return 0.0
-                idx = bisect.bisect_right(history, (target_d, float('inf')))
-                if idx == 0: return history[0][1]
-                return history[idx-1][1]
-
-            monthly_totals = {}
-            for m in range(1, 13):
-                for aid, meta in acc_meta.items():
-                    d = deltas.get((m, aid), None)
-                    if d:
-                        meta['bal'] += d['bal']
-                        meta['qty'] += d['qty']
-                
-                if m == 12: 
-                    eom = date(year, 12, 31)
-                else: 
-                    eom = date(year, m+1, 1) - timedelta(days=1)
-                
-                total_chf = 0.0
-                for aid, meta in acc_meta.items():
-                    val_native = meta['bal']
-                    
-                    if meta['is_inv']:
-                        if meta['strat'] == 'Price/Qty':
-                             price = get_price_locf(aid, eom)
-                             val_native = meta['qty'] * price
-                        else:
-                             p = get_price_locf(aid, eom)
-                             if p > 0: val_native = p
-                    
-                    rate = get_rate_locf(meta['curr'], eom)
-                    total_chf += val_native * rate
-                
-                monthly_totals[m] = total_chf
-                
-            return monthly_totals
+            return {m: float(totals[m - 1]) for m in range(1, 13)}
 
         except Exception as e:
             print(f"Error calculating monthly balances: {e}")
@@ -2554,634 +2468,41 @@ class BudgetApp:
     def get_net_worth_history(self, start_date: str, end_date: str) -> dict:
         """
         Calculate the total net worth history for a given date range.
+        Runs on the vectorized NetWorthEngine.
         Returns: {'YYYY-MM': total_net_worth_float}
         """
         conn = self._get_connection()
         try:
-            from datetime import datetime, timedelta
-            from dateutil.relativedelta import relativedelta
-
-            accounts = conn.execute("""
-                SELECT id, currency, is_investment, valuation_strategy, account
-                FROM accounts
-                WHERE show_in_balance = TRUE AND id != 0
-            """).fetchall()
-            
-            if not accounts:
-                return {}
-
-            acc_meta = {}
-            for row in accounts:
-                acc_meta[row[0]] = {
-                    'curr': row[1], 
-                    'is_inv': bool(row[2]) if row[2] else False, 
-                    'strat': row[3], 
-                    'bal': 0.0, 
-                    'qty': 0.0
-                }
-
-            opening_rows = conn.execute("""
-                SELECT 
-                    account_id, 
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.amount 
-                        WHEN t.type='expense' THEN -t.amount 
-                        WHEN t.type='transfer' THEN -t.amount 
-                        ELSE 0 END),
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.qty 
-                        WHEN t.type='expense' AND a.is_investment THEN -t.qty 
-                        WHEN t.type='transfer' AND a.is_investment THEN -t.qty 
-                        ELSE 0 END)
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.date < ? AND t.account_id IS NOT NULL
-                GROUP BY account_id
-                
-                UNION ALL 
-                
-                SELECT 
-                    to_account_id, 
-                    SUM(to_amount),
-                    SUM(qty)
-                FROM transactions t
-                JOIN accounts a ON t.to_account_id = a.id
-                WHERE t.date < ? AND t.to_account_id IS NOT NULL AND t.type='transfer'
-                GROUP BY to_account_id
-            """, (start_date, start_date)).fetchall()
-            
-            for aid, bal, qty in opening_rows:
-                if aid in acc_meta:
-                    acc_meta[aid]['bal'] += float(bal or 0.0)
-                    acc_meta[aid]['qty'] += float(qty or 0.0)
-
-            delta_rows = conn.execute("""
-                SELECT 
-                    strftime('%Y-%m', t.date),
-                    account_id, 
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.amount 
-                        WHEN t.type='expense' THEN -t.amount 
-                        WHEN t.type='transfer' THEN -t.amount 
-                        ELSE 0 END),
-                    SUM(CASE 
-                        WHEN t.type='income' THEN t.qty 
-                        WHEN t.type='expense' AND a.is_investment THEN -t.qty 
-                        WHEN t.type='transfer' AND a.is_investment THEN -t.qty 
-                        ELSE 0 END)
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.date >= ? AND t.date <= ? AND t.account_id IS NOT NULL
-                GROUP BY strftime('%Y-%m', t.date), account_id
-                
-                UNION ALL 
-                
-                SELECT 
-                    strftime('%Y-%m', t.date),
-                    to_account_id, 
-                    SUM(to_amount),
-                    SUM(qty)
-                FROM transactions t
-                JOIN accounts a ON t.to_account_id = a.id
-                WHERE t.date >= ? AND t.date <= ? AND t.to_account_id IS NOT NULL AND t.type='transfer'
-                GROUP BY strftime('%Y-%m', t.date), to_account_id
-            """, (start_date, end_date, start_date, end_date)).fetchall()
-
-            deltas = {} 
-            for ym, aid, d_bal, d_qty in delta_rows:
-                if aid in acc_meta:
-                    k = (ym, aid)
-                    if k not in deltas: deltas[k] = {'bal': 0.0, 'qty': 0.0}
-                    deltas[k]['bal'] += float(d_bal or 0.0)
-                    deltas[k]['qty'] += float(d_qty or 0.0)
-
-            rates_rows = conn.execute("SELECT currency, date, rate FROM exchange_rates ORDER BY date").fetchall()
-            rates_cache = {}
-            for c, d, r in rates_rows:
-                if c not in rates_cache: rates_cache[c] = []
-                rates_cache[c].append((str(d), float(r)))
-
-            prices_rows = conn.execute("SELECT account_id, date, value FROM investment_valuations ORDER BY date").fetchall()
-            prices_cache = {}
-            for aid, d, v in prices_rows:
-                if aid not in prices_cache: prices_cache[aid] = []
-                prices_cache[aid].append((str(d), float(v)))
-
-            history = {}
-            current_meta = {aid: vals.copy() for aid, vals in acc_meta.items()}
-            
-            s_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            e_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            
-            months = []
-            curr = s_dt.replace(day=1)
-            while curr <= e_dt:
-                months.append(curr.strftime('%Y-%m'))
-                curr += relativedelta(months=1)
-                
-            def get_val_at(aid, date_str):
-                rates = rates_cache.get(acc_meta[aid]['curr'], [])
-                eff_rate = 1.0
-                if rates:
-                    for d, r in reversed(rates):
-                        if d <= date_str:
-                            eff_rate = r
-                            break
-                
-                eff_price = 0.0
-                if acc_meta[aid]['is_inv']:
-                    prices = prices_cache.get(aid, [])
-                    if prices:
-                        for d, v in reversed(prices):
-                            if d <= date_str:
-                                eff_price = v
-                                break
-                
-                strat = acc_meta[aid]['strat']
-                bal = current_meta[aid]['bal']
-                qty = current_meta[aid]['qty']
-                
-                val_native = bal
-                if acc_meta[aid]['is_inv']:
-                    if strat == 'Price/Qty':
-                        val_native = qty * eff_price
-                    else:
-                        if eff_price > 0: val_native = eff_price
-                        else: val_native = bal
-
-                return val_native * eff_rate
-
-            for ym in months:
-                for aid, meta in current_meta.items():
-                    d = deltas.get((ym, aid))
-                    if d:
-                        meta['bal'] += d['bal']
-                        meta['qty'] += d['qty']
-                
-                dt = datetime.strptime(ym, '%Y-%m')
-                next_m = dt + relativedelta(months=1)
-                eom = next_m - timedelta(days=1)
-                eom_str = eom.strftime('%Y-%m-%d')
-                
-                total_nw = 0.0
-                for aid in current_meta:
-                    total_nw += get_val_at(aid, eom_str)
-                
-                history[ym] = total_nw
-                
-            return history
+            engine = NetWorthEngine(conn, self.get_rate_index())
+            months, totals = engine.month_end_totals(start_date, end_date)
+            return {ym: float(total) for ym, total in zip(months, totals)}
         finally:
             conn.close()
 
     def get_monthly_investment_gains(self, year: int, account_ids: list = None) -> dict:
         """
         Calculate monthly investment gains/losses for all investment accounts.
+        Runs on the vectorized InvestmentGainsEngine.
         Returns: {month: {'total_gain': float, 'total_loss': float, 'net': float, 
                           'details': {'gains': {acc: amt}, 'losses': {acc: amt}}}}
         """
-        import calendar
-        import bisect
         conn = self._get_connection()
         try:
-            inv_rows = conn.execute("SELECT id, account, currency, valuation_strategy FROM accounts WHERE is_investment = 1").fetchall()
-            
-            all_acc_rows = conn.execute("SELECT id, currency FROM accounts").fetchall()
-            acc_currencies = {r[0]: r[1] for r in all_acc_rows}
-
-            if not inv_rows:
-                return {}
-            
-            if account_ids is not None:
-                inv_rows = [r for r in inv_rows if r[0] in account_ids]
-                if not inv_rows:
-                    return {}
-            
-            inv_map = {r[0]: {'name': r[1], 'currency': r[2], 'strat': r[3]} for r in inv_rows}
-            inv_ids = list(inv_map.keys())
-            
-            year_start_str = f"{year}-01-01"
-            year_end_str = f"{year}-12-31"
-            
-            ph = ','.join(['?'] * len(inv_ids))
-            
-            opening_sql = f"""
-                SELECT account_id, 
-                    SUM(CASE WHEN t.type='income' THEN t.amount WHEN t.type='expense' THEN -t.amount WHEN t.type='transfer' THEN -t.amount ELSE 0 END),
-                    SUM(CASE WHEN t.type='income' THEN t.qty WHEN t.type='expense' THEN -t.qty WHEN t.type='transfer' THEN -t.qty ELSE 0 END)
-                FROM transactions t
-                WHERE t.account_id IN ({ph}) AND t.date < ?
-                GROUP BY account_id
-                UNION ALL
-                SELECT to_account_id, SUM(to_amount), SUM(qty)
-                FROM transactions t
-                WHERE t.to_account_id IN ({ph}) AND t.type='transfer' AND t.date < ?
-                GROUP BY to_account_id
-            """
-            opening_params = inv_ids + [year_start_str] + inv_ids + [year_start_str]
-            opening_rows = conn.execute(opening_sql, opening_params).fetchall()
-            
-            state = {aid: {'bal': 0.0, 'qty': 0.0} for aid in inv_ids}
-            for aid, bal, qty in opening_rows:
-                if aid in state:
-                    state[aid]['bal'] += float(bal or 0.0)
-                    state[aid]['qty'] += float(qty or 0.0)
-                    
-            tx_sql = f"""
-                SELECT 
-                    MONTH(CAST(t.date AS DATE)),
-                    t.date, t.type, t.account_id, t.to_account_id, 
-                    t.amount, t.to_amount, t.qty, t.invest_account_id
-                FROM transactions t
-                WHERE t.date >= ? AND t.date <= ? 
-                AND (t.account_id IN ({ph}) OR t.to_account_id IN ({ph}) OR t.invest_account_id IN ({ph}))
-                ORDER BY t.date
-            """
-            tx_params = [year_start_str, year_end_str] + inv_ids + inv_ids + inv_ids
-            tx_rows = conn.execute(tx_sql, tx_params).fetchall()
-            
-            rates_rows = conn.execute("SELECT currency, date, rate FROM exchange_rates ORDER BY date").fetchall()
-            rates_cache = {}
-            for c, d, r in rates_rows:
-                if c not in rates_cache: rates_cache[c] = ([], [])
-                rates_cache[c][0].append(str(d))
-                rates_cache[c][1].append(float(r))
-                
-            prices_sql = f"""
-                SELECT p.account_id, p.date, p.price 
-                FROM stock_prices p 
-                WHERE p.account_id IN ({ph})
-                ORDER BY p.date
-            """
-            try:
-                prices_rows = conn.execute(prices_sql, inv_ids).fetchall()
-            except Exception:
-                prices_rows = []
-            
-            prices_cache = {}
-            for aid, d, p in prices_rows:
-                if aid not in prices_cache: prices_cache[aid] = ([], [])
-                prices_cache[aid][0].append(str(d))
-                prices_cache[aid][1].append(float(p))
-
-            val_sql = f"""
-                SELECT v.account_id, v.date, v.value 
-                FROM investment_valuations v
-                WHERE v.account_id IN ({ph})
-                ORDER BY v.date
-            """
-            val_rows = conn.execute(val_sql, inv_ids).fetchall()
-            val_cache = {}
-            for aid, d, v in val_rows:
-                if aid not in val_cache: val_cache[aid] = ([], [])
-                val_cache[aid][0].append(str(d))
-                val_cache[aid][1].append(float(v))
-                
-            def get_rate(curr, date_str):
-                if curr == 'CHF': return 1.0
-                if curr not in rates_cache: return 1.0
-                dates, rates = rates_cache[curr]
-                idx = bisect.bisect_right(dates, date_str) - 1
-                if idx >= 0: return rates[idx]
-                return 1.0
-                
-            def get_price(aid, date_str):
-                if aid not in prices_cache: return 0.0
-                dates, prices = prices_cache[aid]
-                idx = bisect.bisect_right(dates, date_str) - 1
-                if idx >= 0: return prices[idx]
-                return 0.0
-
-            def get_valuation_total(aid, date_str):
-                if aid not in val_cache: return 0.0
-                dates, vals = val_cache[aid]
-                idx = bisect.bisect_right(dates, date_str) - 1
-                if idx >= 0: return vals[idx]
-                return 0.0
-                
-            def calculate_account_valuation_chf(aid, s, date_str):
-                cur = inv_map[aid]['currency']
-                strat = inv_map[aid]['strat']
-                rate = get_rate(cur, date_str)
-                
-                if strat == 'Total Value':
-                    val_native = get_valuation_total(aid, date_str)
-                    if val_native == 0.0:
-                        val_native = s['bal']
-                else:
-                    price = get_price(aid, date_str)
-                    if price == 0.0:
-                        price = get_valuation_total(aid, date_str)
-                        
-                    val_native = s['bal'] + (s['qty'] * price)
-                    
-                return val_native * rate
-
-            month_end_date_0 = f"{year-1}-12-31"
-            prev_valuations = {aid: calculate_account_valuation_chf(aid, state[aid], month_end_date_0) for aid in inv_ids}
-            
-            results = {}
-            
-            tx_by_month = {m: [] for m in range(1, 13)}
-            for row in tx_rows:
-                m = row[0]
-                if m and 1 <= m <= 12:
-                    tx_by_month[m].append(row)
-                    
-            for m in range(1, 13):
-                last_day = calendar.monthrange(year, m)[1]
-                month_end_str = f"{year}-{m:02d}-{last_day}"
-                
-                flows_chf = {aid: 0.0 for aid in inv_ids}
-                income_chf = {aid: 0.0 for aid in inv_ids}
-                expense_chf = {aid: 0.0 for aid in inv_ids}
-                deposits_chf = {aid: 0.0 for aid in inv_ids}
-                withdrawals_chf = {aid: 0.0 for aid in inv_ids}
-                
-                income_details = {aid: 0.0 for aid in inv_ids}
-                expense_details = {aid: 0.0 for aid in inv_ids}
-                
-                for _, t_date, t_type, aid, to_aid, amt, to_amt, qty, link_aid in tx_by_month[m]:
-                    t_date_str = str(t_date)
-                    amt_val = float(amt or 0)
-                    to_amt_val = float(to_amt if to_amt is not None else amt_val)
-                    qty_val = float(qty or 0)
-                    
-                    target_inc_aid = None
-                    if link_aid in inv_ids:
-                        target_inc_aid = link_aid
-                    elif aid in inv_ids:
-                        target_inc_aid = aid
-                        
-                    source_currency = acc_currencies.get(aid, 'CHF') if 'acc_currencies' in locals() else 'CHF'
-                    rate = get_rate(source_currency, t_date_str)
-                    val_chf = amt_val * rate
-                    
-                    if target_inc_aid is not None:
-                        if t_type == 'income':
-                            income_chf[target_inc_aid] += val_chf
-                            income_details[target_inc_aid] += val_chf
-                        elif t_type == 'expense':
-                            expense_chf[target_inc_aid] += val_chf
-                            expense_details[target_inc_aid] += val_chf
-
-                    if aid in inv_ids:
-                        if t_type == 'income':
-                            state[aid]['bal'] += amt_val
-                            state[aid]['qty'] += qty_val
-                            flows_chf[aid] += val_chf 
-                        elif t_type == 'expense':
-                            state[aid]['bal'] -= amt_val
-                            state[aid]['qty'] -= qty_val
-                            flows_chf[aid] -= val_chf
-                        elif t_type == 'transfer':
-                            state[aid]['bal'] -= amt_val
-                            state[aid]['qty'] -= qty_val
-                            flows_chf[aid] -= val_chf
-                            withdrawals_chf[aid] += val_chf
-                            
-                    if t_type == 'transfer' and to_aid in inv_ids:
-                        target_currency = inv_map[to_aid]['currency']
-                        rate_to = get_rate(target_currency, t_date_str)
-                        val_to_chf = to_amt_val * rate_to
-                        
-                        state[to_aid]['bal'] += to_amt_val
-                        state[to_aid]['qty'] += qty_val
-                        flows_chf[to_aid] += val_to_chf
-                        deposits_chf[to_aid] += val_to_chf
-
-                        
-                curr_valuations = {aid: calculate_account_valuation_chf(aid, state[aid], month_end_str) for aid in inv_ids}
-                
-                income_named_details = {}
-                for aid, val in income_details.items():
-                    if abs(val) > 0.001:
-                        name = inv_map[aid]['name']
-                        income_named_details[name] = val
-                
-                expense_named_details = {}
-                for aid, val in expense_details.items():
-                    if abs(val) > 0.001:
-                        name = inv_map[aid]['name']
-                        expense_named_details[name] = val
-
-                month_res = {
-                    'total_gain': 0.0, 
-                    'total_loss': 0.0, 
-                    'net': 0.0, 
-                    'total_income': sum(income_chf.values()),
-                    'total_expense': sum(expense_chf.values()),
-                    'total_deposits': sum(deposits_chf.values()),
-                    'total_withdrawals': sum(withdrawals_chf.values()),
-                    'net_flow': sum(flows_chf.values()),
-                    'details': {
-                        'gains': {}, 
-                        'losses': {}, 
-                        'flows': {},
-                        'income': income_named_details,
-                        'expense': expense_named_details
-                    }
-                }
-                
-                for aid in inv_ids:
-                    
-                    prev_bal = state[aid]['bal']
-                    pass
-
-                    if abs(flows_chf[aid]) > 0.001:
-                        month_res['details']['flows'][inv_map[aid]['name']] = flows_chf[aid]
-
-                    gain = (curr_valuations[aid] - prev_valuations[aid]) - flows_chf[aid]
-                    
-                    if gain >= 0.001: 
-                        month_res['total_gain'] += gain
-                        month_res['details']['gains'][inv_map[aid]['name']] = gain
-                    elif gain <= -0.001:
-                        month_res['total_loss'] += gain
-                        month_res['details']['losses'][inv_map[aid]['name']] = gain
-                        
-                month_res['net'] = month_res['total_gain'] + month_res['total_loss']
-                results[m] = month_res
-                
-                prev_valuations = curr_valuations
-                
-            return results
+            engine = InvestmentGainsEngine(conn, self.get_rate_index())
+            return engine.monthly_gains(year, account_ids)
         finally:
             conn.close()
 
     def get_investment_gains_history(self, start_date: str, end_date: str, account_ids: list = None) -> dict:
         """
         Calculate total investment gains/losses history (realized + unrealized) for a date range.
+        Runs on the vectorized InvestmentGainsEngine.
         Returns: { 'YYYY-MM': {'net': float, 'gain': float, 'loss': float} }
         """
         conn = self._get_connection()
         try:
-            from datetime import datetime, timedelta
-            from dateutil.relativedelta import relativedelta
-
-            inv_rows = conn.execute("SELECT id, account, currency, valuation_strategy FROM accounts WHERE is_investment = 1").fetchall()
-            
-            if account_ids:
-                inv_rows = [r for r in inv_rows if r[0] in account_ids]
-
-            if not inv_rows:
-                return {}
-            
-            inv_map = {r[0]: {'name': r[1], 'currency': r[2], 'strat': r[3]} for r in inv_rows}
-            inv_ids = list(inv_map.keys())
-            
-            rates_rows = conn.execute("SELECT currency, date, rate FROM exchange_rates ORDER BY date").fetchall()
-            rates_cache = {}
-            for c, d, r in rates_rows:
-                if c not in rates_cache: rates_cache[c] = []
-                rates_cache[c].append((str(d), float(r)))
-
-            prices_rows = conn.execute("SELECT account_id, date, value FROM investment_valuations ORDER BY date").fetchall()
-            prices_cache = {}
-            for aid, d, v in prices_rows:
-                if aid not in prices_cache: prices_cache[aid] = []
-                prices_cache[aid].append((str(d), float(v)))
-                
-            def get_rate(curr, d_str):
-                if curr == 'CHF': return 1.0
-                rs = rates_cache.get(curr, [])
-                eff = 1.0
-                if rs:
-                     for d, r in reversed(rs):
-                        if d <= d_str:
-                            eff = r
-                            break
-                return eff
-
-            def get_price(aid, d_str):
-                ps = prices_cache.get(aid, [])
-                eff = 0.0
-                if ps:
-                     for d, v in reversed(ps):
-                        if d <= d_str:
-                            eff = v
-                            break
-                return eff
-            
-            ph = ','.join(['?'] * len(inv_ids))
-            opening_rows = conn.execute(f"""
-                SELECT account_id, SUM(CASE WHEN type='income' THEN qty WHEN type='expense' THEN -qty WHEN type='transfer' THEN -qty ELSE 0 END)
-                FROM transactions 
-                WHERE account_id IN ({ph}) AND date < ?
-                GROUP BY account_id
-                
-                UNION ALL
-                
-                SELECT to_account_id, SUM(qty)
-                FROM transactions
-                WHERE to_account_id IN ({ph}) AND date < ? AND type='transfer'
-                GROUP BY to_account_id
-            """, inv_ids + [start_date] + inv_ids + [start_date]).fetchall()
-            
-            holdings = {aid: 0.0 for aid in inv_ids}
-            for aid, qty in opening_rows:
-                if aid in holdings: holdings[aid] += float(qty or 0.0)
-
-            raw_txs = conn.execute(f"""
-                SELECT strftime('%Y-%m', t.date) as ym, t.date, t.type, t.account_id, t.to_account_id, t.amount, t.to_amount, t.qty, a.currency
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE (t.account_id IN ({ph}) OR (t.type='transfer' AND t.to_account_id IN ({ph})))
-                  AND t.date >= ? AND t.date <= ?
-                ORDER BY t.date
-            """, inv_ids + inv_ids + [start_date, end_date]).fetchall()
-            
-            txs_by_month = {}
-            for row in raw_txs:
-                ym = row[0]
-                if ym not in txs_by_month: txs_by_month[ym] = []
-                txs_by_month[ym].append(row)
-
-            history = {}
-            s_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            e_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            
-            curr = s_dt.replace(day=1)
-            months = []
-            while curr <= e_dt:
-                months.append(curr.strftime('%Y-%m'))
-                curr += relativedelta(months=1)
-            
-            for ym in months:
-                dt_obj = datetime.strptime(ym, '%Y-%m')
-                som = dt_obj
-                prev_eom = som - timedelta(days=1)
-                prev_eom_str = prev_eom.strftime('%Y-%m-%d')
-                
-                next_m = som + relativedelta(months=1)
-                eom = next_m - timedelta(days=1)
-                eom_str = eom.strftime('%Y-%m-%d')
-                
-                start_val_chf = 0.0
-                for aid, qty in holdings.items():
-                    price = get_price(aid, prev_eom_str)
-                    rate = get_rate(inv_map[aid]['currency'], prev_eom_str)
-                    
-                    val_native = 0.0
-                    if inv_map[aid]['strat'] == 'Price/Qty':
-                        val_native = qty * price
-                    else:
-                        val_native = price
-                    
-                    start_val_chf += (val_native * rate)
-                
-                net_invested_chf = 0.0
-                year_txs = txs_by_month.get(ym, [])
-                
-                for r in year_txs:
-                    date_str = str(r[1])
-                    typ = r[2]
-                    aid = r[3]
-                    to_aid = r[4]
-                    amt = float(r[5] or 0)
-                    to_amt = float(r[6] or 0)
-                    qty = float(r[7] or 0)
-                    tx_curr = r[8]
-                    
-                    tx_rate = get_rate(tx_curr if tx_curr else 'CHF', date_str)
-                    
-                    if aid in holdings:
-                        if typ == 'expense':
-                            holdings[aid] -= qty
-                        elif typ == 'income':
-                            holdings[aid] += qty
-                        elif typ == 'transfer':
-                            holdings[aid] -= qty
-                            net_invested_chf -= (amt * tx_rate)
-                            
-                    if to_aid in holdings:
-                        if typ == 'transfer':
-                            holdings[to_aid] += qty
-                            to_curr = inv_map[to_aid]['currency']
-                            to_rate = get_rate(to_curr, date_str)
-                            net_invested_chf += (to_amt * to_rate)
-
-                end_val_chf = 0.0
-                for aid, qty in holdings.items():
-                    price = get_price(aid, eom_str)
-                    rate = get_rate(inv_map[aid]['currency'], eom_str)
-                    
-                    val_native = 0.0
-                    if inv_map[aid]['strat'] == 'Price/Qty':
-                        val_native = qty * price
-                    else:
-                        val_native = price 
-                    
-                    end_val_chf += (val_native * rate)
-                
-                gain = (end_val_chf - start_val_chf) - net_invested_chf
-                
-                history[ym] = {
-                    'net': gain,
-                    'gain': gain if gain > 0 else 0,
-                    'loss': abs(gain) if gain < 0 else 0
-                }
-                
-            return history
+            engine = InvestmentGainsEngine(conn, self.get_rate_index())
+            return engine.gains_history(start_date, end_date, account_ids or None)
         finally:
             conn.close()
 
@@ -3193,38 +2514,29 @@ class BudgetApp:
         """
         conn = self._get_connection()
         try:
-            d_val = conn.execute("""
+            fx_join = self._fx_join_sql('a.currency', 't.date')
+            fx_rate = self._fx_rate_sql('a.currency')
+
+            d_val = conn.execute(f"""
                 SELECT 
                     SUM(
-                        CASE
-                            WHEN a.currency = 'CHF' THEN t.to_amount
-                            ELSE t.to_amount * COALESCE(
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency AND er.date <= t.date ORDER BY er.date DESC LIMIT 1),
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency ORDER BY er.date ASC LIMIT 1),
-                                1.0
-                            )
-                        END
+                        t.to_amount * {fx_rate}
                     )
                 FROM transactions t
                 JOIN accounts a ON t.to_account_id = a.id
+                {fx_join}
                 WHERE t.type = 'transfer' AND t.to_account_id = ?
             """, [account_id]).fetchone()[0]
             deposits = float(d_val) if d_val is not None else 0.0
 
-            w_val = conn.execute("""
+            w_val = conn.execute(f"""
                 SELECT 
                     SUM(
-                        CASE
-                            WHEN a.currency = 'CHF' THEN t.amount
-                            ELSE t.amount * COALESCE(
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency AND er.date <= t.date ORDER BY er.date DESC LIMIT 1),
-                                (SELECT rate FROM exchange_rates er WHERE er.currency = a.currency ORDER BY er.date ASC LIMIT 1),
-                                1.0
-                            )
-                        END
+                        t.amount * {fx_rate}
                     )
                 FROM transactions t
                 JOIN accounts a ON t.account_id = a.id
+                {fx_join}
                 WHERE t.type = 'transfer' AND t.account_id = ?
             """, [account_id]).fetchone()[0]
             withdrawals = float(w_val) if w_val is not None else 0.0
@@ -3266,38 +2578,16 @@ class BudgetApp:
             transactions = conn.execute(
                 tx_query, [start_date, end_date]).fetchall()
 
-            all_rates = conn.execute(
-                "SELECT date, currency, rate FROM exchange_rates ORDER BY date ASC").fetchall()
-
-            rates_history = {}
-            for r_date, r_curr, r_rate in all_rates:
-                if r_curr not in rates_history:
-                    rates_history[r_curr] = []
-                rates_history[r_curr].append((str(r_date), float(r_rate)))
-
-            import bisect
-
-            def get_rate_at(date_str, currency):
-                if currency == 'CHF':
-                    return 1.0
-                history = rates_history.get(currency)
-                if not history:
-                    return 1.0
-
-                idx = bisect.bisect_right(history, (date_str, float('inf')))
-
-                if idx > 0:
-                    return history[idx-1][1]
-
-                return history[0][1]
+            rate_index = self.get_rate_index()
+            tx_rates = rate_index.lookup_mixed(
+                [row[3] for row in transactions], [row[0] for row in transactions])
 
             monthly_data = {}
 
-            for row in transactions:
+            for row, rate in zip(transactions, tx_rates):
                 t_date_str = str(row[0])
                 t_type = row[1]
                 amount = float(row[2]) if row[2] else 0.0
-                currency = row[3]
                 category_name = row[4] if row[4] else "Uncategorized"
                 sub_category_name = row[5] if row[5] else "General"
 
@@ -3312,7 +2602,6 @@ class BudgetApp:
                         'details': {'income': {}, 'expense': {}}
                     }
 
-                rate = get_rate_at(t_date_str, currency)
                 val_chf = amount * rate
 
                 data_ptr = monthly_data[month_key]
@@ -3346,13 +2635,15 @@ class BudgetApp:
             """
             transfers = conn.execute(tf_query, [start_date, end_date]).fetchall()
 
-            for row in transfers:
+            tf_dates = [row[0] for row in transfers]
+            from_rates = rate_index.lookup_mixed([row[3] for row in transfers], tf_dates)
+            to_rates = rate_index.lookup_mixed([row[5] for row in transfers], tf_dates)
+
+            for row, from_rate, to_rate in zip(transfers, from_rates, to_rates):
                 t_date_str = str(row[0])
                 amount = float(row[1]) if row[1] else 0.0
                 to_amount = float(row[2]) if row[2] else 0.0
-                from_curr = row[3]
                 from_is_inv = bool(row[4])
-                to_curr = row[5]
                 to_is_inv = bool(row[6])
 
                 if from_is_inv == to_is_inv:
@@ -3370,12 +2661,10 @@ class BudgetApp:
                     }
 
                 if not from_is_inv and to_is_inv:
-                    rate = get_rate_at(t_date_str, from_curr)
-                    monthly_data[month_key]['invested'] += (amount * rate)
+                    monthly_data[month_key]['invested'] += (amount * from_rate)
                 
                 elif from_is_inv and not to_is_inv:
-                    rate = get_rate_at(t_date_str, to_curr)
-                    monthly_data[month_key]['invested'] -= (to_amount * rate)
+                    monthly_data[month_key]['invested'] -= (to_amount * to_rate)
 
             return monthly_data
 
@@ -0,0 +1,175 @@
+import numpy as np
+
+from rate_index import to_day_numbers
+
+# Composite (account row, day) keys let one searchsorted resolve prices for every account.
+_KEY_SPAN = np.int64(1) << 32
+_DAY_OFFSET = np.int64(1) << 31
+
+
+def asof_matrix(acc_ids, aids, days, values, query_days, backfill: bool = False):
+    """
+    Account x query_days matrix of per-account series values in effect at each day.
+
+    acc_ids must be sorted; (aids, days, values) are the series rows and rows of
+    other accounts are ignored. Days before an account's first row get 0.0, or the
+    earliest value with backfill=True; accounts without rows get 0.0.
+    """
+    result = np.zeros((len(acc_ids), len(query_days)))
+    rows = np.searchsorted(acc_ids, aids)
+    known = (rows < len(acc_ids)) & (acc_ids[np.minimum(rows, len(acc_ids) - 1)] == aids)
+    rows = rows[known]
+    if not len(rows):
+        return result
+    days = np.asarray(days, dtype=np.int64)[known]
+    vals = np.asarray(values, dtype=np.float64)[known]
+
+    order = np.lexsort((days, rows))
+    rows, vals = rows[order], vals[order]
+    keys = rows * _KEY_SPAN + days[order] + _DAY_OFFSET
+
+    acc_rows = np.arange(len(acc_ids), dtype=np.int64)
+    queries = acc_rows[:, None] * _KEY_SPAN + np.asarray(query_days, dtype=np.int64)[None, :] + _DAY_OFFSET
+    idx = np.searchsorted(keys, queries.ravel(), side='right') - 1
+    safe = np.maximum(idx, 0)
+    hit = (idx >= 0) & (rows[safe] == np.repeat(acc_rows, len(query_days)))
+    flat = np.where(hit, vals[safe], 0.0)
+
+    if backfill:
+        first = np.searchsorted(rows, acc_rows, side='left')
+        first_safe = np.minimum(first, len(rows) - 1)
+        has_history = (first < len(rows)) & (rows[first_safe] == acc_rows)
+        earliest = np.repeat(np.where(has_history, vals[first_safe], 0.0), len(query_days))
+        flat = np.where(hit, flat, earliest)
+
+    return flat.reshape(len(acc_ids), len(query_days))
+
+
+class NetWorthEngine:
+    """
+    Month-end net worth of the show_in_balance accounts, computed on NumPy arrays.
+
+    Balance and quantity movements are aggregated per account and month in SQL,
+    turned into an account x month matrix with a cumulative sum, and valued with
+    vectorized as-of lookups of valuations and exchange rates at each month end.
+
+    With backfill=False, dates before an account's first valuation use price 0 and
+    dates before a currency's first rate use 1.0 (net worth history semantics).
+    With backfill=True the earliest known price/rate is used instead.
+    """
+
+    def __init__(self, conn, rate_index):
+        self.conn = conn
+        self.rate_index = rate_index
+
+    def month_end_totals(self, start_date: str, end_date: str, backfill: bool = False):
+        """
+        Returns (month labels 'YYYY-MM', numpy array of CHF totals) for every month
+        from start_date's month to end_date's month. Movements before start_date form
+        the opening balance, movements after end_date are ignored.
+        No months are returned when there are no balance accounts.
+        """
+        months = np.arange(np.datetime64(str(start_date)[:7], 'M'),
+                           np.datetime64(str(end_date)[:7], 'M') + 1)
+        labels = [str(m) for m in months]
+
+        accounts = self.conn.execute("""
+            SELECT id, currency, COALESCE(is_investment, FALSE), valuation_strategy
+            FROM accounts
+            WHERE show_in_balance = TRUE AND id != 0
+            ORDER BY id
+        """).fetchall()
+
+        if not accounts:
+            return [], np.zeros(0)
+        if not len(months):
+            return labels, np.zeros(0)
+
+        acc_ids = np.array([row[0] for row in accounts], dtype=np.int64)
+        is_inv = np.array([bool(row[2]) for row in accounts])
+        price_qty = np.array([row[3] == 'Price/Qty' for row in accounts])
+        eom_days = ((months + 1).astype('datetime64[D]') - 1).astype(np.int64)
+
+        bal, qty = self._positions(acc_ids, len(months), start_date, end_date)
+        prices = self._prices_asof(acc_ids, eom_days, backfill)
+
+        values = bal
+        if is_inv.any():
+            inv_values = np.where(price_qty[:, None], qty * prices,
+                                  np.where(prices > 0, prices, bal))
+            values = np.where(is_inv[:, None], inv_values, bal)
+
+        before = None if backfill else 1.0
+        rates = np.ones((len(acc_ids), len(months)))
+        currencies = np.array([row[1] for row in accounts], dtype=object)
+        for currency in set(currencies.tolist()):
+            rows = currencies == currency
+            rates[rows] = self.rate_index.lookup(currency, eom_days, before)
+
+        return labels, (values * rates).sum(axis=0)
+
+    def _positions(self, acc_ids, n_months, start_date, end_date):
+        """Account x month matrices of month-end balance and quantity."""
+        start = np.datetime64(str(start_date)[:7], 'M').astype(np.int64)
+        data = self.conn.execute("""
+            WITH moves AS (
+                SELECT
+                    t.account_id AS aid,
+                    t.date,
+                    CASE
+                        WHEN t.type='income' THEN t.amount
+                        WHEN t.type='expense' THEN -t.amount
+                        WHEN t.type='transfer' THEN -t.amount
+                        ELSE 0 END AS d_bal,
+                    CASE
+                        WHEN t.type='income' THEN t.qty
+                        WHEN t.type='expense' AND a.is_investment THEN -t.qty
+                        WHEN t.type='transfer' AND a.is_investment THEN -t.qty
+                        ELSE 0 END AS d_qty
+                FROM transactions t
+                JOIN accounts a ON t.account_id = a.id
+                WHERE t.date <= ? AND t.account_id IS NOT NULL
+
+                UNION ALL
+
+                SELECT t.to_account_id, t.date, t.to_amount, t.qty
+                FROM transactions t
+                JOIN accounts a ON t.to_account_id = a.id
+                WHERE t.date <= ? AND t.to_account_id IS NOT NULL AND t.type='transfer'
+            )
+            SELECT
+                aid,
+                CASE WHEN date < ? THEN -1
+                     ELSE (YEAR(date) - 1970) * 12 + MONTH(date) - 1 - ? END AS bucket,
+                CAST(COALESCE(SUM(d_bal), 0) AS DOUBLE) AS d_bal,
+                CAST(COALESCE(SUM(d_qty), 0) AS DOUBLE) AS d_qty
+            FROM moves
+            GROUP BY aid, bucket
+        """, [end_date, end_date, start_date, int(start)]).fetchnumpy()
+
+        aids = np.asarray(data['aid'], dtype=np.int64)
+        buckets = np.asarray(data['bucket'], dtype=np.int64)
+        rows = np.searchsorted(acc_ids, aids)
+        known = (rows < len(acc_ids)) & (acc_ids[np.minimum(rows, len(acc_ids) - 1)] == aids)
+
+        # Column 0 holds the opening position, columns 1..n the monthly movements.
+        bal = np.zeros((len(acc_ids), n_months + 1))
+        qty = np.zeros((len(acc_ids), n_months + 1))
+        cols = buckets[known] + 1
+        np.add.at(bal, (rows[known], cols), np.asarray(data['d_bal'], dtype=np.float64)[known])
+        np.add.at(qty, (rows[known], cols), np.asarray(data['d_qty'], dtype=np.float64)[known])
+
+        return np.cumsum(bal, axis=1)[:, 1:], np.cumsum(qty, axis=1)[:, 1:]
+
+    def _prices_asof(self, acc_ids, eom_days, backfill):
+        """Account x month matrix of the valuation in effect at each month end."""
+        data = self.conn.execute("""
+            SELECT account_id, date, CAST(value AS DOUBLE) AS value
+            FROM investment_valuations
+        """).fetchnumpy()
+
+        aids = np.asarray(data['account_id'], dtype=np.int64)
+        if not len(aids):
+            return np.zeros((len(acc_ids), len(eom_days)))
+        return asof_matrix(acc_ids, aids, to_day_numbers(np.asarray(data['date'])),
+                           data['value'], eom_days, backfill)
@@ -0,0 +1,123 @@
+import bisect
+import threading
+from collections import Counter
+
+# Transaction fields that feed the index; edits to other fields leave it untouched.
+PAYEE_FIELDS = frozenset({'payee', 'category_id', 'date'})
+
+
+class PayeeIndex:
+    """
+    In-memory payee -> category frequency/recency index used for live category
+    prediction and payee prefix suggestions.
+
+    Loaded in bulk with one GROUP BY and kept current with apply() deltas from the
+    transaction mutators. Category ids are resolved to (category, sub_category)
+    names at lookup time, so renames need no rebuild; changes that re-key
+    transactions call invalidate() and the index reloads on next use.
+    """
+
+    def __init__(self, load_rows, category_lookup):
+        self._load_rows = load_rows
+        self._category_lookup = category_lookup
+        self._lock = threading.RLock()
+        self._stats = None        # payee -> {category_id: Counter(day -> count)}
+        self._totals = {}         # payee -> transaction count
+        self._sorted_keys = []    # sorted (casefolded payee, payee)
+        self._best = {}           # payee -> predicted (category, sub_category) or None
+
+    def invalidate(self):
+        with self._lock:
+            self._stats = None
+
+    def load(self):
+        """(Re)build from the load_rows callable: rows of (payee, category_id, day, count)."""
+        with self._lock:
+            stats = {}
+            totals = Counter()
+            for payee, category_id, day, count in self._load_rows():
+                days = stats.setdefault(payee, {}).setdefault(category_id, Counter())
+                days[day] += count
+                totals[payee] += count
+            self._stats = stats
+            self._totals = dict(totals)
+            self._sorted_keys = sorted((payee.casefold(), payee) for payee in stats)
+            self._best = {}
+
+    def _ensure_loaded(self):
+        if self._stats is None:
+            self.load()
+
+    def apply(self, rows, sign: int = 1):
+        """
+        Add (sign=1) or remove (sign=-1) transaction rows starting with
+        (payee, category_id, day); rows without a payee or category are skipped.
+        """
+        if not rows:
+            return
+        with self._lock:
+            if self._stats is None:
+                return
+            for payee, category_id, day, *_ in rows:
+                if not payee or category_id is None:
+                    continue
+                self._best.pop(payee, None)
+                categories = self._stats.get(payee)
+                if categories is None:
+                    if sign < 0:
+                        continue
+                    categories = self._stats[payee] = {}
+                    bisect.insort(self._sorted_keys, (payee.casefold(), payee))
+
+                days = categories.setdefault(category_id, Counter())
+                days[day] += sign
+                if days[day] <= 0:
+                    del days[day]
+                if not days:
+                    del categories[category_id]
+
+                self._totals[payee] = self._totals.get(payee, 0) + sign
+                if not categories:
+                    del self._stats[payee]
+                    self._totals.pop(payee, None)
+                    key = (payee.casefold(), payee)
+                    pos = bisect.bisect_left(self._sorted_keys, key)
+                    if pos < len(self._sorted_keys) and self._sorted_keys[pos] == key:
+                        del self._sorted_keys[pos]
+
+    def predict(self, payee):
+        """Most frequent (category, sub_category) for an exact payee, latest use breaking ties."""
+        with self._lock:
+            self._ensure_loaded()
+            if payee in self._best:
+                return self._best[payee]
+
+            scores = {}
+            for category_id, days in self._stats.get(payee, {}).items():
+                category = self._category_lookup(category_id)
+                if category is None:
+                    continue
+                key = (category.category, category.sub_category)
+                count, last = scores.get(key, (0, None))
+                latest = max(days)
+                scores[key] = (count + sum(days.values()),
+                               latest if last is None else max(last, latest))
+
+            best = max(scores, key=scores.get) if scores else None
+            self._best[payee] = best
+            return best
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """Payees starting with prefix (case-insensitive), most used first."""
+        with self._lock:
+            self._ensure_loaded()
+            folded = prefix.casefold()
+            start = bisect.bisect_left(self._sorted_keys, (folded,))
+            matches = []
+            for pos in range(start, len(self._sorted_keys)):
+                key, payee = self._sorted_keys[pos]
+                if not key.startswith(folded):
+                    break
+                matches.append(payee)
+            matches.sort(key=lambda p: -self._totals.get(p, 0))
+            return matches[:limit]
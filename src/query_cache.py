@@ -0,0 +1,114 @@
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+# Entries kept before the least recently used ones are evicted.
+DEFAULT_MAX_ENTRIES = 256
+
+
+def _freeze(value):
+    """Hashable form of a call argument (lists, sets and dicts included)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class QueryCache:
+    """
+    LRU cache of BudgetApp read results.
+
+    Every table has a data version that mutators bump with invalidate() after
+    committing. An entry is keyed by (method, arguments, versions of the tables
+    the method reads), so a hit can only return data computed from the current
+    state of those tables; entries of invalidated tables are dropped right away.
+    Results are copied on the way out so callers may modify what they get.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()   # key -> (tables, result)
+        self._versions = {}             # table -> version
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def version(self, table: str) -> int:
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def invalidate(self, *tables):
+        """Bump the data version of tables (default: every table) and drop their entries."""
+        with self._lock:
+            self._stats['invalidations'] += 1
+            if not tables:
+                self._entries.clear()
+                tables = tuple(self._versions)
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            changed = set(tables)
+            stale = [key for key, (deps, _) in self._entries.items() if deps & changed]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def call(self, name, tables, compute, args, kwargs, copy_result=copy.deepcopy):
+        """Result of compute(*args, **kwargs), from the cache when the tables are unchanged."""
+        try:
+            key_args = (_freeze(args), _freeze(kwargs))
+            hash(key_args)
+        except TypeError:
+            return compute(*args, **kwargs)
+
+        with self._lock:
+            versions = tuple(self._versions.get(t, 0) for t in tables)
+            key = (name, key_args, versions)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return copy_result(entry[1])
+            self._stats['misses'] += 1
+
+        result = compute(*args, **kwargs)
+
+        with self._lock:
+            # A mutation committed while computing leaves the result unstored.
+            if versions == tuple(self._versions.get(t, 0) for t in tables):
+                self._entries[key] = (frozenset(tables), result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return copy_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = dict(self._stats)
+            result['entries'] = len(self._entries)
+            result['max_entries'] = self.max_entries
+            total = result['hits'] + result['misses']
+            result['hit_ratio'] = (result['hits'] / total) if total else 0.0
+        return result
+
+
+def memoized(*tables, copy_result=copy.deepcopy):
+    """
+    Cache a BudgetApp read method in self._query_cache, keyed by its arguments
+    and the data versions of `tables`. The undecorated method stays available
+    as `.uncached`.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self._query_cache.call(
+                method.__name__, tables, functools.partial(method, self), args, kwargs, copy_result)
+        wrapper.uncached = method
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+def to_day_numbers(dates) -> np.ndarray:
+    """
+    Convert dates (date/datetime objects, 'YYYY-MM-DD' strings or datetime64 values)
+    to int64 day numbers since 1970-01-01.
+    """
+    if isinstance(dates, np.ndarray):
+        if dates.dtype.kind == 'M':
+            return dates.astype('datetime64[D]').astype(np.int64)
+        if dates.dtype.kind in 'iu':
+            return dates.astype(np.int64)
+    values = [str(d)[:10] if not isinstance(d, str) else d[:10] for d in dates]
+    return np.array(values, dtype='datetime64[D]').astype(np.int64)
+
+
+def to_day_number(d) -> int:
+    return int(to_day_numbers([d])[0])
+
+
+class RateIndex:
+    """
+    In-memory as-of index of the exchange_rates table.
+    Keeps one sorted (day numbers, rates) array pair per currency and answers
+    lookups for whole arrays of dates with searchsorted.
+
+    Semantics match the SCD2 rules used across BudgetApp: a rate is valid from its
+    date until the next one, CHF and unknown currencies are 1.0, and dates before
+    the first rate get the earliest rate unless a different `before` value is given.
+    """
+
+    def __init__(self, currencies, days, rates):
+        self._series = {}
+        currencies = np.asarray(currencies, dtype=object)
+        days = np.asarray(days, dtype=np.int64)
+        rates = np.asarray(rates, dtype=np.float64)
+        if len(currencies):
+            order = np.lexsort((days, currencies))
+            currencies, days, rates = currencies[order], days[order], rates[order]
+            bounds = np.flatnonzero(currencies[1:] != currencies[:-1]) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(currencies)]))
+            for s, e in zip(starts, ends):
+                self._series[currencies[s]] = (days[s:e], rates[s:e])
+
+    @classmethod
+    def from_connection(cls, conn):
+        data = conn.execute("""
+            SELECT currency, date, CAST(rate AS DOUBLE) AS rate
+            FROM exchange_rates
+            ORDER BY currency, date
+        """).fetchnumpy()
+        return cls(data['currency'], to_day_numbers(np.asarray(data['date'])), data['rate'])
+
+    def currencies(self):
+        return list(self._series.keys())
+
+    def has(self, currency) -> bool:
+        return currency in self._series
+
+    def history(self, currency):
+        """(day numbers, rates) arrays for a currency, sorted by date."""
+        return self._series.get(currency, (np.empty(0, np.int64), np.empty(0)))
+
+    def lookup(self, currency, dates, before=None) -> np.ndarray:
+        """Rates of one currency at each of `dates`."""
+        days = to_day_numbers(dates)
+        if currency == 'CHF' or currency not in self._series:
+            return np.ones(len(days))
+        s_days, s_rates = self._series[currency]
+        idx = np.searchsorted(s_days, days, side='right') - 1
+        result = s_rates[np.maximum(idx, 0)]
+        if before is not None:
+            result = np.where(idx < 0, float(before), result)
+        return result
+
+    def lookup_mixed(self, currencies, dates, before=None) -> np.ndarray:
+        """Rates for parallel arrays of currencies and dates (one lookup per row)."""
+        days = to_day_numbers(dates)
+        result = np.ones(len(days))
+        if not len(days):
+            return result
+        currencies = np.asarray(currencies, dtype=object)
+        for currency in set(currencies.tolist()):
+            if currency == 'CHF' or currency not in self._series:
+                continue
+            mask = currencies == currency
+            result[mask] = self.lookup(currency, days[mask], before)
+        return result
+
+    def rate_at(self, currency, d, before=None) -> float:
+        if currency == 'CHF' or currency not in self._series:
+            return 1.0
+        return float(self.lookup(currency, [d], before)[0])
+
+    def rates_map(self, d) -> dict:
+        """{currency: rate} for every known currency at date d (CHF included)."""
+        rates = {'CHF': 1.0}
+        for currency in self._series:
+            if currency != 'CHF':
+                rates[currency] = self.rate_at(currency, d)
+        return rates
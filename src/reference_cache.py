@@ -0,0 +1,85 @@
+import threading
+
+
+class ReferenceDataCache:
+    """
+    In-process cache of the accounts and categories tables with lookup maps.
+    Each table is loaded on first use through the given loader and kept until
+    invalidate() is called by a mutator; every invalidation bumps `version`
+    so callers holding derived data can tell it went stale.
+    """
+
+    def __init__(self, load_accounts, load_categories):
+        self._load_accounts = load_accounts
+        self._load_categories = load_categories
+        self._lock = threading.RLock()
+        self.version = 0
+        self._accounts = None
+        self._categories = None
+
+    def invalidate(self, table: str = None):
+        """Drop 'accounts', 'categories' or (default) both."""
+        with self._lock:
+            if table in (None, 'accounts'):
+                self._accounts = None
+            if table in (None, 'categories'):
+                self._categories = None
+            self.version += 1
+
+    def _account_maps(self):
+        with self._lock:
+            if self._accounts is None:
+                accounts = self._load_accounts()
+                by_id = {}
+                by_name_currency = {}
+                by_label = {}
+                for account in accounts:
+                    by_id[account.id] = account
+                    by_name_currency.setdefault((account.account, account.currency), account)
+                    if account.is_active:
+                        by_label.setdefault(f"{account.account} {account.currency}", account)
+                self._accounts = {
+                    'all': accounts,
+                    'active': [a for a in accounts if a.is_active],
+                    'by_id': by_id,
+                    'by_name_currency': by_name_currency,
+                    'by_label': by_label,
+                }
+            return self._accounts
+
+    def _category_maps(self):
+        with self._lock:
+            if self._categories is None:
+                categories = self._load_categories()
+                by_sub = {}
+                for category in categories:
+                    by_sub.setdefault(category.sub_category, category)
+                self._categories = {
+                    'all': categories,
+                    'by_id': {c.id: c for c in categories},
+                    'by_sub': by_sub,
+                }
+            return self._categories
+
+    def accounts(self, show_inactive=False) -> list:
+        maps = self._account_maps()
+        return list(maps['all'] if show_inactive else maps['active'])
+
+    def account(self, account_id):
+        return self._account_maps()['by_id'].get(account_id)
+
+    def account_by_name_currency(self, name, currency):
+        return self._account_maps()['by_name_currency'].get((name, currency))
+
+    def account_by_label(self, label):
+        """Active account from its 'Name Currency' display string."""
+        return self._account_maps()['by_label'].get(label)
+
+    def categories(self) -> list:
+        return list(self._category_maps()['all'])
+
+    def category(self, category_id):
+        return self._category_maps()['by_id'].get(category_id)
+
+    def category_by_sub(self, sub_category):
+        return self._category_maps()['by_sub'].get(sub_category)
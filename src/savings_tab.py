@@ -17,8 +17,13 @@ except ImportError:
     MATPLOTLIB_AVAILABLE = False
 
 
+# Tables the cash flow is computed from; a change to any of them voids the cached result.
+CASHFLOW_TABLES = ('transactions', 'accounts', 'categories', 'exchange_rates')
+CASHFLOW_CACHE = 'cashflow'
+
+
 class SavingsLoaderThread(QThread):
-    finished = pyqtSignal(dict)
+    finished = pyqtSignal(object)
 
     def __init__(self, budget_app, start_date, end_date):
         super().__init__()
@@ -27,8 +32,11 @@ class SavingsLoaderThread(QThread):
         self.end_date = end_date
 
     def run(self):
-        data = self.budget_app.get_cashflow_data(self.start_date, self.end_date)
-        self.finished.emit(data)
+        data, changed = self.budget_app.aggregate_cache.revalidate(
+            CASHFLOW_CACHE, (self.start_date, self.end_date), CASHFLOW_TABLES,
+            lambda: self.budget_app.get_cashflow_data(self.start_date, self.end_date))
+        # None tells the tab that the cached series it shows are current.
+        self.finished.emit(data if changed else None)
 
 
 class SavingsTab(QWidget):
@@ -174,8 +182,13 @@ class SavingsTab(QWidget):
         self.current_start_date = start_str
         self.current_end_date = end_str
 
+        # Draw the series of the last run at once; the loader swaps in fresh ones if the data changed.
+        cached = self.budget_app.aggregate_cache.peek(CASHFLOW_CACHE, (start_str, end_str))
+        if cached is not None:
+            self.show_data(cached)
+        else:
+            self.canvas.setVisible(False)
         self.progress_bar.setVisible(True)
-        self.canvas.setVisible(False)
 
         if hasattr(self, 'loader') and self.loader is not None:
             if self.loader.isRunning():
@@ -197,6 +210,11 @@ class SavingsTab(QWidget):
 
     def on_data_loaded(self, data):
         self.progress_bar.setVisible(False)
+        self.canvas.setVisible(True)
+        if data is not None:
+            self.show_data(data)
+
+    def show_data(self, data):
         self.canvas.setVisible(True)
         self.chart_data = data
         self.plot_graph(data)
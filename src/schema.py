@@ -0,0 +1,254 @@
+import time
+
+import duckdb
+
+import balance_ledger
+
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description VARCHAR,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duration_ms DOUBLE
+    )
+"""
+
+CATEGORIES_DDL = """
+    CREATE TABLE {if_not_exists} {name} (
+        id INTEGER PRIMARY KEY,
+        sub_category VARCHAR NOT NULL,
+        category VARCHAR NOT NULL,
+        category_type VARCHAR DEFAULT 'Expense',
+        UNIQUE(sub_category, category, category_type)
+    )
+"""
+
+TRANSACTIONS_DDL = """
+    CREATE TABLE {if_not_exists} {name} (
+        id INTEGER PRIMARY KEY,
+        date DATE NOT NULL,
+        type VARCHAR NOT NULL,
+        amount DECIMAL(10, 2),
+        account_id INTEGER,
+        category_id INTEGER,
+        payee VARCHAR,
+        notes TEXT,
+        invest_account_id INTEGER,
+        qty DECIMAL(10, 4),
+        to_account_id INTEGER,
+        to_amount DECIMAL(10, 2),
+        confirmed BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY (account_id) REFERENCES accounts(id),
+        FOREIGN KEY (to_account_id) REFERENCES accounts(id),
+        FOREIGN KEY (invest_account_id) REFERENCES accounts(id),
+        FOREIGN KEY (category_id) REFERENCES {categories}(id)
+    )
+"""
+
+BUDGETS_DDL = """
+    CREATE TABLE {if_not_exists} {name} (
+        category_id INTEGER PRIMARY KEY,
+        budget_amount DECIMAL(10, 2) NOT NULL,
+        FOREIGN KEY (category_id) REFERENCES {categories}(id)
+    )
+"""
+
+EXCHANGE_RATES_DDL = """
+    CREATE TABLE IF NOT EXISTS exchange_rates (
+        id INTEGER PRIMARY KEY,
+        date DATE NOT NULL,
+        currency VARCHAR NOT NULL,
+        rate DECIMAL(10, 6) NOT NULL,
+        UNIQUE(date, currency)
+    )
+"""
+
+
+def _table_names(conn):
+    return {t[0] for t in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table'").fetchall()}
+
+
+def _create_base_tables(conn):
+    # Tables that already exist are left alone: on a legacy database their
+    # foreign keys would not bind yet, and that would abort the transaction.
+    existing = _table_names(conn)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY,
+            account VARCHAR NOT NULL,
+            type VARCHAR NOT NULL,
+            company VARCHAR,
+            currency VARCHAR DEFAULT 'CHF',
+            is_investment BOOLEAN DEFAULT FALSE
+        )
+    """)
+    conn.execute(CATEGORIES_DDL.format(if_not_exists="IF NOT EXISTS", name="categories"))
+    if 'transactions' not in existing:
+        conn.execute(TRANSACTIONS_DDL.format(
+            if_not_exists="", name="transactions", categories="categories"))
+    if 'budgets' not in existing:
+        conn.execute(BUDGETS_DDL.format(
+            if_not_exists="", name="budgets", categories="categories"))
+    conn.execute(EXCHANGE_RATES_DDL)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS investment_valuations (
+            id INTEGER PRIMARY KEY,
+            date DATE NOT NULL,
+            account_id INTEGER NOT NULL,
+            value DECIMAL(12, 4) NOT NULL,
+            FOREIGN KEY (account_id) REFERENCES accounts(id),
+            UNIQUE(date, account_id)
+        )
+    """)
+
+
+def _upgrade_legacy_schema(conn):
+    """Finish interrupted table rebuilds, add later account/category columns and give categories an id key."""
+    table_names = _table_names(conn)
+
+    for table, leftover in (('categories', 'categories_new'),
+                            ('transactions', 'transactions_new'),
+                            ('budgets', 'budgets_new_schema'),
+                            ('budgets', 'budgets_new')):
+        if table not in table_names and leftover in table_names:
+            print(f"Recovering {table} table (from {leftover})...")
+            conn.execute(f"ALTER TABLE {leftover} RENAME TO {table}")
+            table_names.add(table)
+
+    conn.execute("DROP TABLE IF EXISTS budgets_new_schema")
+    conn.execute("DROP TABLE IF EXISTS transactions_new")
+    conn.execute("DROP TABLE IF EXISTS categories_new")
+
+    conn.execute(
+        "ALTER TABLE accounts ADD COLUMN IF NOT EXISTS show_in_balance BOOLEAN DEFAULT TRUE")
+    conn.execute(
+        "ALTER TABLE accounts ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE")
+    conn.execute(
+        "ALTER TABLE accounts ADD COLUMN IF NOT EXISTS valuation_strategy VARCHAR DEFAULT NULL")
+    conn.execute(
+        "ALTER TABLE categories ADD COLUMN IF NOT EXISTS category_type VARCHAR DEFAULT 'Expense'")
+
+    columns = conn.execute("PRAGMA table_info(categories)").fetchall()
+    if any(col[1] == 'id' for col in columns):
+        return
+
+    print("Migrating categories to use ID as Primary Key...")
+    conn.execute(CATEGORIES_DDL.format(if_not_exists="", name="categories_new"))
+    conn.execute("""
+        INSERT INTO categories_new (id, sub_category, category, category_type)
+        SELECT row_number() OVER (), sub_category, category, category_type FROM categories
+    """)
+
+    conn.execute(TRANSACTIONS_DDL.format(
+        if_not_exists="", name="transactions_new", categories="categories_new"))
+    conn.execute("""
+        INSERT INTO transactions_new (
+            id, date, type, amount, account_id, category_id, payee, notes,
+            invest_account_id, qty, to_account_id, to_amount, confirmed, created_at
+        )
+        SELECT
+            t.id, t.date, t.type, t.amount, t.account_id, c.id, t.payee, t.notes,
+            t.invest_account_id, t.qty, t.to_account_id, t.to_amount, t.confirmed, t.created_at
+        FROM transactions t
+        LEFT JOIN categories_new c ON t.sub_category = c.sub_category
+    """)
+
+    conn.execute(BUDGETS_DDL.format(
+        if_not_exists="", name="budgets_new_schema", categories="categories_new"))
+    conn.execute("""
+        INSERT INTO budgets_new_schema (category_id, budget_amount)
+        SELECT c.id, b.budget_amount
+        FROM budgets b
+        JOIN categories_new c ON b.sub_category = c.sub_category
+    """)
+
+    conn.execute("DELETE FROM budgets")
+    conn.execute("DELETE FROM transactions")
+    conn.execute("DROP TABLE IF EXISTS budgets CASCADE")
+    conn.execute("DROP TABLE IF EXISTS transactions CASCADE")
+    conn.execute("DROP TABLE IF EXISTS categories CASCADE")
+    conn.execute("DROP TABLE IF EXISTS budgets_new")
+
+    conn.execute(CATEGORIES_DDL.format(if_not_exists="", name="categories"))
+    conn.execute("INSERT INTO categories SELECT * FROM categories_new")
+    conn.execute(BUDGETS_DDL.format(if_not_exists="", name="budgets", categories="categories"))
+    conn.execute("INSERT INTO budgets SELECT * FROM budgets_new_schema")
+    conn.execute(TRANSACTIONS_DDL.format(
+        if_not_exists="", name="transactions", categories="categories"))
+    conn.execute("INSERT INTO transactions SELECT * FROM transactions_new")
+
+    conn.execute("DROP TABLE IF EXISTS budgets_new_schema")
+    conn.execute("DROP TABLE IF EXISTS transactions_new")
+    conn.execute("DROP TABLE IF EXISTS categories_new")
+    print("Categories migration completed!")
+
+
+def _add_starting_balance_account(conn):
+    conn.execute("""
+        INSERT INTO accounts (id, account, type, company, currency, show_in_balance)
+        SELECT 0, 'Starting Balance', 'System', 'System', 'MULTI', FALSE
+        WHERE NOT EXISTS (SELECT 1 FROM accounts WHERE id = 0)
+    """)
+
+
+def _create_balance_ledger(conn):
+    balance_ledger.ensure_table(conn)
+
+
+# Ordered (version, description, migrate(conn)). Append new steps with the next
+# version number; never renumber or edit a released step. Versions 1-4 are the
+# start-up checks older releases ran on every launch and are safe to re-run on
+# databases created before schema_version existed.
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "legacy schema upgrades", _upgrade_legacy_schema),
+    (3, "starting balance account", _add_starting_balance_account),
+    (4, "account daily balance ledger", _create_balance_ledger),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    """Version recorded in schema_version, 0 for a database that predates it."""
+    try:
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    except duckdb.CatalogException:
+        return 0
+
+
+def migrate(conn) -> int:
+    """
+    Bring the schema up to LATEST_VERSION. Pending migrations run in one
+    transaction; on error it is rolled back and the error re-raised.
+    Returns the number of migrations applied.
+    """
+    version = current_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    if not pending:
+        return 0
+
+    started = time.perf_counter()
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(SCHEMA_VERSION_DDL)
+        for number, description, step in pending:
+            step_started = time.perf_counter()
+            step(conn)
+            duration_ms = (time.perf_counter() - step_started) * 1000
+            conn.execute(
+                "INSERT INTO schema_version (version, description, duration_ms) VALUES (?, ?, ?)",
+                [number, description, duration_ms])
+            print(f"Schema migration {number} ({description}): {duration_ms:.1f} ms")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    print(f"Database schema upgraded from version {version} to {LATEST_VERSION} "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return len(pending)
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class SearchIndex:
+    """
+    Lowercase search index of a table.
+
+    Keeps the distinct lowercase cell texts (tokens) and, per row and column,
+    the token of the cell (-1 for no cell). A query is tested once per
+    distinct text instead of once per cell, and a query that extends the
+    previous one (e.g. one more typed character) only re-tests the tokens the
+    previous query matched.
+    """
+
+    def __init__(self, tokens, codes):
+        self.tokens = list(tokens)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self._last_query = None
+        self._last_hits = None
+
+    @classmethod
+    def from_columns(cls, columns, row_count):
+        """Build from [(labels, codes)] per column, as FrameTableModel.column_values() returns."""
+        tokens = []
+        code_columns = []
+        for labels, codes in columns:
+            code_columns.append(np.asarray(codes, dtype=np.int64) + len(tokens))
+            tokens.extend(str(label).lower() for label in labels)
+        if not code_columns:
+            return cls(tokens, np.full((row_count, 1), -1, dtype=np.int64))
+        return cls(tokens, np.column_stack(code_columns))
+
+    @classmethod
+    def from_table(cls, table):
+        """Build from the item texts of a QTableWidget."""
+        rows, cols = table.rowCount(), table.columnCount()
+        token_codes = {}
+        codes = np.full((rows, max(cols, 1)), -1, dtype=np.int64)
+        for row in range(rows):
+            for col in range(cols):
+                item = table.item(row, col)
+                if item is not None:
+                    codes[row, col] = token_codes.setdefault(item.text().lower(), len(token_codes))
+        return cls(token_codes, codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def token_hits(self, query):
+        """Bool per token: whether it contains query (already lowercase)."""
+        if self._last_query is not None and self._last_query in query:
+            candidates = np.flatnonzero(self._last_hits)
+        else:
+            candidates = range(len(self.tokens))
+        hits = np.zeros(len(self.tokens), dtype=bool)
+        tokens = self.tokens
+        for i in candidates:
+            if query in tokens[i]:
+                hits[i] = True
+        self._last_query, self._last_hits = query, hits
+        return hits
+
+    def match(self, query):
+        """Bool per row: whether any of its cells contains query (case-insensitive)."""
+        # Code -1 (no cell) picks the trailing False.
+        hits = np.append(self.token_hits(query.lower()), False)
+        return hits[self.codes].any(axis=1)
+
+
+class TableSearch:
+    """
+    Search box filtering of a QTableWidget.
+
+    The SearchIndex is built on the first search after the table contents
+    changed, and only rows whose visibility changes are touched.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._index = None
+        model = table.model()
+        for signal in (model.modelReset, model.dataChanged, model.rowsInserted,
+                       model.rowsRemoved, model.columnsInserted, model.columnsRemoved,
+                       model.layoutChanged):
+            signal.connect(self.invalidate)
+
+    def invalidate(self, *args):
+        self._index = None
+
+    def filter(self, text):
+        """Show only rows with a cell containing text; empty text shows every row."""
+        table = self.table
+        rows = table.rowCount()
+        if text:
+            if self._index is None or len(self._index) != rows:
+                self._index = SearchIndex.from_table(table)
+            show = self._index.match(text)
+        else:
+            show = np.ones(rows, dtype=bool)
+
+        for row, visible in enumerate(show.tolist()):
+            if table.isRowHidden(row) == visible:
+                table.setRowHidden(row, not visible)
@@ -0,0 +1,101 @@
+import builtins
+import os
+import sys
+import threading
+import time
+
+# Set to 1 to print where start-up time goes (imports per thread, milestones, first paint).
+ENV_FLAG = 'BUDGET_TRACKER_STARTUP_TIMING'
+
+_started = time.perf_counter()
+_enabled = os.environ.get(ENV_FLAG, '') not in ('', '0')
+_original_import = builtins.__import__
+_main_thread = threading.get_ident()
+
+_imports = []   # (on main thread, module, seconds including nested imports, seconds of its own)
+_marks = []     # (label, seconds since start)
+_local = threading.local()   # .stack: nested-import time of this thread's imports in progress
+_reported = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(0.0)
+    begin = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - begin
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        _imports.append((threading.get_ident() == _main_thread, name, elapsed, elapsed - nested))
+
+
+def install():
+    """Time first imports of modules from now on, if the env flag is set."""
+    if _enabled and builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+def mark(label):
+    """Record a start-up milestone."""
+    if _enabled:
+        _marks.append((label, time.perf_counter() - _started))
+
+
+def report_on_first_paint(widget):
+    """Print the report once `widget` has painted for the first time."""
+    if not _enabled:
+        return
+    from PyQt6.QtCore import QObject, QEvent
+
+    class _FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                obj.removeEventFilter(self)
+                mark('first paint')
+                report()
+            return False
+
+    widget._first_paint_filter = _FirstPaint(widget)
+    widget.installEventFilter(widget._first_paint_filter)
+
+
+def _print_imports(heading, imports, top):
+    total = sum(own for _, _, own in imports)
+    print(f"{heading} ({len(imports)} modules imported in {total * 1000:.0f} ms)")
+    print(f"{'module':<40} {'total ms':>9} {'self ms':>9}")
+    for name, inclusive, own in sorted(imports, key=lambda i: i[1], reverse=True)[:top]:
+        print(f"{name:<40} {inclusive * 1000:>9.1f} {own * 1000:>9.1f}")
+    print("-" * 60)
+
+
+def report(top=20):
+    """
+    Print the slowest imports and the milestones, once. Imports made on other
+    threads (the database loader) are listed separately: they overlap the
+    main thread's, so their times do not add up to the start-up time.
+    """
+    global _reported
+    if not _enabled or _reported:
+        return
+    _reported = True
+    builtins.__import__ = _original_import
+
+    imports = list(_imports)
+    print("\n" + "=" * 60)
+    print("STARTUP TIMING")
+    _print_imports("Main thread", [i[1:] for i in imports if i[0]], top)
+    _print_imports("Other threads", [i[1:] for i in imports if not i[0]], top)
+    for label, at in _marks:
+        print(f"{label:<40} {at * 1000:>9.1f} ms")
+    print("=" * 60)
@@ -0,0 +1,85 @@
+import threading
+from collections import Counter
+
+# Transaction fields that feed the counts; edits to other fields leave them untouched.
+COUNT_FIELDS = frozenset({'account_id', 'to_account_id', 'category_id', 'payee'})
+
+
+class TransactionCounts:
+    """
+    Maintained transaction counts per account, category and payee, as returned
+    by BudgetApp.get_transaction_counts().
+
+    Loaded with one GROUP BY and kept current with apply() deltas from the
+    transaction mutators, so reading the counts after an insert costs no query.
+    Categories are counted by id and reported by sub_category at read time.
+    """
+
+    def __init__(self, load_rows, category_lookup):
+        self._load_rows = load_rows
+        self._category_lookup = category_lookup
+        self._lock = threading.RLock()
+        self._accounts = None
+        self._categories = Counter()
+        self._payees = Counter()
+
+    def invalidate(self):
+        with self._lock:
+            self._accounts = None
+
+    def load(self):
+        """(Re)build from rows of (account_id, to_account_id, category_id, payee, count)."""
+        with self._lock:
+            accounts, categories, payees = Counter(), Counter(), Counter()
+            for account_id, to_account_id, category_id, payee, count in self._load_rows():
+                self._add(accounts, categories, payees,
+                          account_id, to_account_id, category_id, payee, count)
+            self._accounts, self._categories, self._payees = accounts, categories, payees
+
+    @staticmethod
+    def _add(accounts, categories, payees, account_id, to_account_id, category_id, payee, count):
+        # Same rules as the original GROUP BYs: both account columns count,
+        # payees exclude NULL and ''.
+        if account_id is not None:
+            accounts[account_id] += count
+        if to_account_id is not None:
+            accounts[to_account_id] += count
+        if category_id is not None:
+            categories[category_id] += count
+        if payee:
+            payees[payee] += count
+
+    def apply(self, rows, sign: int = 1):
+        """
+        Add (sign=1) or remove (sign=-1) transaction rows of
+        (payee, category_id, day, account_id, to_account_id).
+        """
+        if not rows:
+            return
+        with self._lock:
+            if self._accounts is None:
+                return
+            for payee, category_id, _, account_id, to_account_id in rows:
+                self._add(self._accounts, self._categories, self._payees,
+                          account_id, to_account_id, category_id, payee, sign)
+                if sign < 0:
+                    for counter, key in ((self._accounts, account_id), (self._accounts, to_account_id),
+                                         (self._categories, category_id), (self._payees, payee)):
+                        if key in counter and counter[key] <= 0:
+                            del counter[key]
+
+    def snapshot(self) -> dict:
+        """{'accounts': {id: n}, 'categories': {sub_category: n}, 'payees': {payee: n}}"""
+        with self._lock:
+            if self._accounts is None:
+                self.load()
+            categories = {}
+            for category_id, count in self._categories.items():
+                category = self._category_lookup(category_id)
+                if category is not None:
+                    categories[category.sub_category] = categories.get(category.sub_category, 0) + count
+            return {
+                'accounts': dict(self._accounts),
+                'categories': categories,
+                'payees': dict(self._payees),
+            }
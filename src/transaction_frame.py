@@ -0,0 +1,225 @@
+import numpy as np
+
+# Column name -> numpy dtype. Nullable columns carry a separate null mask.
+TRANSACTION_COLUMNS = {
+    'id': np.int64,
+    'date': 'datetime64[D]',
+    'type': object,
+    'sub_category': object,
+    'amount': np.float64,
+    'account_id': np.int64,
+    'payee': object,
+    'notes': object,
+    'invest_account_id': np.int64,
+    'qty': np.float64,
+    'to_account_id': np.int64,
+    'to_amount': np.float64,
+    'confirmed': bool,
+}
+
+# SELECT list matching TRANSACTION_COLUMNS for queries over transactions t / categories c.
+TRANSACTION_SELECT = """
+    t.id, t.date, t.type, c.sub_category,
+    CAST(t.amount AS DOUBLE) AS amount, t.account_id,
+    t.payee, t.notes, t.invest_account_id,
+    CAST(t.qty AS DOUBLE) AS qty, t.to_account_id,
+    CAST(t.to_amount AS DOUBLE) AS to_amount, t.confirmed
+"""
+
+
+def _column(values, dtype):
+    """(data array, null mask) from a fetchnumpy column."""
+    mask = np.ma.getmaskarray(values)
+    data = np.ma.getdata(values)
+    if dtype == 'datetime64[D]':
+        if data.dtype.kind == 'M':
+            data = data.astype('datetime64[D]')
+        else:
+            data = np.array([str(v)[:10] if v is not None else 'NaT' for v in data],
+                            dtype='datetime64[D]')
+    elif dtype is object:
+        data = np.asarray(data, dtype=object).copy()
+        data[mask] = None
+    else:
+        data = np.asarray(data)
+        if len(data) and mask.any():
+            data = data.copy()
+            data[mask] = 0
+        data = data.astype(dtype)
+    return data, mask.copy()
+
+
+class TransactionRow:
+    """
+    Lazy view of one row of a TransactionFrame with the attributes of Transaction.
+    Values are converted to plain Python objects on access; assigning an attribute
+    writes through to the frame so every view of the row sees the edit.
+    """
+    __slots__ = ('_frame', '_pos')
+
+    def __init__(self, frame, pos):
+        object.__setattr__(self, '_frame', frame)
+        object.__setattr__(self, '_pos', pos)
+
+    def __getattr__(self, name):
+        return self._frame.value(name, self._pos)
+
+    def __setattr__(self, name, value):
+        self._frame.set_value(name, self._pos, value)
+
+    def __eq__(self, other):
+        return (isinstance(other, TransactionRow) and other._frame is self._frame
+                and other._pos == self._pos)
+
+    def __hash__(self):
+        return hash((id(self._frame), self._pos))
+
+    def __repr__(self):
+        return f"TransactionRow(id={self.id}, date={self.date}, type={self.type})"
+
+    def as_dict(self) -> dict:
+        return {name: self._frame.value(name, self._pos) for name in self._frame.names()}
+
+
+class TransactionFrame:
+    """
+    Columnar transaction result set.
+
+    Holds one typed numpy array per column (day-precision dates, float amounts,
+    int64 ids) plus null masks, so totals and filters can work on whole columns
+    while existing callers keep iterating rows as TransactionRow views.
+    Extra result columns (e.g. running_balance) are kept as float columns.
+    """
+
+    def __init__(self, columns: dict, nulls: dict = None, date_as_str: bool = False):
+        self.columns = columns
+        self.nulls = nulls or {}
+        self.date_as_str = date_as_str
+        self._positions = None
+
+    @classmethod
+    def from_numpy(cls, data: dict, date_as_str: bool = False):
+        """Build from a DuckDB fetchnumpy() result whose columns include TRANSACTION_COLUMNS."""
+        columns = {}
+        nulls = {}
+        for name, values in data.items():
+            dtype = TRANSACTION_COLUMNS.get(name, np.float64)
+            columns[name], mask = _column(values, dtype)
+            if mask.any():
+                nulls[name] = mask
+        return cls(columns, nulls, date_as_str)
+
+    @classmethod
+    def empty(cls, date_as_str: bool = False):
+        columns = {name: np.empty(0, dtype=dtype) for name, dtype in TRANSACTION_COLUMNS.items()}
+        return cls(columns, {}, date_as_str)
+
+    def names(self):
+        return [name for name in TRANSACTION_COLUMNS if name in self.columns]
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield TransactionRow(self, pos)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            pos = int(key)
+            if pos < 0:
+                pos += len(self)
+            if not 0 <= pos < len(self):
+                raise IndexError('transaction index out of range')
+            return TransactionRow(self, pos)
+        return self.take(np.arange(len(self))[key])
+
+    def take(self, positions):
+        """Sub-frame of the rows at `positions` (int indices or boolean mask)."""
+        positions = np.asarray(positions)
+        if positions.dtype == bool:
+            positions = np.flatnonzero(positions)
+        columns = {name: values[positions] for name, values in self.columns.items()}
+        nulls = {name: mask[positions] for name, mask in self.nulls.items()}
+        return TransactionFrame(columns, nulls, self.date_as_str)
+
+    def copy(self):
+        """Independent copy; edits through either frame's rows leave the other untouched."""
+        columns = {name: values.copy() for name, values in self.columns.items()}
+        nulls = {name: mask.copy() for name, mask in self.nulls.items()}
+        return TransactionFrame(columns, nulls, self.date_as_str)
+
+    def column(self, name, fill=None):
+        """
+        Typed array of a column. With `fill`, NULL entries are replaced by it;
+        numeric columns default to NaN for NULL.
+        """
+        values = self.columns[name]
+        mask = self.nulls.get(name)
+        if mask is None or not mask.any():
+            return values
+        if fill is None and values.dtype.kind == 'f':
+            fill = np.nan
+        if fill is None:
+            return values
+        out = values.astype(np.result_type(values.dtype, np.asarray(fill).dtype), copy=True)
+        out[mask] = fill
+        return out
+
+    def is_null(self, name):
+        mask = self.nulls.get(name)
+        return mask if mask is not None else np.zeros(len(self), dtype=bool)
+
+    def day_numbers(self):
+        """Dates as int64 days since 1970-01-01."""
+        return self.columns['date'].astype(np.int64)
+
+    def position_of(self, trans_id):
+        """Row position of a transaction id, or None."""
+        if self._positions is None:
+            self._positions = {int(i): pos for pos, i in enumerate(self.columns['id'])}
+        return self._positions.get(int(trans_id))
+
+    def row_by_id(self, trans_id):
+        pos = self.position_of(trans_id)
+        return TransactionRow(self, pos) if pos is not None else None
+
+    def value(self, name, pos):
+        values = self.columns.get(name)
+        if values is None:
+            raise AttributeError(name)
+        mask = self.nulls.get(name)
+        if mask is not None and mask[pos]:
+            return None
+        value = values[pos]
+        if name == 'date':
+            return str(value) if self.date_as_str else value.item()
+        return value.item() if isinstance(value, np.generic) else value
+
+    def set_value(self, name, pos, value):
+        values = self.columns.get(name)
+        if values is None:
+            # Attributes outside the result set (e.g. category_id) get an object column.
+            values = self.columns[name] = np.full(len(self), None, dtype=object)
+            self._null_mask(name)[:] = True
+        if value is None:
+            if values.dtype == object:
+                values[pos] = None
+            self._null_mask(name)[pos] = True
+            return
+        if name == 'date':
+            values[pos] = np.datetime64(str(value)[:10], 'D')
+        else:
+            values[pos] = value
+        if name in self.nulls:
+            self.nulls[name][pos] = False
+        if name == 'id':
+            self._positions = None
+
+    def _null_mask(self, name):
+        if name not in self.nulls:
+            self.nulls[name] = np.zeros(len(self), dtype=bool)
+        return self.nulls[name]
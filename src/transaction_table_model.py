@@ -0,0 +1,553 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex
+from PyQt6.QtGui import QColor
+import numpy as np
+from transaction_frame import TransactionFrame
+from search_index import SearchIndex
+from utils import format_currency
+
+
+TOTAL_ROW_ROLE = Qt.ItemDataRole.UserRole + 1
+FILTER_DATA_ROLE = Qt.ItemDataRole.UserRole + 99
+
+TRANSACTION_HEADERS = [
+    'ID', 'Date', 'Type', 'Amount', 'Amount To', 'Qty', 'Account', 'Account To', 'Inv. Acc', 'Payee',
+    'Category', 'Notes', 'Confirmed', 'Delete'
+]
+
+CONFIRMED_COLUMN = 12
+DELETE_COLUMN = 13
+
+PERSPECTIVE_HEADERS = [
+    'Date', 'Type', 'Category', 'Payee',
+    'Other Account', 'Notes', 'Transaction Amount', 'Running Balance',
+    'Confirmed', 'Delete'
+]
+
+PERSPECTIVE_CONFIRMED_COLUMN = 8
+PERSPECTIVE_DELETE_COLUMN = 9
+
+TYPE_COLORS = {
+    'income': QColor(230, 255, 230),
+    'expense': QColor(255, 230, 230),
+    'transfer': QColor(230, 230, 255),
+    'investment': QColor(255, 255, 230)
+}
+
+_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+_CENTER = Qt.AlignmentFlag.AlignCenter
+_READ_ONLY = QColor(245, 245, 245)
+
+
+class FrameTableModel(QAbstractTableModel):
+    """
+    Base table model over a TransactionFrame.
+
+    Cells are formatted on demand from the frame's column arrays, so only the
+    rows on screen are ever turned into text. Edits are handed to
+    edit_handler(row, column, text), which validates and saves them and calls
+    refresh_row() once the frame holds the new value.
+    Subclasses define HEADERS, display_text(), _column_source() and sort_keys().
+    """
+
+    HEADERS = []
+    # Columns the search box matches against.
+    SEARCH_COLUMNS = ()
+    # Checkbox column whose header filter values are "Yes"/"No".
+    CHECK_COLUMN = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frame = TransactionFrame.empty()
+        self.accounts_map = {}
+        self.edit_handler = None
+        self.header_tooltips = {}
+        self._codes = {}
+        self._search_index = None
+
+    def set_transactions(self, frame, accounts_map):
+        """Show `frame`; accounts_map maps account id -> account label."""
+        self.beginResetModel()
+        self.frame = frame
+        self.accounts_map = accounts_map
+        self._codes = {}
+        self._search_index = None
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.frame)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation != Qt.Orientation.Horizontal or not 0 <= section < len(self.HEADERS):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.header_tooltips.get(section)
+        return None
+
+    def transaction_id(self, row):
+        return int(self.frame.columns['id'][row])
+
+    def row_type(self, row):
+        return self.frame.columns['type'][row]
+
+    def is_confirmed(self, row):
+        return bool(self.frame.columns['confirmed'][row])
+
+    def is_total_row(self, row):
+        return False
+
+    def total_rows(self):
+        """Boolean mask of rows pinned to the top when sorting."""
+        return np.zeros(len(self.frame), dtype=bool)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or self.edit_handler is None:
+            return False
+        return bool(self.edit_handler(index.row(), index.column(), str(value).strip()))
+
+    def refresh_row(self, row):
+        """Repaint one row after its frame values changed (or an edit was rejected)."""
+        self._codes = {}
+        self._search_index = None
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def display_text(self, row, column):
+        return ""
+
+    def _text_column(self, name, transform=None):
+        values = self.frame.columns[name]
+        return np.array([transform(v or "") if transform else (v or "") for v in values], dtype=object)
+
+    def _column_source(self, column):
+        """(values, formatter) behind a display column; formatter turns one value into its cell text."""
+        return np.arange(len(self.frame)), lambda row: self.display_text(int(row), column)
+
+    def column_values(self, column):
+        """
+        Sorted distinct cell texts of a column and, per row, the index of its text,
+        so sorting and searching work on integer codes instead of cell strings.
+        """
+        cached = self._codes.get(column)
+        if cached is None:
+            values, fmt = self._column_source(column)
+            distinct, inverse = np.unique(values, return_inverse=True)
+            texts = np.array([fmt(v) for v in distinct], dtype=object)
+            labels, text_codes = np.unique(texts, return_inverse=True)
+            cached = self._codes[column] = (labels, text_codes[inverse.ravel()])
+        return cached
+
+    def filter_values(self, column):
+        """(labels, codes) of the values the header filter compares, as in FILTER_DATA_ROLE."""
+        if column == self.CHECK_COLUMN:
+            return np.array(["No", "Yes"], dtype=object), self.frame.columns['confirmed'].astype(np.int64)
+        return self.column_values(column)
+
+    def sort_keys(self, column):
+        """Array ordering the rows by `column` the way the table items used to compare."""
+        return self.column_values(column)[1]
+
+    def search_mask(self, text):
+        """Rows where any searchable column contains `text` (case-insensitive)."""
+        if self._search_index is None:
+            self._search_index = SearchIndex.from_columns(
+                [self.column_values(column) for column in self.SEARCH_COLUMNS], len(self.frame))
+        return self._search_index.match(text)
+
+
+class TransactionTableModel(FrameTableModel):
+    """Model of the TransactionsDialog table: one row per transaction."""
+
+    HEADERS = TRANSACTION_HEADERS
+    SEARCH_COLUMNS = range(CONFIRMED_COLUMN)
+    CHECK_COLUMN = CONFIRMED_COLUMN
+
+    def _account_label(self, name, row):
+        if self.frame.is_null(name)[row]:
+            return ""
+        return self.accounts_map.get(int(self.frame.columns[name][row]), "")
+
+    def _number_text(self, name, row, fmt):
+        if self.frame.is_null(name)[row]:
+            return ""
+        return fmt(float(self.frame.columns[name][row]))
+
+    def display_text(self, row, column):
+        frame = self.frame
+        if column == 0:
+            return str(frame.columns['id'][row])
+        if column == 1:
+            return str(frame.columns['date'][row])
+        if column == 2:
+            return str.title(frame.columns['type'][row] or "")
+        if column == 3:
+            return self._number_text('amount', row, format_currency)
+        if column == 4:
+            return self._number_text('to_amount', row, format_currency)
+        if column == 5:
+            return self._number_text('qty', row, lambda v: f"{v:.4f}")
+        if column == 6:
+            return self._account_label('account_id', row)
+        if column == 7:
+            return self._account_label('to_account_id', row)
+        if column == 8:
+            return self._account_label('invest_account_id', row)
+        if column == 9:
+            return frame.columns['payee'][row] or ""
+        if column == 10:
+            return frame.columns['sub_category'][row] or ""
+        if column == 11:
+            return frame.columns['notes'][row] or ""
+        return ""
+
+    def edit_text(self, row, column):
+        """Text put into an editor; amounts are edited without thousands separators."""
+        if column == 3:
+            return self._number_text('amount', row, lambda v: f"{v:.2f}")
+        if column == 4:
+            return self._number_text('to_amount', row, lambda v: f"{v:.2f}")
+        return self.display_text(row, column)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column >= CONFIRMED_COLUMN:
+                return None
+            return self.display_text(row, column)
+        if role == Qt.ItemDataRole.EditRole:
+            return self.edit_text(row, column)
+        if role == Qt.ItemDataRole.CheckStateRole:
+            if column == CONFIRMED_COLUMN:
+                return Qt.CheckState.Checked if self.is_confirmed(row) else Qt.CheckState.Unchecked
+            return None
+        if role == FILTER_DATA_ROLE:
+            if column == CONFIRMED_COLUMN:
+                return "Yes" if self.is_confirmed(row) else "No"
+            return None
+        if role == Qt.ItemDataRole.BackgroundRole:
+            color = TYPE_COLORS.get(self.row_type(row))
+            if color is None and column == 0:
+                return QColor(240, 240, 240)
+            if color is None and not self.flags(index) & Qt.ItemFlag.ItemIsEditable:
+                return _READ_ONLY
+            return color
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if column == 0:
+                return _CENTER
+            if column in (3, 4, 5):
+                return _RIGHT
+            return None
+        if role == TOTAL_ROW_ROLE:
+            return self.is_total_row(row) if column == 0 else None
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        base = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        column = index.column()
+        if column in (0, 2, CONFIRMED_COLUMN, DELETE_COLUMN):
+            return base
+
+        trans_type = self.row_type(index.row())
+        if column in (4, 7) and trans_type != 'transfer':
+            return base
+        if column == 8 and trans_type not in ('investment', 'income', 'expense'):
+            return base
+        if column in (9, 10) and trans_type == 'transfer':
+            return base
+        return base | Qt.ItemFlag.ItemIsEditable
+
+    def _column_source(self, column):
+        frame = self.frame
+        if column == 0:
+            return frame.columns['id'], str
+        if column == 1:
+            return frame.columns['date'], str
+        if column == 2:
+            return self._text_column('type', str.title), str
+        if column in (3, 4, 5):
+            name = {3: 'amount', 4: 'to_amount', 5: 'qty'}[column]
+            fmt = format_currency if column != 5 else (lambda v: f"{v:.4f}")
+            return frame.column(name), lambda v: "" if np.isnan(v) else fmt(float(v))
+        if column in (6, 7, 8):
+            name = {6: 'account_id', 7: 'to_account_id', 8: 'invest_account_id'}[column]
+            return frame.column(name, fill=-1), lambda v: self.accounts_map.get(int(v), "")
+        name = {9: 'payee', 10: 'sub_category', 11: 'notes'}[column]
+        return self._text_column(name), str
+
+    def sort_keys(self, column):
+        frame = self.frame
+        if column == 0:
+            return frame.columns['id']
+        if column == 1:
+            return frame.day_numbers()
+        if column in (3, 4, 5):
+            name = {3: 'amount', 4: 'to_amount', 5: 'qty'}[column]
+            return frame.column(name, fill=0.0)
+        if column == CONFIRMED_COLUMN:
+            return frame.columns['confirmed'].astype(np.int8)
+        if column == DELETE_COLUMN:
+            return np.zeros(len(frame), dtype=np.int8)
+        return self.column_values(column)[1]
+
+
+class AccountPerspectiveModel(FrameTableModel):
+    """
+    Model of the AccountPerspectiveDialog table: the transactions of one
+    account seen from that account, with the signed amount, the counterparty
+    and the running balance the period query returned.
+    """
+
+    HEADERS = PERSPECTIVE_HEADERS
+    SEARCH_COLUMNS = range(PERSPECTIVE_CONFIRMED_COLUMN)
+    CHECK_COLUMN = PERSPECTIVE_CONFIRMED_COLUMN
+
+    _EDITABLE = (0, 2, 3, 5, 6)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.account_id = None
+        self._incoming = np.empty(0, dtype=bool)
+        self._amount = np.empty(0)
+        self._other = np.empty(0, dtype=np.int64)
+
+    def set_period(self, frame, account_id, accounts_map):
+        """Show the rows of `frame` that move account_id's balance."""
+        types = frame.columns['type']
+        on_account = frame.column('account_id', fill=-1) == account_id
+        to_account = frame.column('to_account_id', fill=-1) == account_id
+        transfer = types == 'transfer'
+        keep = (((types == 'income') | (types == 'expense')) & on_account) | (transfer & (on_account | to_account))
+        keep &= ~frame.is_null('type') & (types != '') & ~frame.is_null('amount')
+        frame = frame.take(keep)
+
+        on_account = frame.column('account_id', fill=-1) == account_id
+        transfer = frame.columns['type'] == 'transfer'
+        self.account_id = account_id
+        self._incoming = (frame.columns['type'] == 'income') | (transfer & ~on_account)
+        self._amount = np.abs(np.where(on_account, frame.column('amount', fill=0.0),
+                                       frame.column('to_amount', fill=0.0)))
+        self._other = np.where(transfer & on_account, frame.column('to_account_id', fill=-1),
+                               np.where(transfer, frame.column('account_id', fill=-1), -1))
+        self.set_transactions(frame, accounts_map)
+
+    def signed_amounts(self):
+        return np.where(self._incoming, self._amount, -self._amount)
+
+    def running_balance(self, row):
+        return float(self.frame.columns['running_balance'][row])
+
+    def display_text(self, row, column):
+        frame = self.frame
+        if column == 0:
+            return str(frame.columns['date'][row])
+        if column == 1:
+            return str(frame.columns['type'][row]).capitalize()
+        if column == 2:
+            return frame.columns['sub_category'][row] or ""
+        if column == 3:
+            return frame.columns['payee'][row] or ""
+        if column == 4:
+            return self.accounts_map.get(int(self._other[row]), "")
+        if column == 5:
+            return frame.columns['notes'][row] or ""
+        if column == 6:
+            effect = "+" if self._incoming[row] else "-"
+            return f"{effect}{format_currency(self._amount[row])}"
+        if column == 7:
+            return format_currency(self.running_balance(row))
+        return ""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column >= PERSPECTIVE_CONFIRMED_COLUMN:
+                return None
+            return self.display_text(row, column)
+        if role == Qt.ItemDataRole.CheckStateRole:
+            if column == PERSPECTIVE_CONFIRMED_COLUMN:
+                return Qt.CheckState.Checked if self.is_confirmed(row) else Qt.CheckState.Unchecked
+            return None
+        if role == FILTER_DATA_ROLE:
+            if column == PERSPECTIVE_CONFIRMED_COLUMN:
+                return "Yes" if self.is_confirmed(row) else "No"
+            return None
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if column == 6:
+                return QColor("#2e7d32") if self._incoming[row] else QColor("#c62828")
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return _RIGHT if column in (6, 7) else None
+        if role == Qt.ItemDataRole.UserRole:
+            return self.transaction_id(row) if column == 0 else None
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        base = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() in self._EDITABLE:
+            return base | Qt.ItemFlag.ItemIsEditable
+        return base
+
+    def _column_source(self, column):
+        frame = self.frame
+        if column == 0:
+            return frame.columns['date'], str
+        if column == 1:
+            return self._text_column('type'), lambda v: str(v).capitalize()
+        if column == 4:
+            return self._other, lambda v: self.accounts_map.get(int(v), "")
+        if column in (2, 3, 5):
+            return self._text_column({2: 'sub_category', 3: 'payee', 5: 'notes'}[column]), str
+        return super()._column_source(column)
+
+    def sort_keys(self, column):
+        frame = self.frame
+        if column == 0:
+            return frame.day_numbers()
+        if column == 6:
+            return self.signed_amounts()
+        if column == 7:
+            if 'running_balance' not in frame.columns:
+                return np.zeros(len(frame))
+            return frame.column('running_balance', fill=0.0)
+        if column == PERSPECTIVE_CONFIRMED_COLUMN:
+            return frame.columns['confirmed'].astype(np.int8)
+        if column == PERSPECTIVE_DELETE_COLUMN:
+            return np.zeros(len(frame), dtype=np.int8)
+        return self.column_values(column)[1]
+
+
+class TransactionSortProxyModel(QAbstractProxyModel):
+    """
+    Sorting and filtering proxy for flat table models that provide
+    sort_keys(column) and total_rows().
+
+    The visible rows are kept as one array of source rows, ordered with a
+    stable numpy argsort instead of per-pair lessThan callbacks, so sorting
+    and filtering 100k rows stays well under a second. Total rows always
+    stay at the top and are never filtered out.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._view_of = np.empty(0, dtype=np.int64)
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._masks = {}
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(self._on_source_reset)
+        model.dataChanged.connect(self._on_source_data_changed)
+        self._on_source_reset()
+
+    def _on_source_reset(self):
+        self.beginResetModel()
+        self._masks = {}
+        self._rebuild()
+        self.endResetModel()
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            view_row = self._view_of[row] if row < len(self._view_of) else -1
+            if view_row >= 0:
+                self.dataChanged.emit(self.index(int(view_row), top_left.column()),
+                                      self.index(int(view_row), bottom_right.column()), roles)
+
+    def _rebuild(self):
+        source = self.sourceModel()
+        n = source.rowCount() if source is not None else 0
+        if n == 0:
+            self._rows = np.empty(0, dtype=np.int64)
+            self._view_of = np.empty(0, dtype=np.int64)
+            return
+
+        if self._sort_column < 0:
+            order = np.arange(n, dtype=np.int64)
+        else:
+            keys = source.sort_keys(self._sort_column)
+            if self._sort_order == Qt.SortOrder.DescendingOrder:
+                # Stable descending: equal keys keep their source order.
+                order = (n - 1 - np.argsort(keys[::-1], kind='stable'))[::-1]
+            else:
+                order = np.argsort(keys, kind='stable')
+
+        totals = source.total_rows()
+        accepted = np.ones(n, dtype=bool)
+        for mask in self._masks.values():
+            accepted &= mask
+        accepted |= totals
+
+        keep = accepted[order]
+        pinned = totals[order]
+        self._rows = np.concatenate([order[keep & pinned], order[keep & ~pinned]]).astype(np.int64)
+        self._view_of = np.full(n, -1, dtype=np.int64)
+        self._view_of[self._rows] = np.arange(len(self._rows))
+
+    def set_row_mask(self, name, mask):
+        """Show only source rows where mask is True (None removes the named mask)."""
+        self.beginResetModel()
+        if mask is None:
+            self._masks.pop(name, None)
+        else:
+            self._masks[name] = np.asarray(mask, dtype=bool)
+        self._rebuild()
+        self.endResetModel()
+
+    def source_rows(self):
+        """Source rows currently shown, in view order."""
+        return self._rows
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        sources = [self.mapToSource(index) for index in persistent]
+        self._rebuild()
+        self.changePersistentIndexList(persistent, [self.mapFromSource(s) for s in sources])
+        self.layoutChanged.emit()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        source = self.sourceModel()
+        return 0 if parent.isValid() or source is None else source.columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self._rows) and 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._rows):
+            return QModelIndex()
+        return self.sourceModel().index(int(self._rows[proxy_index.row()]), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid() or source_index.row() >= len(self._view_of):
+            return QModelIndex()
+        view_row = int(self._view_of[source_index.row()])
+        if view_row < 0:
+            return QModelIndex()
+        return self.index(view_row, source_index.column())
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
@@ -1,14 +1,16 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QTableWidget, QTableWidgetItem,
-                             QCheckBox, QHeaderView, QWidget, QMessageBox,
-                             QProgressBar)
-from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
-from PyQt6.QtGui import QColor
+                             QPushButton, QTableWidgetItem,
+                             QTableView, QAbstractItemView, QCheckBox,
+                             QHeaderView, QMessageBox, QProgressBar)
+from PyQt6.QtCore import Qt, QTimer, QThread, QItemSelectionModel, pyqtSignal
 import datetime
+import numpy as np
 from delegates import ComboBoxDelegate, DateDelegate
-from delegates import ComboBoxDelegate, DateDelegate
+from delegates import CheckBoxDelegate, DeleteButtonDelegate
 from utils import safe_eval_math, format_currency
 from excel_filter import ExcelHeaderView
+from transaction_frame import TransactionFrame
+from transaction_table_model import TransactionTableModel, TransactionSortProxyModel
 import re
 from custom_widgets import NoScrollComboBox
 
@@ -16,9 +18,6 @@ from custom_widgets import NoScrollComboBox
 TOTAL_ROW_ROLE = Qt.ItemDataRole.UserRole + 1
 
 
-TOTAL_ROW_ROLE = Qt.ItemDataRole.UserRole + 1
-
-
 class TotalAwareTableWidgetItem(QTableWidgetItem):
     """Base class that ensures the Total row stays at the top/bottom as pinned."""
 
@@ -99,7 +98,7 @@ class ConfirmedTableWidgetItem(TotalAwareTableWidgetItem):
 
 
 class TransactionLoaderThread(QThread):
-    finished = pyqtSignal(list)
+    finished = pyqtSignal(object)
     progress = pyqtSignal(int)
 
     def __init__(self, budget_app, year, month, parent=None):
@@ -118,7 +117,7 @@ class TransactionLoaderThread(QThread):
             self.finished.emit(transactions)
         except Exception as e:
             print(f"Error loading transactions: {e}")
-            self.finished.emit([])
+            self.finished.emit(TransactionFrame.empty())
 
 
 class TransactionsDialog(QDialog):
@@ -128,9 +127,8 @@ class TransactionsDialog(QDialog):
 
         self.budget_app = budget_app
         self.parent_window = parent
-        self.all_transactions = []
-        self.filtered_transactions = []
-        self.transaction_map = {}
+        self.all_transactions = TransactionFrame.empty()
+        self.filtered_transactions = self.all_transactions
 
         self.setWindowFlags(Qt.WindowType.Window)
         self.setWindowTitle('View All Transactions')
@@ -167,10 +165,6 @@ class TransactionsDialog(QDialog):
             self.on_show_all_dates_toggled)
         filter_layout.addWidget(self.show_all_dates_checkbox)
 
-        self.transactions_table = QTableWidget()
-        
-
-
         filter_layout.addStretch()
 
         layout.addLayout(filter_layout)
@@ -228,17 +222,19 @@ class TransactionsDialog(QDialog):
         filter_controls_layout.addStretch()
         layout.addLayout(filter_controls_layout)
 
-        self.table = QTableWidget()
+        self.model = TransactionTableModel(self)
+        self.model.edit_handler = self.on_cell_changed
+        self.proxy = TransactionSortProxyModel(self)
+        self.proxy.setSourceModel(self.model)
 
-        self.table.setColumnCount(14)
-        self.table.setHorizontalHeaderLabels([
-            'ID', 'Date', 'Type', 'Amount', 'Amount To', 'Qty', 'Account', 'Account To', 'Inv. Acc', 'Payee',
-            'Category', 'Notes', 'Confirmed', 'Delete'
-        ])
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
 
         self.header_view = ExcelHeaderView(self.table)
         self.header_view.set_filters_enabled(False)
         self.table.setHorizontalHeader(self.header_view)
+        # Size columns from the rows on screen rather than sampling the whole model.
+        self.header_view.setResizeContentsPrecision(0)
 
         self.table.verticalHeader().setVisible(False)
 
@@ -270,32 +266,28 @@ class TransactionsDialog(QDialog):
             "Verify this transaction against your real bank statement.\n(Optional - for your own tracking)",
             "Delete transaction"
         ]
-        for col, tooltip in enumerate(header_tooltips):
-            item = self.table.horizontalHeaderItem(col)
-            if item:
-                item.setToolTip(tooltip)
+        self.model.header_tooltips = dict(enumerate(header_tooltips))
 
         self.table.setSortingEnabled(True)
 
         self.table.setEditTriggers(
-            QTableWidget.EditTrigger.DoubleClicked |
-            QTableWidget.EditTrigger.AnyKeyPressed |
-            QTableWidget.EditTrigger.SelectedClicked)
-        self.table.cellChanged.connect(self.on_cell_changed)
+            QAbstractItemView.EditTrigger.DoubleClicked |
+            QAbstractItemView.EditTrigger.AnyKeyPressed |
+            QAbstractItemView.EditTrigger.SelectedClicked)
 
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
                 background-color: white;
                 alternate-background-color: #f9f9f9;
                 font-size: 9pt;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #f0f0f0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #b3d9ff;
                 color: black;
             }
@@ -344,13 +336,22 @@ class TransactionsDialog(QDialog):
             self.table, self.get_category_options)
         self.table.setItemDelegateForColumn(10, self.category_delegate)
 
+        self.confirm_delegate = CheckBoxDelegate(self.table)
+        self.confirm_delegate.toggled.connect(self.on_checkbox_changed)
+        self.table.setItemDelegateForColumn(12, self.confirm_delegate)
+
+        self.delete_delegate = DeleteButtonDelegate(self.table)
+        self.delete_delegate.clicked.connect(self.on_delete_clicked)
+        self.table.setItemDelegateForColumn(13, self.delete_delegate)
+        self.table.setMouseTracking(True)
+
         self.table.setSelectionBehavior(
-            QTableWidget.SelectionBehavior.SelectRows)
+            QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(
-            QTableWidget.SelectionMode.ExtendedSelection)
+            QAbstractItemView.SelectionMode.ExtendedSelection)
         self.table.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
-        self.table.itemSelectionChanged.connect(
-            self.update_selection_totals)
+        self.table.selectionModel().selectionChanged.connect(
+            lambda *_: self.update_selection_totals())
 
         layout.addWidget(self.table)
 
@@ -372,10 +373,6 @@ class TransactionsDialog(QDialog):
 
         self.load_transactions()
 
-    def get_account_options(self):
-        accounts = self.budget_app.get_all_accounts()
-        return [f"{a.account} {a.currency}" for a in accounts if getattr(a, 'is_active', True)]
-
     def get_category_options(self):
         categories = self.budget_app.get_all_categories()
 
@@ -444,13 +441,10 @@ class TransactionsDialog(QDialog):
     def on_transactions_loaded(self, transactions):
         self.progress_bar.setVisible(False)
 
-        valid_transactions = [
-            t for t in transactions if t.date and str(t.date).strip()]
+        valid_transactions = transactions.take(~transactions.is_null('date'))
 
         self.all_transactions = valid_transactions
         self.filtered_transactions = valid_transactions
-        
-        self.transaction_map = {t.id: t for t in self.filtered_transactions}
 
         self.populate_table(self.filtered_transactions)
 
@@ -465,11 +459,7 @@ class TransactionsDialog(QDialog):
 
     def update_count_label(self):
         total_count = len(self.filtered_transactions)
-        visible_count = 0
-
-        for row in range(self.table.rowCount()):
-            if not self.table.isRowHidden(row):
-                visible_count += 1
+        visible_count = self.proxy.rowCount()
 
         show_all = False
         if hasattr(self, 'show_all_dates_checkbox'):
@@ -504,170 +494,19 @@ class TransactionsDialog(QDialog):
         """Check if background loader is running"""
         return hasattr(self, 'loader_thread') and self.loader_thread.isRunning()
 
-    def cleanup(self):
-        """Cleanup resources before closing"""
-        if hasattr(self, 'loader_thread') and self.loader_thread.isRunning():
-            self.loader_thread.quit()
-            self.loader_thread.wait()
-
     def populate_table(self, transactions):
         self.table.setUpdatesEnabled(False)
-        self.table.blockSignals(True)
         try:
-            self.table.setRowCount(len(transactions))
-            self.table.setSortingEnabled(False)
-
             accounts = self.budget_app.get_all_accounts(show_inactive=True)
             accounts_map = {
                 acc.id: f'{acc.account} {acc.currency}' for acc in accounts}
 
-            for row, trans in enumerate(transactions):
-
-                if not trans.date:
-                    continue
-
-                id_item = NumericTableWidgetItem(str(trans.id))
-                id_item.setFlags(id_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                id_item.setBackground(QColor(240, 240, 240))
-                id_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table.setItem(row, 0, id_item)
-
-                date_item = QTableWidgetItem(str(trans.date))
-                self.table.setItem(row, 1, date_item)
-
-                type_item = QTableWidgetItem(str.title(trans.type))
-                type_item.setFlags(type_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 2, type_item)
-
-                amount_value = trans.amount
-
-                amount_item = NumericTableWidgetItem(
-                    format_currency(amount_value) if amount_value is not None else "")
-                if amount_value is not None:
-                    amount_item.setTextAlignment(
-                        Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 3, amount_item)
-
-                to_amount_value = trans.to_amount
-                to_amount_item = NumericTableWidgetItem(
-                    format_currency(to_amount_value) if to_amount_value is not None else "")
-                if to_amount_value is not None:
-                    to_amount_item.setTextAlignment(
-                        Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-
-                if trans.type != 'transfer':
-                    to_amount_item.setFlags(
-                        to_amount_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    to_amount_item.setBackground(QColor(245, 245, 245))
-
-                self.table.setItem(row, 4, to_amount_item)
-
-                qty_value = trans.qty
-                qty_item = NumericTableWidgetItem(
-                    str(qty_value) if qty_value is not None else "")
-                if qty_value is not None:
-                    qty_item.setTextAlignment(
-                        Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 5, qty_item)
-
-                account_name = accounts_map.get(trans.account_id, "")
-                self.table.setItem(row, 6, QTableWidgetItem(account_name))
-
-                to_account_name = accounts_map.get(trans.to_account_id, "")
-                to_account_item = QTableWidgetItem(to_account_name)
-                if trans.type != 'transfer':
-                    to_account_item.setFlags(
-                        to_account_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    to_account_item.setBackground(QColor(245, 245, 245))
-                self.table.setItem(row, 7, to_account_item)
-
-                inv_account_name = accounts_map.get(trans.invest_account_id, "")
-                inv_account_item = QTableWidgetItem(inv_account_name)
-
-                if trans.type not in ['investment', 'income', 'expense']:
-                    inv_account_item.setFlags(
-                        inv_account_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    inv_account_item.setBackground(QColor(245, 245, 245))
-
-                self.table.setItem(row, 8, inv_account_item)
-
-                payee_item = QTableWidgetItem(trans.payee or "")
-                if trans.type == 'transfer':
-                    payee_item.setFlags(payee_item.flags() & ~
-                                        Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 9, payee_item)
-
-                sub_category_item = QTableWidgetItem(trans.sub_category or "")
-                if trans.type == 'transfer':
-                    sub_category_item.setFlags(
-                        sub_category_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.table.setItem(row, 10, sub_category_item)
-
-                notes_item = QTableWidgetItem(trans.notes or "")
-                self.table.setItem(row, 11, notes_item)
-
-                checkbox_widget = QWidget()
-                checkbox_layout = QHBoxLayout()
-                checkbox_layout.setContentsMargins(0, 0, 0, 0)
-                checkbox_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                checkbox = QCheckBox()
-                checkbox.setChecked(trans.confirmed)
-                checkbox.setProperty('trans_id', trans.id)
-                checkbox.stateChanged.connect(self.on_checkbox_changed)
-
-                checkbox_layout.addWidget(checkbox)
-                checkbox_widget.setLayout(checkbox_layout)
-
-                conf_val = "Yes" if trans.confirmed else "No"
-                conf_item = ConfirmedTableWidgetItem(conf_val)
-                conf_item.setFlags(Qt.ItemFlag.ItemIsEnabled |
-                                   Qt.ItemFlag.ItemIsSelectable)
-                conf_item.setForeground(QColor(0, 0, 0, 0))
-                self.table.setItem(row, 12, conf_item)
-
-                self.table.setCellWidget(row, 12, checkbox_widget)
-
-                action_widget = QWidget()
-                action_layout = QHBoxLayout()
-                action_layout.setContentsMargins(1, 1, 1, 1)
-                action_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                delete_btn = QPushButton('✕')
-                delete_btn.setFixedSize(22, 22)
-                delete_btn.setStyleSheet('''
-                    QPushButton {
-                        background-color: #ff4444;
-                        color: white;
-                        border: none;
-                        border-radius: 11px;
-                        font-weight: bold;
-                        font-size: 9px;
-                        margin: 0px;
-                        padding: 0px;
-                    }
-                    QPushButton:hover {
-                        background-color: #cc0000;
-                    }
-                    QPushButton:pressed {
-                        background-color: #990000;
-                    }
-                ''')
-                delete_btn.setProperty('trans_id', trans.id)
-                delete_btn.clicked.connect(self.on_delete_clicked)
-                delete_btn.setToolTip('Delete transaction')
-
-                action_layout.addWidget(delete_btn)
-                action_widget.setLayout(action_layout)
-
-                self.table.setCellWidget(row, 13, action_widget)
-
-                self.color_row_by_type(row, trans.type)
+            self.model.set_transactions(transactions, accounts_map)
 
             self.table.resizeColumnsToContents()
-            
+
             header = self.table.horizontalHeader()
-            for i in range(self.table.columnCount()):
+            for i in range(self.model.columnCount()):
                 current_width = header.sectionSize(i)
                 header.resizeSection(i, current_width + 25)
 
@@ -676,31 +515,19 @@ class TransactionsDialog(QDialog):
             total_width = self.table.horizontalHeader().length() + 80
             if total_width > self.width():
                 self.resize(total_width, self.height())
-        
+
         finally:
-            self.table.blockSignals(False)
-            self.table.setSortingEnabled(True)
             self.table.setUpdatesEnabled(True)
             self.update_selection_totals()
 
-    def on_cell_changed(self, row, column):
+    def on_cell_changed(self, row, column, new_value):
+        """Validate and save an edit of a model row; returns True when it was saved."""
         try:
-            item = self.table.item(row, column)
-            if not item:
-                return
-
             if column == 12:
-                return
+                return False
 
-
-            trans_id_item = self.table.item(row, 0)
-            if not trans_id_item:
-                return
-
-            trans_id = int(trans_id_item.text())
-            
-            trans = self.get_transaction_by_id(trans_id)
-            if not trans: return
+            trans = self.filtered_transactions[row]
+            trans_id = trans.id
 
             if hasattr(trans, 'confirmed') and trans.confirmed:
                 self.show_status("Cannot edit confirmed transaction", error=True)
@@ -708,9 +535,7 @@ class TransactionsDialog(QDialog):
                                     "This transaction is confirmed and cannot be modified.\n"
                                     "Please uncheck the confirmation box first.")
                 self.revert_cell(row, column)
-                return
-
-            new_value = item.text().strip()
+                return False
 
             field = None
 
@@ -722,7 +547,7 @@ class TransactionsDialog(QDialog):
                     self.show_status(
                         f'Invalid date format: {new_value}. Use YYYY-MM-DD', error=True)
                     self.revert_cell(row, column)
-                    return
+                    return False
             elif column == 3:
                 field = 'amount'
                 try:
@@ -730,14 +555,13 @@ class TransactionsDialog(QDialog):
                 except ValueError:
                     self.show_status('Invalid amount expression', error=True)
                     self.revert_cell(row, column)
-                    return
+                    return False
             elif column == 4:
 
-                trans_type = self.table.item(row, 2).text().lower()
-                if trans_type != 'transfer':
+                if trans.type != 'transfer':
 
                     self.revert_cell(row, column)
-                    return
+                    return False
 
                 field = 'to_amount'
                 try:
@@ -745,7 +569,7 @@ class TransactionsDialog(QDialog):
                 except ValueError:
                     self.show_status('Invalid amount expression', error=True)
                     self.revert_cell(row, column)
-                    return
+                    return False
             elif column == 5:
                 field = 'qty'
                 if new_value:
@@ -754,7 +578,7 @@ class TransactionsDialog(QDialog):
                     except ValueError:
                         self.show_status('Invalid quantity', error=True)
                         self.revert_cell(row, column)
-                        return
+                        return False
                 else:
                     new_value = None
             elif column == 6:
@@ -765,7 +589,7 @@ class TransactionsDialog(QDialog):
                     self.show_status(
                         f'Account "{new_value}" not found.', error=True)
                     self.revert_cell(row, column)
-                    return
+                    return False
                 new_value = account_id
             elif column == 7:
                 field = 'to_account_id'
@@ -775,7 +599,7 @@ class TransactionsDialog(QDialog):
                     self.show_status(
                         f'Account "{new_value}" not found.', error=True)
                     self.revert_cell(row, column)
-                    return
+                    return False
                 new_value = account_id
             elif column == 8:
                 field = 'invest_account_id'
@@ -788,23 +612,22 @@ class TransactionsDialog(QDialog):
                         self.show_status(
                             f'Investment Account "{new_value}" not found.', error=True)
                         self.revert_cell(row, column)
-                        return
+                        return False
                     new_value = account_id
             elif column == 9:
                 field = 'payee'
             elif column == 10:
                 field = 'category_id'
 
-                categories = self.budget_app.get_all_categories()
-                cat_obj = next(
-                    (c for c in categories if c.sub_category == new_value), None)
+                cat_obj = self.budget_app.get_category_by_sub_category(
+                    new_value) if new_value else None
 
                 if not cat_obj and new_value:
 
                     self.show_status(
                         f'Category "{new_value}" not found.', error=True)
                     self.revert_cell(row, column)
-                    return
+                    return False
 
                 new_value = cat_obj.id if cat_obj else None
             elif column == 11:
@@ -816,70 +639,36 @@ class TransactionsDialog(QDialog):
                 if success:
                     self.show_status(f'Updated transaction #{trans_id}')
 
-                    trans = self.filtered_transactions[row]
                     setattr(trans, field, new_value)
+                    if column == 10:
+                        trans.sub_category = cat_obj.sub_category if cat_obj else None
+                    self.model.refresh_row(row)
 
                     if self.parent_window and hasattr(self.parent_window, 'update_balance_display'):
                         self.parent_window.update_balance_display()
-                else:
-                    self.show_status(
-                        f'Error updating transaction #{trans_id}', error=True)
-                    self.revert_cell(row, column)
+                    return True
+
+                self.show_status(
+                    f'Error updating transaction #{trans_id}', error=True)
+                self.revert_cell(row, column)
+            return False
 
         except Exception as e:
             print(f"Error in on_cell_changed: {e}")
             self.show_status('Error updating transaction', error=True)
             self.revert_cell(row, column)
+            return False
 
     def revert_cell(self, row, column):
-        """Revert cell to value from local model"""
-        try:
-            self.table.blockSignals(True)
-            trans_id_item = self.table.item(row, 0)
-            if not trans_id_item:
-                return
-
-            trans_id = int(trans_id_item.text())
-            trans = self.get_transaction_by_id(trans_id)
-
-            if not trans:
-                return
-
-            value = ""
-            if column == 1:
-                value = str(trans.date)
-            elif column == 3:
-                value = f"{trans.amount:.2f}" if trans.amount is not None else ""
-            elif column == 4:
-                value = f"{trans.to_amount:.2f}" if trans.to_amount is not None else ""
-            elif column == 5:
-                value = str(trans.qty) if trans.qty is not None else ""
-            elif column == 6:
-                value = self.get_account_name_by_id(trans.account_id)
-            elif column == 7:
-                value = self.get_account_name_by_id(trans.to_account_id)
-            elif column == 8:
-                value = self.get_account_name_by_id(trans.invest_account_id)
-            elif column == 9:
-                value = trans.payee or ""
-            elif column == 10:
-                value = trans.sub_category or ""
-            elif column == 11:
-                value = trans.notes or ""
-
-            self.table.item(row, column).setText(value)
-        except Exception as e:
-            print(f"Error reverting cell: {e}")
-        finally:
-            self.table.blockSignals(False)
+        """Repaint a cell from the local model after a rejected edit"""
+        self.model.refresh_row(row)
 
     def get_account_name_by_id(self, account_id):
         if account_id is None:
             return ""
-        accounts = self.budget_app.get_all_accounts()
-        for account in accounts:
-            if account.id == account_id:
-                return f'{account.account} {account.currency}'
+        account = self.budget_app.get_account_by_id(account_id)
+        if account and account.is_active:
+            return f'{account.account} {account.currency}'
         return ""
 
     def _build_account_currency_cache(self):
@@ -915,41 +704,39 @@ class TransactionsDialog(QDialog):
             pass
 
     def _compute_totals_for_rows(self, rows):
-        """Compute per-currency totals for the given table row indices."""
-        amount_totals = {}      # currency -> float
-        to_amount_totals = {}   # currency -> float
+        """Compute per-currency totals for the given model rows."""
+        frame = self.filtered_transactions
+        positions = np.asarray(rows, dtype=np.int64)
+        amount_totals = self._currency_totals(frame, positions, 'amount', 'account_id')
+        to_amount_totals = self._currency_totals(frame, positions, 'to_amount', 'to_account_id')
 
-        for row in rows:
-            id_item = self.table.item(row, 0)
-            if not id_item:
-                continue
-
-            try:
-                trans_id = int(id_item.text())
-            except (TypeError, ValueError):
-                continue
-
-            trans = self.get_transaction_by_id(trans_id)
-            if not trans:
-                continue
+        return amount_totals, to_amount_totals
 
-            if getattr(trans, 'amount', None) is not None:
-                cur = self._get_account_currency(getattr(trans, 'account_id', None))
-                if cur:
-                    amount_totals[cur] = amount_totals.get(cur, 0.0) + float(trans.amount or 0.0)
+    def _currency_totals(self, frame, positions, amount_col, account_col):
+        """Sum one amount column per currency of its account column over frame rows."""
+        totals = {}
+        amounts = frame.column(amount_col, fill=0.0)[positions]
+        account_ids = frame.column(account_col)[positions]
+        present = ~frame.is_null(amount_col)[positions] & ~frame.is_null(account_col)[positions]
 
-            if getattr(trans, 'to_amount', None) is not None:
-                cur_to = self._get_account_currency(getattr(trans, 'to_account_id', None))
-                if cur_to:
-                    to_amount_totals[cur_to] = to_amount_totals.get(cur_to, 0.0) + float(trans.to_amount or 0.0)
+        for account_id in np.unique(account_ids[present]).tolist():
+            cur = self._get_account_currency(account_id)
+            if cur:
+                rows = present & (account_ids == account_id)
+                totals[cur] = totals.get(cur, 0.0) + float(amounts[rows].sum())
 
-        return amount_totals, to_amount_totals
+        return totals
 
     def _visible_rows(self):
-        return [
-            row for row in range(self.table.rowCount())
-            if not self.table.isRowHidden(row)
-        ]
+        """Model rows currently shown, in view order."""
+        return self.proxy.source_rows()
+
+    def _selected_view_rows(self):
+        ranges = [np.arange(r.top(), r.bottom() + 1)
+                  for r in self.table.selectionModel().selection()]
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(ranges))
 
     def update_selection_totals(self):
         """
@@ -959,31 +746,27 @@ class TransactionsDialog(QDialog):
         """
         try:
             visible_rows = self._visible_rows()
-            if not visible_rows:
+            if not len(visible_rows):
                 self._last_totals_text = ''
                 self._restore_totals_text()
                 return
 
-            selected_ranges = self.table.selectedRanges()
-            selected_rows = set()
-            for r in selected_ranges:
-                for row in range(r.topRow(), r.bottomRow() + 1):
-                    if 0 <= row < self.table.rowCount() and not self.table.isRowHidden(row):
-                        selected_rows.add(row)
+            selected_rows = self._selected_view_rows()
 
             if len(selected_rows) == 1 and not getattr(self, '_suppress_single_row_deselect', False):
                 self._suppress_single_row_deselect = True
                 try:
-                    row = next(iter(selected_rows))
-                    cur_col = max(0, self.table.currentColumn())
-                    self.table.setCurrentCell(row, cur_col)
+                    cur_col = max(0, self.table.currentIndex().column())
+                    self.table.selectionModel().setCurrentIndex(
+                        self.proxy.index(int(selected_rows[0]), cur_col),
+                        QItemSelectionModel.SelectionFlag.NoUpdate)
                     self.table.clearSelection()
                 finally:
                     self._suppress_single_row_deselect = False
-                selected_rows = set()
+                selected_rows = selected_rows[:0]
 
             show_selected = len(selected_rows) >= 2
-            rows_to_sum = sorted(selected_rows) if show_selected else visible_rows
+            rows_to_sum = visible_rows[selected_rows] if show_selected else visible_rows
 
             amount_totals, to_amount_totals = self._compute_totals_for_rows(rows_to_sum)
 
@@ -1013,39 +796,16 @@ class TransactionsDialog(QDialog):
         except Exception as e:
             print(f"Error updating selection totals: {e}")
 
-    def color_row_by_type(self, row, trans_type):
-        color_map = {
-            'income': QColor(230, 255, 230),
-            'expense': QColor(255, 230, 230),
-            'transfer': QColor(230, 230, 255),
-            'investment': QColor(255, 255, 230)
-        }
-
-        if trans_type in color_map:
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item:
-                    item.setBackground(color_map[trans_type])
-
-    def on_checkbox_changed(self, state):
+    def on_checkbox_changed(self, index):
         try:
-            checkbox = self.sender()
-            trans_id = checkbox.property('trans_id')
+            row = self.proxy.mapToSource(index).row()
+            trans = self.filtered_transactions[row]
+            trans_id = trans.id
             self.budget_app.toggle_confirmation(trans_id)
             self.show_status(f'Transaction #{trans_id} confirmation toggled!')
 
-            if trans_id in self.transaction_map:
-                self.transaction_map[trans_id].confirmed = checkbox.isChecked()
-
-            index = self.table.indexAt(checkbox.parentWidget().pos())
-            if index.isValid():
-                row = index.row()
-                
-                conf_item = self.table.item(row, 12)
-                if conf_item:
-                    is_checked = checkbox.isChecked()
-                    conf_item.setData(ConfirmedTableWidgetItem.FILTER_ROLE, "Yes" if is_checked else "No")
-                    conf_item.setText("Yes" if is_checked else "No")
+            trans.confirmed = not trans.confirmed
+            self.model.refresh_row(row)
 
             if self.parent_window and hasattr(self.parent_window, 'update_balance_display'):
                 self.parent_window.update_balance_display()
@@ -1058,18 +818,10 @@ class TransactionsDialog(QDialog):
 
     def confirm_all_visible(self):
         try:
-            unconfirmed_transactions = []
-
-            for row in range(self.table.rowCount()):
-                if self.table.isRowHidden(row):
-                    continue
-
-                checkbox_widget = self.table.cellWidget(row, 12)
-                if checkbox_widget:
-                    checkbox = checkbox_widget.findChild(QCheckBox)
-                    if checkbox and not checkbox.isChecked():
-                        trans_id = checkbox.property('trans_id')
-                        unconfirmed_transactions.append(trans_id)
+            frame = self.filtered_transactions
+            rows = self._visible_rows()
+            unconfirmed = ~frame.columns['confirmed'][rows]
+            unconfirmed_transactions = frame.columns['id'][rows][unconfirmed].tolist()
 
             if not unconfirmed_transactions:
                 self.show_status(
@@ -1085,13 +837,10 @@ class TransactionsDialog(QDialog):
             )
 
             if reply == QMessageBox.StandardButton.Yes:
-                confirmed_count = 0
-                for trans_id in unconfirmed_transactions:
-                    try:
-                        self.budget_app.toggle_confirmation(trans_id)
-                        confirmed_count += 1
-                    except Exception as e:
-                        print(f"Error confirming transaction {trans_id}: {e}")
+                if not self.budget_app.set_confirmed_bulk(unconfirmed_transactions, True):
+                    self.show_status('Error confirming transactions!', error=True)
+                    return
+                confirmed_count = len(unconfirmed_transactions)
 
                 self.load_transactions()
 
@@ -1106,32 +855,18 @@ class TransactionsDialog(QDialog):
             self.show_status('Error confirming transactions!', error=True)
 
     def update_confirm_all_button_state(self):
-        has_unconfirmed = False
-        all_confirmed = True
-
-        visible_rows = 0
-        for row in range(self.table.rowCount()):
-            if self.table.isRowHidden(row):
-                continue
-
-            visible_rows += 1
-            checkbox_widget = self.table.cellWidget(row, 12)
-            if checkbox_widget:
-                checkbox = checkbox_widget.findChild(QCheckBox)
-                if checkbox:
-                    if not checkbox.isChecked():
-                        has_unconfirmed = True
-                        all_confirmed = False
-                        break
+        rows = self._visible_rows()
+        visible_rows = len(rows)
+        has_unconfirmed = not self.filtered_transactions.columns['confirmed'][rows].all()
+        all_confirmed = not has_unconfirmed
 
         self.confirm_all_button.setEnabled(
             visible_rows > 0 and has_unconfirmed)
         self.all_confirmed_label.setVisible(visible_rows > 0 and all_confirmed)
 
-    def on_delete_clicked(self):
+    def on_delete_clicked(self, index):
         try:
-            button = self.sender()
-            trans_id = button.property('trans_id')
+            trans_id = self.model.transaction_id(self.proxy.mapToSource(index).row())
 
             trans = self.get_transaction_by_id(trans_id)
             if trans and hasattr(trans, 'confirmed') and trans.confirmed:
@@ -1199,27 +934,10 @@ class TransactionsDialog(QDialog):
         super().closeEvent(event)
 
     def get_transaction_by_id(self, trans_id):
-        if hasattr(self, 'transaction_map'):
-            return self.transaction_map.get(trans_id)
-        for t in self.filtered_transactions:
-            if t.id == trans_id:
-                return t
-        return None
+        return self.filtered_transactions.row_by_id(trans_id)
 
     def filter_content(self, text):
         """Filter table rows based on text matching."""
         search_text = text.lower()
-        rows = self.table.rowCount()
-        cols = self.table.columnCount()
-        
-        for row in range(rows):
-            should_show = False
-            if not search_text:
-                should_show = True
-            else:
-                for col in range(cols):
-                    item = self.table.item(row, col)
-                    if item and search_text in item.text().lower():
-                        should_show = True
-                        break
-            self.table.setRowHidden(row, not should_show)
+        self.proxy.set_row_mask(
+            'search', self.model.search_mask(search_text) if search_text else None)